@@ -0,0 +1,256 @@
+"""
+Modulo Analisi Avanzata - metriche vettorizzate con NumPy
+Carica lo storico in colonne (quota, puntata, P/L, data, sport, esito)
+e calcola bankroll, drawdown, serie e calibrazione senza loop Python.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+from bet_records import BetRecord
+
+# Codici esito nella colonna `outcome`
+WON = 1
+LOST = 0
+PENDING = -1
+
+# Fasce di quota per ROI e hit rate
+ODDS_BUCKETS = [1.0, 1.5, 2.0, 3.0, 5.0, np.inf]
+
+
+@lru_cache(maxsize=4096)
+def _parse_bet_date(date_string: str) -> float:
+    """Converte "05/02/2026 02:10" in timestamp (0 se non valida)"""
+    for fmt in ('%d/%m/%Y %H:%M', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(date_string.strip(), fmt).timestamp()
+        except ValueError:
+            continue
+    return 0.0
+
+
+def parse_timestamp(bet: BetRecord) -> float:
+    """Timestamp della scommessa: data dello screenshot, altrimenti data di analisi"""
+    timestamp = _parse_bet_date(bet.date or '')
+    if timestamp:
+        return timestamp
+    try:
+        return datetime.fromisoformat(bet.analyzed_at or '').timestamp()
+    except ValueError:
+        return 0.0
+
+
+class BetColumns:
+    """
+    Storico in formato colonnare: un array NumPy per campo, ordinato per data.
+    """
+
+    def __init__(self, odds, stake, pnl, timestamp, sport_code, outcome, sports):
+        order = np.argsort(timestamp, kind='stable')
+        self.odds = odds[order]
+        self.stake = stake[order]
+        self.pnl = pnl[order]
+        self.timestamp = timestamp[order]
+        self.sport_code = sport_code[order]
+        self.outcome = outcome[order]
+        self.sports = sports
+
+    @classmethod
+    def from_bets(cls, bets: List[BetRecord]) -> 'BetColumns':
+        """Costruisce le colonne dalla lista `history["bets"]`"""
+        n = len(bets)
+        odds = np.empty(n, dtype=np.float64)
+        stake = np.empty(n, dtype=np.float64)
+        pnl = np.empty(n, dtype=np.float64)
+        timestamp = np.empty(n, dtype=np.float64)
+        outcome = np.empty(n, dtype=np.int8)
+        sport_names = []
+
+        for i, bet in enumerate(bets):
+            odds[i] = bet.quota or 0.0
+            stake[i] = bet.importo or 0.0
+            pnl[i] = bet.profit_loss or 0.0
+            timestamp[i] = parse_timestamp(bet)
+            outcome[i] = WON if bet.won is True else LOST if bet.won is False else PENDING
+            sport_names.append(bet.sport or '')
+
+        sports, sport_code = np.unique(np.array(sport_names, dtype=object), return_inverse=True)
+        return cls(odds, stake, pnl, timestamp, sport_code.astype(np.int32), outcome, list(sports))
+
+    def extend(self, other: 'BetColumns') -> 'BetColumns':
+        """Nuove colonne con le scommesse di `other` in coda (riordinate per data)"""
+        sports = sorted(set(self.sports) | set(other.sports))
+        lookup = {sport: i for i, sport in enumerate(sports)}
+        remap_self = np.array([lookup[s] for s in self.sports], dtype=np.int32)
+        remap_other = np.array([lookup[s] for s in other.sports], dtype=np.int32)
+        return BetColumns(
+            np.concatenate((self.odds, other.odds)),
+            np.concatenate((self.stake, other.stake)),
+            np.concatenate((self.pnl, other.pnl)),
+            np.concatenate((self.timestamp, other.timestamp)),
+            np.concatenate((remap_self[self.sport_code], remap_other[other.sport_code])),
+            np.concatenate((self.outcome, other.outcome)),
+            sports
+        )
+
+    def __len__(self):
+        return len(self.odds)
+
+    @property
+    def settled(self) -> np.ndarray:
+        """Maschera delle scommesse concluse (vinte o perse)"""
+        return self.outcome != PENDING
+
+
+def bankroll_curve(columns: BetColumns, starting_bankroll: float = 0.0) -> np.ndarray:
+    """Bankroll cumulato dopo ogni scommessa conclusa"""
+    return starting_bankroll + np.cumsum(columns.pnl[columns.settled])
+
+
+def max_drawdown(curve: np.ndarray) -> float:
+    """Massimo calo dal picco precedente (include il punto di partenza a 0)"""
+    if curve.size == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(np.concatenate(([0.0], curve)))[1:]
+    return float(np.max(peaks - curve))
+
+
+def longest_streaks(outcome: np.ndarray) -> Dict[str, int]:
+    """Serie più lunghe di vittorie e sconfitte consecutive (ignora le pendenti)"""
+    settled = outcome[outcome != PENDING]
+    if settled.size == 0:
+        return {'win': 0, 'loss': 0}
+
+    # Inizio di ogni run: primo elemento o cambio di esito
+    starts = np.flatnonzero(np.concatenate(([True], settled[1:] != settled[:-1])))
+    lengths = np.diff(np.concatenate((starts, [settled.size])))
+    values = settled[starts]
+
+    win_runs = lengths[values == WON]
+    loss_runs = lengths[values == LOST]
+    return {
+        'win': int(win_runs.max()) if win_runs.size else 0,
+        'loss': int(loss_runs.max()) if loss_runs.size else 0
+    }
+
+
+def odds_bucket_report(columns: BetColumns) -> List[Dict]:
+    """ROI e hit rate reale vs probabilità implicita per fascia di quota"""
+    mask = columns.settled & (columns.odds > 0)
+    odds = columns.odds[mask]
+    stake = columns.stake[mask]
+    pnl = columns.pnl[mask]
+    won = (columns.outcome[mask] == WON).astype(np.float64)
+
+    edges = np.array(ODDS_BUCKETS)
+    idx = np.clip(np.digitize(odds, edges) - 1, 0, len(edges) - 2)
+    n_buckets = len(edges) - 1
+
+    counts = np.bincount(idx, minlength=n_buckets)
+    staked = np.bincount(idx, weights=stake, minlength=n_buckets)
+    profit = np.bincount(idx, weights=pnl, minlength=n_buckets)
+    wins = np.bincount(idx, weights=won, minlength=n_buckets)
+    implied = np.bincount(idx, weights=1.0 / odds, minlength=n_buckets)
+
+    report = []
+    for b in range(n_buckets):
+        if counts[b] == 0:
+            continue
+        report.append({
+            'low': float(edges[b]),
+            'high': float(edges[b + 1]),
+            'bets': int(counts[b]),
+            'roi': float(profit[b] / staked[b] * 100) if staked[b] > 0 else 0.0,
+            'hit_rate': float(wins[b] / counts[b] * 100),
+            'implied': float(implied[b] / counts[b] * 100)
+        })
+    return report
+
+
+def calibration(columns: BetColumns, bins: int = 10) -> Dict:
+    """
+    Calibrazione stile closing-line: confronta la probabilità implicita nella quota
+    giocata con la frequenza reale di vincita. Ritorna Brier score, edge medio
+    e tabella per decile di probabilità.
+    """
+    mask = columns.settled & (columns.odds > 1)
+    if not mask.any():
+        return {'brier': None, 'edge': None, 'table': []}
+
+    implied = 1.0 / columns.odds[mask]
+    won = (columns.outcome[mask] == WON).astype(np.float64)
+
+    idx = np.minimum((implied * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(idx, minlength=bins)
+    observed = np.bincount(idx, weights=won, minlength=bins)
+    expected = np.bincount(idx, weights=implied, minlength=bins)
+
+    table = [
+        {
+            'bin': b,
+            'bets': int(counts[b]),
+            'implied': float(expected[b] / counts[b] * 100),
+            'observed': float(observed[b] / counts[b] * 100)
+        }
+        for b in np.flatnonzero(counts)
+    ]
+    return {
+        'brier': float(np.mean((implied - won) ** 2)),
+        'edge': float(np.mean(won - implied) * 100),
+        'table': table
+    }
+
+
+def advanced_stats(columns: BetColumns) -> Dict:
+    """Calcola tutte le metriche avanzate in un unico passaggio"""
+    curve = bankroll_curve(columns)
+    settled = columns.settled
+    return {
+        'bets': len(columns),
+        'settled': int(settled.sum()),
+        'profit': float(curve[-1]) if curve.size else 0.0,
+        'peak': float(max(curve.max(), 0.0)) if curve.size else 0.0,
+        'max_drawdown': max_drawdown(curve),
+        'streaks': longest_streaks(columns.outcome),
+        'odds_buckets': odds_bucket_report(columns),
+        'calibration': calibration(columns)
+    }
+
+
+def format_advanced_stats(stats: Dict) -> str:
+    """Testo Markdown per `/stats advanced`"""
+    if stats['settled'] == 0:
+        return "Nessuna scommessa conclusa da analizzare!"
+
+    lines = [
+        f"📈 *Bankroll*: {stats['profit']:+.2f}€ (picco {stats['peak']:+.2f}€)",
+        f"📉 Max drawdown: -{stats['max_drawdown']:.2f}€",
+        f"🔥 Serie vincente più lunga: {stats['streaks']['win']}",
+        f"🧊 Serie perdente più lunga: {stats['streaks']['loss']}",
+        "",
+        "*ROI per fascia di quota*"
+    ]
+    for bucket in stats['odds_buckets']:
+        high = "+" if np.isinf(bucket['high']) else f"{bucket['high']:.2f}"
+        lines.append(
+            f"{bucket['low']:.2f}-{high}: {bucket['roi']:+.1f}% "
+            f"({bucket['bets']} sc.) | hit {bucket['hit_rate']:.0f}% vs {bucket['implied']:.0f}% impl."
+        )
+
+    cal = stats['calibration']
+    if cal['brier'] is not None:
+        lines.append("")
+        lines.append("*Calibrazione*")
+        lines.append(f"Brier score: {cal['brier']:.3f}")
+        lines.append(f"Edge medio vs quota: {cal['edge']:+.1f}%")
+        for row in cal['table']:
+            lines.append(
+                f"   p {row['bin'] * 10}-{row['bin'] * 10 + 10}%: "
+                f"{row['observed']:.0f}% reale vs {row['implied']:.0f}% impl. ({row['bets']})"
+            )
+
+    lines.append(f"\nScommesse: {stats['bets']} (concluse: {stats['settled']})")
+    return "\n".join(lines)
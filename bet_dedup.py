@@ -0,0 +1,70 @@
+"""
+Modulo Duplicati - indice impronta -> posizione nello storico
+Ogni schedina salvata ha un'impronta (chat, partita, esito, giocatore, quota,
+importo, data: vedi bet_records.fingerprint). L'indice sta in memoria ed è
+salvato come log in sola aggiunta; all'avvio si indicizzano solo le scommesse
+arrivate dopo l'ultima voce del log.
+"""
+
+import os
+from typing import Dict, Optional
+
+from history_archive import HistoryArchive
+
+DEDUP_LOG_NAME = "dedup.log"
+
+
+class DedupIndex:
+    """Riconosce in O(1) una schedina già registrata"""
+
+    def __init__(self, archive: HistoryArchive):
+        self.archive = archive
+        self.path = os.path.join(archive.directory, DEDUP_LOG_NAME)
+        self._positions: Dict[str, int] = {}
+        self.load()
+
+    def load(self):
+        """Legge il log (se è della generazione corrente) e indicizza le scommesse mancanti"""
+        generation = str(self.archive.manifest["generation"])
+        indexed = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                if f.readline().strip() == generation:
+                    for line in f:
+                        fingerprint, _, position = line.strip().partition(' ')
+                        if position.isdigit():
+                            self._positions[fingerprint] = int(position)
+                            indexed = max(indexed, int(position) + 1)
+
+        total = len(self.archive)
+        if indexed > total:
+            # Log più avanti dello storico (es. storico ripristinato): si riparte da zero
+            self._positions.clear()
+            indexed = 0
+        if indexed == 0:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(generation + '\n')
+
+        # Solo le scommesse non ancora nel log
+        if indexed < total:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for position, record in enumerate(self.archive.iter_from(indexed), start=indexed):
+                    fingerprint = record.fingerprint()
+                    self._positions.setdefault(fingerprint, position)
+                    f.write(f"{fingerprint} {position}\n")
+
+    def find(self, fingerprint: str) -> Optional[int]:
+        """Posizione della schedina già registrata (None se nuova)"""
+        return self._positions.get(fingerprint)
+
+    def add(self, fingerprint: str, position: int):
+        """Registra una nuova schedina"""
+        self._positions.setdefault(fingerprint, position)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f"{fingerprint} {position}\n")
+
+    def clear(self):
+        """Svuota l'indice (dopo clear dello storico, nuova generazione)"""
+        self._positions.clear()
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(f"{self.archive.manifest['generation']}\n")
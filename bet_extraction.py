@@ -0,0 +1,126 @@
+"""
+Modulo Estrazione - lettura della schedina con Gemini in JSON strutturato
+Il modello risponde con application/json vincolato a BET_SCHEMA (niente
+testo libero o blocchi markdown da ripulire); ogni chiamata registra token,
+byte dell'immagine e latenza nelle metriche. Le schedine lette finiscono nella
+cache condivisa: la stessa immagine (o testo) non viene mai riletta due volte.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from bet_records import normalize_bet_info
+from metrics import metrics
+from shared_cache import cache
+
+# Modello configurabile (es. gemini-1.5-flash-8b per costi minori, gemini-1.5-pro per precisione)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+
+_NULLABLE_STRING = {'type': 'STRING', 'nullable': True}
+_NULLABLE_NUMBER = {'type': 'NUMBER', 'nullable': True}
+
+LEG_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'sport': _NULLABLE_STRING,
+        'match': _NULLABLE_STRING,
+        'bet_type': _NULLABLE_STRING,
+        'player': _NULLABLE_STRING,
+        'quota': _NULLABLE_NUMBER,
+        'date': _NULLABLE_STRING,
+    },
+    'required': ['sport', 'match', 'bet_type'],
+}
+
+BET_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'sport': _NULLABLE_STRING,
+        'match': _NULLABLE_STRING,
+        'bet_type': _NULLABLE_STRING,
+        'player': _NULLABLE_STRING,
+        'quota': _NULLABLE_NUMBER,
+        'importo': _NULLABLE_NUMBER,
+        'vincita_potenziale': _NULLABLE_NUMBER,
+        'date': _NULLABLE_STRING,
+        'legs': {'type': 'ARRAY', 'items': LEG_SCHEMA},
+    },
+    'required': ['sport', 'quota', 'importo', 'legs'],
+}
+
+# Il formato lo impone lo schema: il prompt contiene solo le regole di contenuto
+EXTRACTION_PROMPT = """Estrai i dati di questa schedina.
+- legs: una voce per ogni selezione (una sola per le singole)
+- multipla: quota = quota totale, match/bet_type null
+- sport: "NBA", "Calcio", "Tennis" o altro; player solo per scommesse su un giocatore
+- bet_type: testo esatto (es. "OVER 1.5 tiri da 3", "Vincente", "Under 2.5 gol")
+- date: DD/MM/YYYY HH:MM; campi non visibili: null"""
+
+# Validità delle schedine già lette nella cache condivisa
+OCR_CACHE_TTL = 7 * 86400
+
+GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': BET_SCHEMA,
+    'temperature': 0,
+}
+
+
+def record_usage(kind: str, response, latency: float, payload_bytes: int = 0):
+    """Token in/out, byte inviati e latenza di una chiamata Gemini"""
+    metrics.incr(f'gemini.{kind}.calls')
+    metrics.observe(f'gemini.{kind}.latency_s', latency)
+    if payload_bytes:
+        metrics.observe(f'gemini.{kind}.image_kb', payload_bytes / 1024)
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None:
+        metrics.observe(f'gemini.{kind}.input_tokens', getattr(usage, 'prompt_token_count', None))
+        metrics.observe(f'gemini.{kind}.output_tokens', getattr(usage, 'candidates_token_count', None))
+
+
+def extraction_key(kind: str, payload: bytes) -> str:
+    """Chiave di cache della schedina: hash dell'immagine o del testo"""
+    return f"ocr:{kind}:{hashlib.blake2b(payload, digest_size=16).hexdigest()}"
+
+
+def cached_bet_info(key: str, kind: str) -> Optional[Dict]:
+    """Schedina già estratta (normalizzata), None se non è in cache"""
+    raw = cache.get(key)
+    if raw is None:
+        return None
+    try:
+        bet_info = normalize_bet_info(raw)
+    except ValueError:
+        return None
+    metrics.incr(f'gemini.{kind}.cached')
+    return bet_info
+
+
+def generate_bet_info(model, parts: List, kind: str, payload_bytes: int = 0,
+                      cache_key: Optional[str] = None) -> Optional[Dict]:
+    """
+    Chiede a Gemini la schedina in JSON strutturato e la normalizza (e la salva
+    in cache sotto `cache_key`). None (con metrica di errore) se la risposta
+    non è una schedina valida.
+    """
+    start = time.perf_counter()
+    try:
+        response = model.generate_content(parts, generation_config=GENERATION_CONFIG)
+    except Exception as e:
+        metrics.incr(f'gemini.{kind}.errors')
+        print(f"Errore Gemini: {e}")
+        return None
+    record_usage(kind, response, time.perf_counter() - start, payload_bytes)
+
+    try:
+        bet_info = normalize_bet_info(json.loads(response.text))
+    except (ValueError, TypeError) as e:
+        metrics.incr(f'gemini.{kind}.invalid')
+        print(f"Errore nell'estrazione: {e}")
+        return None
+    if cache_key:
+        cache.set(cache_key, bet_info, OCR_CACHE_TTL)
+    return bet_info
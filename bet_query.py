@@ -0,0 +1,320 @@
+"""
+Modulo Query Statistiche - filtri su /stats con indici secondari
+Lo storico è tenuto in colonne NumPy in ordine di inserimento, più:
+- un ordinamento per data (intervalli con ricerca binaria)
+- indici hash sport / mercato / giocatore -> posizioni
+Gli indici si aggiornano a ogni add_bet; una query interseca gli indici,
+filtra quote ed esito in modo vettorizzato e aggrega per sport con
+aggregate_by_sport, la stessa funzione che tiene aggiornato stats_by_sport del
+riepilogo normale (merge_stats del contributo di ogni scommessa).
+
+Sintassi (parole separate da spazi, tutte opzionali):
+    sport:nba  mercato:giocatore  giocatore:lebron  esito:vinte
+    quota>2  quota<=1.5  quota:1.5-2.5 (estremi inclusi)
+    oggi | settimana | mese | anno   dal:01/02/2026  al:28/02/2026
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from bet_analytics import LOST, PENDING, WON, parse_timestamp
+from bet_records import BetRecord, canonical_text
+
+# Mercati riconosciuti (per mercato:...)
+MARKETS = ('giocatore', 'multipla', 'overunder', 'handicap', 'esito')
+OUTCOMES = {'vinte': WON, 'vinta': WON, 'perse': LOST, 'persa': LOST, 'incorso': PENDING, 'in_corso': PENDING}
+PERIODS = ('oggi', 'settimana', 'mese', 'anno')
+
+_INITIAL_CAPACITY = 1024
+
+
+def market_of(record: BetRecord) -> str:
+    """Categoria di mercato della scommessa"""
+    if record.legs:
+        return 'multipla'
+    if record.player:
+        return 'giocatore'
+    bet_lower = (record.bet_type or '').lower()
+    if 'over' in bet_lower or 'under' in bet_lower:
+        return 'overunder'
+    if 'handicap' in bet_lower or 'spread' in bet_lower or re.search(r'[+-]\d', bet_lower):
+        return 'handicap'
+    return 'esito'
+
+
+def outcome_code(record: BetRecord) -> int:
+    return WON if record.won is True else LOST if record.won is False else PENDING
+
+
+def aggregate_by_sport(sport_names: List[str], codes: np.ndarray, outcome: np.ndarray,
+                       stake: np.ndarray, pnl: np.ndarray) -> Dict[str, Dict]:
+    """
+    Statistiche per sport (formato di stats_by_sport) di righe in colonne:
+    unico calcolo per il riepilogo completo e per le query filtrate.
+    """
+    n = len(sport_names)
+    settled = outcome != PENDING
+
+    totals = np.bincount(codes, minlength=n)
+    won = np.bincount(codes, weights=outcome == WON, minlength=n)
+    lost = np.bincount(codes, weights=outcome == LOST, minlength=n)
+    pending = np.bincount(codes, weights=~settled, minlength=n)
+    profit = np.bincount(codes, weights=np.where(settled, pnl, 0.0), minlength=n)
+    staked = np.bincount(codes, weights=stake, minlength=n)
+
+    return {
+        sport_names[code]: {
+            "total_bets": int(totals[code]),
+            "won": int(won[code]),
+            "lost": int(lost[code]),
+            "pending": int(pending[code]),
+            "total_profit_loss": float(profit[code]),
+            "total_staked": float(staked[code])
+        }
+        for code in np.flatnonzero(totals)
+    }
+
+
+def record_stats(record: BetRecord) -> Dict[str, Dict]:
+    """Contributo di una scommessa a stats_by_sport"""
+    return aggregate_by_sport(
+        [record.sport], np.zeros(1, dtype=np.int64), np.array([outcome_code(record)], dtype=np.int8),
+        np.array([record.importo or 0.0]), np.array([record.profit_loss or 0.0])
+    )
+
+
+def merge_stats(stats_by_sport: Dict[str, Dict], delta: Dict[str, Dict], sign: int = 1):
+    """Somma (sign=+1) o toglie (sign=-1) `delta` dalle statistiche per sport, sul posto"""
+    for sport, values in delta.items():
+        stats = stats_by_sport.setdefault(sport, {
+            "total_bets": 0, "won": 0, "lost": 0, "pending": 0,
+            "total_profit_loss": 0.0, "total_staked": 0.0
+        })
+        for key, value in values.items():
+            stats[key] += sign * value
+
+
+class StatsQuery:
+    """Filtri di una query /stats (None = nessun filtro)"""
+
+    def __init__(self):
+        self.sport: Optional[str] = None
+        self.market: Optional[str] = None
+        self.player: Optional[str] = None
+        self.outcome: Optional[int] = None
+        self.min_odds: Optional[float] = None
+        self.max_odds: Optional[float] = None
+        # Estremo escluso ("quota>2") o incluso ("quota>=2", "quota:1.5-2")
+        self.min_strict = False
+        self.max_strict = False
+        self.since: Optional[float] = None
+        self.until: Optional[float] = None
+
+
+def _parse_day(value: str) -> Optional[datetime]:
+    for fmt in ('%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_query(args: List[str], now: Optional[datetime] = None) -> StatsQuery:
+    """Argomenti di /stats -> StatsQuery; ValueError con messaggio se non validi"""
+    now = now or datetime.now()
+    query = StatsQuery()
+    for raw in args:
+        term = raw.strip().lower()
+        if not term:
+            continue
+
+        odds = re.fullmatch(r'quota([<>]=?|:)(\d+(?:[.,]\d+)?)(?:-(\d+(?:[.,]\d+)?))?', term)
+        if odds:
+            op, low, high = odds.group(1), float(odds.group(2).replace(',', '.')), odds.group(3)
+            if op == ':':
+                query.min_odds, query.min_strict = low, False
+                query.max_odds, query.max_strict = float(high.replace(',', '.')) if high else low, False
+            elif op.startswith('>'):
+                query.min_odds, query.min_strict = low, op == '>'
+            else:
+                query.max_odds, query.max_strict = low, op == '<'
+            continue
+
+        if term in PERIODS:
+            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            if term == 'settimana':
+                start -= timedelta(days=start.weekday())
+            elif term == 'mese':
+                start = start.replace(day=1)
+            elif term == 'anno':
+                start = start.replace(month=1, day=1)
+            query.since = start.timestamp()
+            continue
+
+        key, sep, value = term.partition(':')
+        if not sep or not value:
+            raise ValueError(f"Filtro non riconosciuto: {raw}")
+        if key == 'sport':
+            query.sport = value
+        elif key == 'mercato':
+            if value not in MARKETS:
+                raise ValueError(f"Mercato sconosciuto: {value} ({', '.join(MARKETS)})")
+            query.market = value
+        elif key == 'giocatore':
+            query.player = canonical_text(value.replace('_', ' '))
+        elif key == 'esito':
+            if value not in OUTCOMES:
+                raise ValueError(f"Esito sconosciuto: {value} (vinte, perse, in_corso)")
+            query.outcome = OUTCOMES[value]
+        elif key in ('dal', 'al'):
+            day = _parse_day(value)
+            if day is None:
+                raise ValueError(f"Data non valida: {value}")
+            if key == 'dal':
+                query.since = day.timestamp()
+            else:
+                query.until = (day + timedelta(days=1)).timestamp()
+        else:
+            raise ValueError(f"Filtro non riconosciuto: {raw}")
+    return query
+
+
+class StatsIndex:
+    """Colonne dello storico (ordine di inserimento) con indici secondari"""
+
+    def __init__(self):
+        self.count = 0
+        self._alloc(_INITIAL_CAPACITY)
+        # Indici hash: chiave -> insieme di posizioni (aggiunta e rimozione in O(1))
+        self.by_sport: Dict[str, Set[int]] = {}
+        self.by_market: Dict[str, Set[int]] = {}
+        self.by_player: Dict[str, Set[int]] = {}
+        self.sport_names: List[str] = []
+        self._sport_codes: Dict[str, int] = {}
+        self._date_order: Optional[np.ndarray] = None  # ricalcolato solo se serve
+        self._arrays: Dict[Tuple[int, str], np.ndarray] = {}  # insiemi degli indici già in NumPy
+
+    def _alloc(self, capacity: int):
+        old = getattr(self, 'timestamp', None)
+        columns = {
+            'timestamp': np.float64, 'odds': np.float64, 'stake': np.float64,
+            'pnl': np.float64, 'outcome': np.int8, 'sport_code': np.int32
+        }
+        for name, dtype in columns.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+    @classmethod
+    def from_bets(cls, bets) -> 'StatsIndex':
+        index = cls()
+        for record in bets:
+            index.add(record)
+        return index
+
+    def _key_lists(self, record: BetRecord) -> List[Tuple[Dict[str, Set[int]], str]]:
+        keys = [(self.by_sport, (record.sport or '').lower()), (self.by_market, market_of(record))]
+        if record.player:
+            keys.append((self.by_player, canonical_text(record.player)))
+        return keys
+
+    def _sport_code(self, sport: str) -> int:
+        if sport not in self._sport_codes:
+            self._sport_codes[sport] = len(self.sport_names)
+            self.sport_names.append(sport)
+        return self._sport_codes[sport]
+
+    def _write(self, position: int, record: BetRecord):
+        self.timestamp[position] = parse_timestamp(record)
+        self.odds[position] = record.quota or 0.0
+        self.stake[position] = record.importo or 0.0
+        self.pnl[position] = record.profit_loss or 0.0
+        self.outcome[position] = outcome_code(record)
+        self.sport_code[position] = self._sport_code(record.sport or '')
+
+    def add(self, record: BetRecord):
+        """Nuova scommessa in coda (stessa posizione che ha nello storico)"""
+        if self.count == len(self.timestamp):
+            self._alloc(len(self.timestamp) * 2)
+        position = self.count
+        self._write(position, record)
+        for index, key in self._key_lists(record):
+            index.setdefault(key, set()).add(position)
+            self._arrays.pop((id(index), key), None)
+        self.count += 1
+        self._date_order = None
+
+    def replace(self, position: int, old: BetRecord, record: BetRecord):
+        """Aggiorna una scommessa già indicizzata (upsert dei duplicati)"""
+        for index, key in self._key_lists(old):
+            index[key].discard(position)
+            if not index[key]:
+                del index[key]
+            self._arrays.pop((id(index), key), None)
+        self._write(position, record)
+        for index, key in self._key_lists(record):
+            index.setdefault(key, set()).add(position)
+            self._arrays.pop((id(index), key), None)
+        self._date_order = None
+
+    def _date_range(self, since: Optional[float], until: Optional[float]) -> np.ndarray:
+        """Posizioni nell'intervallo di date (ricerca binaria sull'ordinamento per data)"""
+        if self._date_order is None:
+            self._date_order = np.argsort(self.timestamp[:self.count], kind='stable')
+        dates = self.timestamp[self._date_order]
+        low = 0 if since is None else int(np.searchsorted(dates, since, side='left'))
+        high = self.count if until is None else int(np.searchsorted(dates, until, side='left'))
+        return np.sort(self._date_order[low:high])
+
+    def _positions(self, index: Dict[str, Set[int]], key: str) -> np.ndarray:
+        """Insieme di un indice hash come array ordinato (convertito una volta per modifica)"""
+        cache_key = (id(index), key)
+        if cache_key not in self._arrays:
+            positions = index.get(key, ())
+            array = np.fromiter(positions, dtype=np.int64, count=len(positions))
+            array.sort()
+            self._arrays[cache_key] = array
+        return self._arrays[cache_key]
+
+    def select(self, query: StatsQuery) -> np.ndarray:
+        """Posizioni che soddisfano la query"""
+        candidates: List[np.ndarray] = []
+        if query.sport is not None:
+            candidates.append(self._positions(self.by_sport, query.sport))
+        if query.market is not None:
+            candidates.append(self._positions(self.by_market, query.market))
+        if query.player is not None:
+            # Corrispondenza parziale ("lebron" -> "lebron james"); ogni scommessa ha un solo giocatore
+            names = [name for name in self.by_player if query.player in name]
+            matches = [self._positions(self.by_player, name) for name in names]
+            candidates.append(np.sort(np.concatenate(matches)) if matches else np.zeros(0, dtype=np.int64))
+        if query.since is not None or query.until is not None:
+            candidates.append(self._date_range(query.since, query.until))
+
+        if candidates:
+            candidates.sort(key=len)
+            rows = candidates[0]
+            for other in candidates[1:]:
+                rows = np.intersect1d(rows, other, assume_unique=True)
+        else:
+            rows = np.arange(self.count)
+
+        mask = np.ones(rows.size, dtype=bool)
+        odds = self.odds[rows]
+        if query.min_odds is not None:
+            mask &= odds > query.min_odds if query.min_strict else odds >= query.min_odds
+        if query.max_odds is not None:
+            mask &= odds < query.max_odds if query.max_strict else odds <= query.max_odds
+        if query.outcome is not None:
+            mask &= self.outcome[rows] == query.outcome
+        return rows[mask]
+
+    def aggregate(self, rows: np.ndarray) -> Dict[str, Dict]:
+        """Statistiche per sport delle righe selezionate (vedi aggregate_by_sport)"""
+        return aggregate_by_sport(self.sport_names, self.sport_code[rows], self.outcome[rows],
+                                  self.stake[rows], self.pnl[rows])
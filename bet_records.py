@@ -0,0 +1,265 @@
+"""
+Modulo Record Scommesse - schema rigido e record compatti
+Ogni scommessa è un oggetto con __slots__: niente dict per record, stringhe
+categoriche (sport, partita, mercato, giocatore) internate e numeri sempre float.
+"""
+
+import hashlib
+import re
+import sys
+from typing import Dict, List, Optional
+
+from multi_leg import combined_odds
+
+# Campi estratti dallo screenshot (tutto il resto viene scartato)
+BET_INFO_FIELDS = ('sport', 'match', 'bet_type', 'player', 'quota', 'importo', 'vincita_potenziale', 'date', 'legs')
+REQUIRED_FIELDS = ('sport', 'match', 'bet_type', 'quota', 'importo')
+LEG_REQUIRED_FIELDS = ('sport', 'match', 'bet_type')
+
+# Sport di una multipla con eventi di sport diversi
+MULTI_SPORT = 'Multipla'
+
+# Nomi sport canonici (Gemini a volte usa varianti)
+SPORT_ALIASES = {
+    'calcio': 'Calcio',
+    'soccer': 'Calcio',
+    'nba': 'NBA',
+    'basket': 'Basket',
+    'basketball': 'Basket',
+    'tennis': 'Tennis',
+}
+
+
+def intern_text(value) -> Optional[str]:
+    """Normalizza spazi e interna la stringa (None resta None)"""
+    if value is None:
+        return None
+    text = re.sub(r'\s+', ' ', str(value)).strip()
+    return sys.intern(text) if text else None
+
+
+def parse_amount(value, money: bool = False) -> Optional[float]:
+    """
+    Converte quote e importi in float ("1,75", "250.00 €", 1.75).
+    Con `money` un solo '.' seguito da tre cifre separa le migliaia ("1.250" -> 1250),
+    come negli importi in euro; per le quote resta il separatore decimale.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r'[^\d,.\-]', '', str(value))
+    if ',' in text and '.' in text:
+        # Decimali dopo l'ultimo separatore, l'altro separa le migliaia:
+        # "1.250,00" -> "1250.00", "1,250.00" -> "1250.00"
+        decimal = ',' if text.rfind(',') > text.rfind('.') else '.'
+        thousands = '.' if decimal == ',' else ','
+        text = text.replace(thousands, '').replace(decimal, '.')
+    else:
+        separator = ',' if ',' in text else '.'
+        if text.count(separator) > 1 or (money and re.fullmatch(r'-?\d{1,3}\.\d{3}', text)):
+            # "1.250.000" -> migliaia
+            text = text.replace(separator, '')
+        text = text.replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def normalize_sport(sport: Optional[str]) -> Optional[str]:
+    """Nome sport canonico (internato)"""
+    if sport is None:
+        return None
+    return sys.intern(SPORT_ALIASES.get(sport.lower(), sport))
+
+
+def normalize_leg(raw: Dict) -> Optional[Dict]:
+    """Normalizza una selezione di multipla (None se incompleta)"""
+    if not isinstance(raw, dict):
+        return None
+    leg = {
+        'sport': normalize_sport(intern_text(raw.get('sport'))),
+        'match': intern_text(raw.get('match')),
+        'bet_type': intern_text(raw.get('bet_type')),
+        'player': intern_text(raw.get('player')),
+        'quota': parse_amount(raw.get('quota')),
+        'date': intern_text(raw.get('date')) or '',
+    }
+    if any(leg[field] is None for field in LEG_REQUIRED_FIELDS):
+        return None
+    # Esito già verificato (solo per record salvati)
+    if 'won' in raw:
+        leg['won'] = raw['won']
+        leg['result'] = raw.get('result', '')
+    return leg
+
+
+def normalize_legs(raw_legs) -> List[Dict]:
+    """Selezioni valide della schedina"""
+    if not isinstance(raw_legs, list):
+        return []
+    return [leg for leg in (normalize_leg(raw) for raw in raw_legs) if leg]
+
+
+def merge_legs(bet_info: Dict, legs: List[Dict]):
+    """Completa i campi della schedina a partire dalle selezioni"""
+    sports = {leg['sport'] for leg in legs}
+    if bet_info['sport'] is None or len(sports) > 1:
+        bet_info['sport'] = sports.pop() if len(sports) == 1 else MULTI_SPORT
+    if bet_info['match'] is None:
+        bet_info['match'] = sys.intern(f"Multipla {len(legs)} eventi")
+    if bet_info['bet_type'] is None:
+        bet_info['bet_type'] = sys.intern(f"Multipla x{len(legs)}")
+    if not bet_info['date']:
+        bet_info['date'] = min((leg['date'] for leg in legs if leg['date']), default='')
+
+    # Quota totale = prodotto delle quote (se sono tutte leggibili)
+    odds = combined_odds(legs)
+    if odds is not None:
+        bet_info['quota'] = odds
+    bet_info['legs'] = legs
+
+
+def normalize_bet_info(raw: Dict) -> Dict:
+    """
+    Valida i dati estratti e ritorna un bet_info con soli campi noti e tipi fissi.
+    Solleva ValueError se mancano campi obbligatori.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Dati scommessa non validi")
+
+    bet_info = {
+        'sport': intern_text(raw.get('sport')),
+        'match': intern_text(raw.get('match')),
+        'bet_type': intern_text(raw.get('bet_type')),
+        'player': intern_text(raw.get('player')),
+        'quota': parse_amount(raw.get('quota')),
+        'importo': parse_amount(raw.get('importo'), money=True),
+        'vincita_potenziale': parse_amount(raw.get('vincita_potenziale'), money=True),
+        'date': intern_text(raw.get('date')) or '',
+        'legs': None,
+    }
+
+    legs = normalize_legs(raw.get('legs'))
+    if len(legs) > 1:
+        merge_legs(bet_info, legs)
+    elif legs:
+        # Singola descritta come selezione: usa i suoi campi dove mancano
+        for field, value in legs[0].items():
+            if field in bet_info and bet_info[field] in (None, ''):
+                bet_info[field] = value
+
+    missing = [field for field in REQUIRED_FIELDS if bet_info[field] is None]
+    if missing:
+        raise ValueError(f"Campi mancanti: {', '.join(missing)}")
+
+    bet_info['sport'] = normalize_sport(bet_info['sport'])
+    if bet_info['vincita_potenziale'] is None:
+        bet_info['vincita_potenziale'] = round(bet_info['quota'] * bet_info['importo'], 2)
+    return bet_info
+
+
+def canonical_text(value: Optional[str]) -> str:
+    """Testo confrontabile tra due letture della stessa schedina (maiuscole, separatori, punteggiatura)"""
+    text = (value or '').lower()
+    text = re.sub(r'\s+(?:vs\.?|v|-|–)\s+', ' vs ', text)
+    text = re.sub(r'[^\w.+ ]', ' ', text)
+    return ' '.join(text.split())
+
+
+def canonical_date(value: Optional[str]) -> str:
+    """Data come sequenza di numeri ("5/2/2026 2:10" == "05/02/2026 02:10")"""
+    return '-'.join(str(int(n)) for n in re.findall(r'\d+', value or ''))
+
+
+def fingerprint(chat_id: Optional[int], match: Optional[str], bet_type: Optional[str], player: Optional[str],
+                quota: Optional[float], importo: Optional[float], date: Optional[str],
+                legs: Optional[List[Dict]] = None) -> str:
+    """
+    Impronta della schedina: uguale per lo stesso invio ripetuto (anche con
+    piccole differenze di OCR), diversa per schedine diverse. Le scommesse
+    salvate prima di chat_id hanno chat_id=None: add_bet cerca anche l'impronta
+    senza chat, così un reinvio viene comunque riconosciuto.
+    """
+    parts = [
+        str(chat_id if chat_id is not None else ''),
+        canonical_text(match), canonical_text(bet_type), canonical_text(player),
+        f"{quota or 0:.2f}", f"{importo or 0:.2f}", canonical_date(date)
+    ]
+    # Le multiple hanno match/bet_type generici: contano le selezioni
+    for leg in sorted(f"{canonical_text(leg['match'])}|{canonical_text(leg['bet_type'])}" for leg in legs or []):
+        parts.append(leg)
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def bet_info_fingerprint(chat_id: Optional[int], bet_info: Dict) -> str:
+    """Impronta di un bet_info normalizzato"""
+    return fingerprint(chat_id, bet_info['match'], bet_info['bet_type'], bet_info.get('player'),
+                       bet_info['quota'], bet_info['importo'], bet_info.get('date'), bet_info.get('legs'))
+
+
+class BetRecord:
+    """Scommessa salvata nello storico"""
+
+    __slots__ = (
+        'sport', 'match', 'bet_type', 'player', 'quota', 'importo', 'vincita_potenziale', 'date',
+        'result', 'result_details', 'won', 'profit_loss', 'analyzed_at', 'legs', 'chat_id'
+    )
+
+    def __init__(self, sport: str, match: str, bet_type: str, player: Optional[str],
+                 quota: float, importo: float, vincita_potenziale: float, date: str,
+                 result: str, result_details: str, won: Optional[bool],
+                 profit_loss: Optional[float], analyzed_at: str, legs: Optional[List[Dict]] = None,
+                 chat_id: Optional[int] = None):
+        self.sport = sport
+        self.match = match
+        self.bet_type = bet_type
+        self.player = player
+        self.quota = quota
+        self.importo = importo
+        self.vincita_potenziale = vincita_potenziale
+        self.date = date
+        self.result = result
+        self.result_details = result_details
+        self.won = won
+        self.profit_loss = profit_loss
+        self.analyzed_at = analyzed_at
+        self.legs = legs
+        self.chat_id = chat_id
+
+    @classmethod
+    def from_result(cls, bet_info: Dict, result_info: Dict, profit_loss: Optional[float],
+                    analyzed_at: str, chat_id: Optional[int] = None) -> 'BetRecord':
+        """Crea il record da bet_info (già normalizzato) e dal risultato della verifica"""
+        return cls(
+            bet_info['sport'], bet_info['match'], bet_info['bet_type'], bet_info.get('player'),
+            bet_info['quota'], bet_info['importo'], bet_info['vincita_potenziale'], bet_info.get('date', ''),
+            intern_text(result_info['result']) or '', result_info.get('details', ''),
+            result_info['bet_won'], profit_loss, analyzed_at,
+            result_info.get('legs', bet_info.get('legs')), chat_id
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'BetRecord':
+        """Carica un record dal JSON dello storico (accetta anche il vecchio formato dict)"""
+        bet_info = normalize_bet_info(data)
+        return cls(
+            bet_info['sport'], bet_info['match'], bet_info['bet_type'], bet_info['player'],
+            bet_info['quota'], bet_info['importo'], bet_info['vincita_potenziale'], bet_info['date'],
+            intern_text(data.get('result')) or '', data.get('result_details', ''),
+            data.get('won'), parse_amount(data.get('profit_loss')), data.get('analyzed_at', ''),
+            bet_info['legs'], data.get('chat_id')
+        )
+
+    def fingerprint(self) -> str:
+        """Impronta per riconoscere i duplicati (vedi `fingerprint`)"""
+        return fingerprint(self.chat_id, self.match, self.bet_type, self.player,
+                           self.quota, self.importo, self.date, self.legs)
+
+    def to_dict(self) -> Dict:
+        """Serializza il record per il JSON dello storico"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"BetRecord({self.sport!r}, {self.match!r}, {self.bet_type!r}, quota={self.quota})"
@@ -0,0 +1,180 @@
+"""
+Modulo Simulazione - Monte Carlo del bankroll sullo storico
+Ricampiona (bootstrap) quote ed esiti delle scommesse concluse e simula
+migliaia di percorsi con diverse strategie di puntata:
+- flat: puntata fissa, percentuale del bankroll iniziale
+- percent: percentuale del bankroll corrente
+- kelly: frazione del criterio di Kelly, con probabilità stimata dall'hit
+  rate reale per fascia di quota
+Tutto vettorizzato con NumPy; i percorsi possono essere divisi su più processi.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from bet_analytics import ODDS_BUCKETS, WON, BetColumns
+
+STRATEGIES = ('flat', 'percent', 'kelly')
+
+# Bankroll iniziale: 100 così i risultati si leggono in % del capitale
+STARTING_BANKROLL = 100.0
+# Rovina: bankroll sceso a questa frazione del capitale iniziale
+RUIN_FRACTION = 0.1
+# Punti della curva restituiti (la simulazione usa tutte le scommesse)
+CURVE_POINTS = 5
+PERCENTILES = (5, 25, 50, 75, 95)
+# Memoria massima di un blocco di percorsi: il blocco ha percorsi x scommesse celle,
+# ognuna con più array di lavoro (indici int64, rendimenti, puntate, bankroll, picchi...)
+MEMORY_BUDGET = 256 * 1024 * 1024
+BYTES_PER_CELL = 64
+# Processi per le simulazioni (1 = nel processo del bot)
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", "1") or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def win_probabilities(odds: np.ndarray, won: np.ndarray) -> np.ndarray:
+    """Probabilità stimata di ogni scommessa: hit rate reale della sua fascia di quota"""
+    edges = np.array(ODDS_BUCKETS)
+    idx = np.clip(np.digitize(odds, edges) - 1, 0, len(edges) - 2)
+    counts = np.bincount(idx, minlength=len(edges) - 1)
+    wins = np.bincount(idx, weights=won, minlength=len(edges) - 1)
+    rates = np.divide(wins, counts, out=np.zeros_like(wins), where=counts > 0)
+    return rates[idx]
+
+
+def stake_fractions(strategy: str, fraction: float, odds: np.ndarray, prob: np.ndarray) -> np.ndarray:
+    """Frazione del bankroll puntata su ogni scommessa (flat: del bankroll iniziale)"""
+    if strategy == 'kelly':
+        b = odds - 1.0
+        kelly = np.divide(prob * b - (1.0 - prob), b, out=np.zeros_like(b), where=b > 0)
+        return np.clip(kelly, 0.0, 1.0) * fraction
+    return np.full(odds.shape, fraction)
+
+
+def chunk_paths(n_bets: int, budget: int = MEMORY_BUDGET) -> int:
+    """Percorsi per blocco entro `budget` byte (almeno 1)"""
+    return max(1, budget // (max(n_bets, 1) * BYTES_PER_CELL))
+
+
+def _simulate_chunk(args) -> Dict:
+    """Simula un blocco di percorsi; ritorna curva ai checkpoint, finali, drawdown e rovine"""
+    returns, fractions, strategy, paths, n_bets, seed = args
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, returns.size, size=(paths, n_bets))
+    r = returns[picks]          # rendimento per unità puntata: quota-1 o -1
+    f = fractions[picks]
+    del picks
+    ruin_level = STARTING_BANKROLL * RUIN_FRACTION
+
+    if strategy == 'flat':
+        bankroll = STARTING_BANKROLL + np.cumsum(f * STARTING_BANKROLL * r, axis=1)
+    else:
+        # Crescita moltiplicativa: log B = log B0 + somma log(1 + f r)
+        growth = np.log1p(np.maximum(f * r, -0.999999))
+        del f, r
+        bankroll = STARTING_BANKROLL * np.exp(np.cumsum(growth, axis=1))
+        del growth
+
+    # Dopo la rovina il percorso si ferma al valore raggiunto
+    ruined = np.maximum.accumulate(bankroll <= ruin_level, axis=1)
+    first = np.argmax(ruined, axis=1)
+    frozen = bankroll[np.arange(paths), first][:, None]
+    bankroll = np.where(ruined, frozen, bankroll)
+
+    peaks = np.maximum.accumulate(np.maximum(bankroll, STARTING_BANKROLL), axis=1)
+    drawdown = np.max((peaks - bankroll) / peaks, axis=1)
+
+    checkpoints = np.linspace(0, n_bets - 1, CURVE_POINTS).astype(np.int64)
+    return {
+        'curve': bankroll[:, checkpoints],
+        'final': bankroll[:, -1],
+        'drawdown': drawdown,
+        'ruined': ruined[:, -1]
+    }
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+def simulate(columns: BetColumns, strategy: str = 'percent', fraction: float = 0.02,
+             paths: int = 10000, n_bets: Optional[int] = None, workers: int = SIMULATION_WORKERS,
+             seed: Optional[int] = None) -> Optional[Dict]:
+    """
+    Monte Carlo del bankroll. `fraction`: quota del bankroll (flat/percent) o
+    frazione di Kelly. None se non ci sono scommesse concluse con quota valida.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Strategia sconosciuta: {strategy}")
+
+    mask = columns.settled & (columns.odds > 1)
+    if not mask.any():
+        return None
+    odds = columns.odds[mask]
+    won = (columns.outcome[mask] == WON).astype(np.float64)
+    returns = np.where(won == 1, odds - 1.0, -1.0)
+    fractions = stake_fractions(strategy, fraction, odds, win_probabilities(odds, won))
+    n_bets = n_bets or odds.size
+
+    chunk = chunk_paths(n_bets)
+    sizes = [min(chunk, paths - start) for start in range(0, paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(returns, fractions, strategy, size, n_bets, s) for size, s in zip(sizes, seeds)]
+
+    if workers > 1 and len(jobs) > 1:
+        chunks = list(_get_pool(workers).map(_simulate_chunk, jobs))
+    else:
+        chunks = [_simulate_chunk(job) for job in jobs]
+
+    curve = np.concatenate([c['curve'] for c in chunks])
+    final = np.concatenate([c['final'] for c in chunks])
+    drawdown = np.concatenate([c['drawdown'] for c in chunks])
+    ruined = np.concatenate([c['ruined'] for c in chunks])
+
+    checkpoints = np.linspace(0, n_bets - 1, CURVE_POINTS).astype(np.int64) + 1
+    return {
+        'strategy': strategy,
+        'fraction': fraction,
+        'paths': paths,
+        'bets': int(n_bets),
+        'checkpoints': checkpoints.tolist(),
+        'curve': {p: np.percentile(curve, p, axis=0).tolist() for p in PERCENTILES},
+        'final': {p: float(np.percentile(final, p)) for p in PERCENTILES},
+        'risk_of_ruin': float(ruined.mean() * 100),
+        'profit_probability': float((final > STARTING_BANKROLL).mean() * 100),
+        'median_drawdown': float(np.median(drawdown) * 100)
+    }
+
+
+def format_simulation(result: Dict) -> str:
+    """Testo Markdown per `/simulate`"""
+    names = {'flat': 'Flat', 'percent': 'Percentuale', 'kelly': 'Kelly'}
+    if result['strategy'] == 'kelly':
+        label = f"{names['kelly']} x{result['fraction']:g}"
+    else:
+        label = f"{names[result['strategy']]} {result['fraction'] * 100:g}%"
+
+    lines = [
+        f"🎲 *{label}* | {result['paths']} percorsi da {result['bets']} scommesse",
+        "Bankroll iniziale = 100",
+        "",
+        "*Percentili del bankroll* (p5 / p25 / mediana / p75 / p95)"
+    ]
+    for i, step in enumerate(result['checkpoints']):
+        values = " / ".join(f"{result['curve'][p][i]:.0f}" for p in PERCENTILES)
+        lines.append(f"dopo {step}: {values}")
+
+    lines += [
+        "",
+        f"💀 Rischio di rovina (sotto {RUIN_FRACTION * 100:.0f}): {result['risk_of_ruin']:.1f}%",
+        f"💚 Probabilità di chiudere in utile: {result['profit_probability']:.1f}%",
+        f"📉 Drawdown mediano: -{result['median_drawdown']:.1f}%"
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+"""
+Modulo Archivio Scommesse - storico su disco con caricamento lazy
+Le scommesse stanno in un file JSON Lines (una per riga) affiancato da un indice
+binario di offset: all'avvio non si legge nulla, i record vengono caricati
+solo quando servono.
+Un aggiornamento non riscrive il file: aggiunge in coda una riga
+{"replaces": posizione, "record": {...}} e sposta la voce dell'indice su di
+essa. Le righe superate si eliminano con compact(), lanciata da sola quando
+sono tante quanti i record vivi.
+"""
+
+import json
+import os
+import struct
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Union
+
+from bet_records import BetRecord
+
+# Ogni voce dell'indice è l'offset (uint64 little-endian) della riga nel file dati
+OFFSET = struct.Struct('<Q')
+# Inizio delle righe che sostituiscono un record precedente
+REPLACES_PREFIX = b'{"replaces": '
+# Righe superate tollerate prima della compattazione (almeno questo numero)
+COMPACT_MIN_GARBAGE = 256
+
+
+def encode_line(record: BetRecord, replaces: Optional[int] = None) -> bytes:
+    data = record.to_dict()
+    if replaces is not None:
+        data = {"replaces": replaces, "record": data}
+    return json.dumps(data, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def decode_line(line: bytes) -> BetRecord:
+    data = json.loads(line)
+    if line.startswith(REPLACES_PREFIX):
+        data = data["record"]
+    return BetRecord.from_dict(data)
+
+
+class BetStore:
+    """
+    Sequenza di BetRecord su disco, accessibile per posizione in O(1).
+    """
+
+    def __init__(self, path: str, cache_size: int = 1024):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._garbage = 0  # righe superate nel file dati (dall'ultima scansione)
+
+        if not os.path.exists(self.path):
+            open(self.path, 'ab').close()
+        if not os.path.exists(self.index_path) or self._index_is_stale():
+            self.rebuild_index()
+
+        self._count = os.path.getsize(self.index_path) // OFFSET.size
+
+    def _offsets(self, start: int, stop: int) -> List[int]:
+        with open(self.index_path, 'rb') as index:
+            index.seek(start * OFFSET.size)
+            return [entry[0] for entry in OFFSET.iter_unpack(index.read((stop - start) * OFFSET.size))]
+
+    def _index_is_stale(self) -> bool:
+        """
+        L'indice è incompleto se dopo l'ultimo record indicizzato ci sono righe
+        non registrate: record nuovi o sostituzioni a cui l'indice non punta.
+        """
+        index_size = os.path.getsize(self.index_path)
+        data_size = os.path.getsize(self.path)
+        if index_size == 0:
+            return data_size > 0
+        count = index_size // OFFSET.size
+        with open(self.path, 'rb') as f:
+            f.seek(self._offsets(count - 1, count)[0])
+            f.readline()
+            # In coda possono esserci solo sostituzioni già applicate all'indice
+            while f.tell() < data_size:
+                offset = f.tell()
+                line = f.readline()
+                if not line.startswith(REPLACES_PREFIX):
+                    return True
+                position = json.loads(line)["replaces"]
+                if position >= count or self._offsets(position, position + 1)[0] != offset:
+                    return True
+        return False
+
+    def rebuild_index(self):
+        """Ricostruisce l'indice scansionando il file dati (applica le sostituzioni)"""
+        offsets: List[int] = []
+        self._garbage = 0
+        with open(self.path, 'rb') as data:
+            offset = 0
+            for line in data:
+                if line.startswith(REPLACES_PREFIX):
+                    offsets[json.loads(line)["replaces"]] = offset
+                    self._garbage += 1
+                elif line.strip():
+                    offsets.append(offset)
+                offset += len(line)
+        with open(self.index_path, 'wb') as index:
+            index.write(b''.join(OFFSET.pack(offset) for offset in offsets))
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _read(self, position: int) -> BetRecord:
+        """Legge un record dal disco (con piccola cache LRU)"""
+        if position in self._cache:
+            self._cache.move_to_end(position)
+            return self._cache[position]
+
+        offset = self._offsets(position, position + 1)[0]
+        with open(self.path, 'rb') as data:
+            data.seek(offset)
+            record = decode_line(data.readline())
+
+        self._cache[position] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[BetRecord, List[BetRecord]]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._count)
+            if step == 1 and stop - start > self.cache_size:
+                return list(self.iter_from(start, stop))
+            return [self._read(i) for i in range(start, stop, step)]
+
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError("BetStore index out of range")
+        return self._read(key)
+
+    def iter_from(self, start: int = 0, stop: int = None) -> Iterator[BetRecord]:
+        """Legge in sequenza i record da `start` a `stop` (seek solo sui record sostituiti)"""
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return
+        with open(self.path, 'rb') as data:
+            for offset in self._offsets(start, stop):
+                if data.tell() != offset:
+                    data.seek(offset)
+                yield decode_line(data.readline())
+
+    def __iter__(self) -> Iterator[BetRecord]:
+        return self.iter_from(0)
+
+    def append(self, record: BetRecord):
+        """Aggiunge un record in coda (dati prima, poi indice)"""
+        line = encode_line(record)
+        with open(self.path, 'ab') as data:
+            offset = data.tell()
+            data.write(line)
+        with open(self.index_path, 'ab') as index:
+            index.write(OFFSET.pack(offset))
+        self._count += 1
+
+    def extend(self, records):
+        """Aggiunge più record in un'unica scrittura"""
+        with open(self.path, 'ab') as data, open(self.index_path, 'ab') as index:
+            for record in records:
+                offset = data.tell()
+                data.write(encode_line(record))
+                index.write(OFFSET.pack(offset))
+                self._count += 1
+
+    def replace(self, position: int, record: BetRecord):
+        """
+        Sostituisce un record in O(1): riga di sostituzione in coda (dati prima),
+        poi la voce dell'indice punta alla nuova riga.
+        """
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("BetStore index out of range")
+        with open(self.path, 'ab') as data:
+            offset = data.tell()
+            data.write(encode_line(record, replaces=position))
+        with open(self.index_path, 'r+b') as index:
+            index.seek(position * OFFSET.size)
+            index.write(OFFSET.pack(offset))
+        self._cache.pop(position, None)
+
+        self._garbage += 1
+        if self._garbage >= max(COMPACT_MIN_GARBAGE, self._count):
+            self.compact()
+
+    def compact(self):
+        """Riscrive file e indice senza le righe superate"""
+        if self._garbage == 0:
+            return
+        tmp_data, tmp_index = self.path + '.tmp', self.index_path + '.tmp'
+        with open(tmp_data, 'wb') as data, open(tmp_index, 'wb') as index:
+            for record in self:
+                index.write(OFFSET.pack(data.tell()))
+                data.write(encode_line(record))
+        os.replace(tmp_data, self.path)
+        os.replace(tmp_index, self.index_path)
+        self._cache.clear()
+        self._garbage = 0
+
+    def clear(self):
+        """Svuota l'archivio"""
+        open(self.path, 'wb').close()
+        open(self.index_path, 'wb').close()
+        self._cache.clear()
+        self._count = 0
+        self._garbage = 0
@@ -1,86 +1,211 @@
+from __future__ import annotations
+
+import time
+_PROCESS_START = time.perf_counter()
+
 import os
+import sys
+import asyncio
 import json
-import re
+import functools
+import importlib
 from datetime import datetime
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-import google.generativeai as genai
-from PIL import Image
-import io
-from sports_api_custom import SportsAPIManager
-from sports_api_real import SportsAPIManager
+from typing import TYPE_CHECKING
+from bet_extraction import EXTRACTION_PROMPT, GEMINI_MODEL, cached_bet_info, extraction_key, generate_bet_info
+from bet_dedup import DedupIndex
+from bet_records import BetRecord, bet_info_fingerprint, normalize_bet_info
+from bet_store import BetStore
+from history_archive import HistoryArchive
+from metrics import format_metrics, metrics
+from multi_leg import evaluate_legs
+from outbox import outbox
+from profiler import MAX_PROFILE_REQUESTS, MAX_WINDOW_SECONDS, profiler
+from shared_cache import cache
+from slip_parser import looks_like_slip, parse_slip_text
+
+# Telegram, Gemini, NumPy e requests vengono importati solo al primo uso
+if TYPE_CHECKING:
+    from telegram import Update
+    from telegram.ext import ContextTypes
 
 # Configurazione
 # Per uso locale: inserisci i token qui sotto
 # Per uso su Render: lascia così, i token si mettono nelle variabili d'ambiente
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN", "IL_TUO_TOKEN_QUI")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "LA_TUA_API_KEY_GEMINI")
+# Chat abilitate ai comandi di amministrazione (/profile, /metrics), separate da virgola
+ADMIN_CHAT_IDS = {int(x) for x in os.getenv("ADMIN_CHAT_IDS", "").replace(" ", "").split(",") if x.lstrip("-").isdigit()}
 
 # File per salvare lo storico
-HISTORY_FILE = "betting_history.json"
+HISTORY_FILE = "betting_history.json"  # Formato vecchio (migrato automaticamente)
+BETS_FILE = "betting_bets.jsonl"       # Formato vecchio (migrato automaticamente)
+STATS_FILE = "betting_stats.json"      # Aggregati, caricati all'avvio
+HISTORY_DIR = "history"                # Segmenti mensili + manifest
+
+# Dopo quanto inviare il riepilogo aggiornato: una raffica di screenshot ne produce uno solo
+SUMMARY_DEBOUNCE = 2.0
+# Nuovi tentativi se l'invio del riepilogo fallisce (stesso intervallo di attesa)
+SUMMARY_RETRIES = 2
+
+# Secondi tra due letture del feed live per le scommesse di calcio in corso (0 = spento)
+FOOTBALL_WATCH_INTERVAL = float(os.getenv("FOOTBALL_WATCH_INTERVAL", "60") or 0)
+
+# Report tempi di avvio: STARTUP_REPORT=1 oppure --startup-report
+STARTUP_REPORT = os.getenv("STARTUP_REPORT", "") == "1" or "--startup-report" in sys.argv
+
+
+def timed_import(module_name):
+    """Importa un modulo (lazy) e, se richiesto, stampa quanto ci ha messo"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if STARTUP_REPORT:
+        print(f"⏱️  import {module_name}: {(time.perf_counter() - start) * 1000:.0f} ms")
+    return module
 
-# Configura Gemini per OCR (gratuito, 60 richieste/minuto)
-genai.configure(api_key=GEMINI_API_KEY)
 
 class BettingAnalyzer:
     def __init__(self):
         self.history = self.load_history()
-        self.api_manager = SportsAPIManager()  # Gestore API sportive
-        self.api_manager = SportsAPIManager()  # Inizializza API manager
+        self.dedup = DedupIndex(self.history["bets"])  # Impronte delle schedine già salvate
+        self._api_manager = None  # Creato al primo uso
+        self._gemini_model = None  # Gemini configurato al primo uso
+        self._columns = None  # Cache colonnare per /stats advanced
+        self._summary = None  # Riepilogo già formattato (invalidato a ogni scrittura)
+        self._query_index = None  # Indici secondari per /stats con filtri (creati al primo uso)
+        self._pending_football = None  # posizione -> scommessa di calcio in corso (creato al primo uso)
+    
+    @property
+    def api_manager(self):
+        """Gestore API sportive (unica istanza, creata al primo uso)"""
+        if self._api_manager is None:
+            self._api_manager = timed_import("sports_api_custom").SportsAPIManager()
+        return self._api_manager
+    
+    def get_gemini_model(self):
+        """Modello Gemini per OCR (GEMINI_MODEL, default gemini-1.5-flash), creato una volta sola"""
+        if self._gemini_model is None:
+            genai = timed_import("google.generativeai")
+            genai.configure(api_key=GEMINI_API_KEY)
+            self._gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+        return self._gemini_model
     
     def load_history(self):
-        """Carica lo storico delle scommesse"""
-        if os.path.exists(HISTORY_FILE):
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"bets": [], "stats_by_sport": {}}
+        """Carica gli aggregati; le scommesse restano su disco fino al primo accesso"""
+        is_new_archive = not os.path.exists(HISTORY_DIR)
+        bets = HistoryArchive(HISTORY_DIR)
+        
+        if os.path.exists(STATS_FILE):
+            with open(STATS_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if is_new_archive and os.path.exists(BETS_FILE):
+                # Archivio a file unico -> segmenti mensili
+                bets.extend(BetStore(BETS_FILE))
+                print(f"📦 Storico migrato: {len(bets)} scommesse in {HISTORY_DIR}/")
+        elif os.path.exists(HISTORY_FILE):
+            data = self.migrate_legacy_history(bets)
+        else:
+            data = {}
+        
+        data["bets"] = bets
+        data.setdefault("stats_by_sport", {})
+        return data
+    
+    def migrate_legacy_history(self, bets):
+        """Converte il vecchio betting_history.json (tutto in un file) nel nuovo formato"""
+        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        bets.extend(BetRecord.from_dict(bet) for bet in data.pop("bets", []))
+        with open(STATS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        
+        print(f"📦 Storico migrato: {len(bets)} scommesse in {HISTORY_DIR}/")
+        return data
+    
+    def serialize_history(self):
+        """Storico in formato JSON (record convertiti in dict)"""
+        return {
+            **self.history,
+            "bets": [bet.to_dict() for bet in self.history["bets"]]
+        }
     
     def save_history(self):
-        """Salva lo storico"""
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
+        """Salva gli aggregati (le scommesse sono già scritte da add_bet)"""
+        self._summary = None
+        aggregates = {key: value for key, value in self.history.items() if key != "bets"}
+        with open(STATS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(aggregates, f, ensure_ascii=False, indent=2)
+    
+    def clear_history(self):
+        """Azzera scommesse e aggregati"""
+        self.history["bets"].clear()
+        self.history = {"bets": self.history["bets"], "stats_by_sport": {}}
+        self.dedup.clear()
+        self._columns = None
+        self._query_index = None
+        self._pending_football = None
+        self.save_history()
     
     def extract_bet_info(self, image_bytes):
-        """Estrae informazioni dalla scommessa usando Gemini Vision"""
+        """Estrae informazioni dalla scommessa usando Gemini Vision (JSON strutturato)"""
+        key = extraction_key('image', image_bytes)
+        bet_info = cached_bet_info(key, 'image')
+        if bet_info is not None:
+            return bet_info
+        
         try:
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
-            # Converti bytes in Image PIL
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            prompt = """Analizza questo screenshot di scommessa e restituisci SOLO un JSON valido con questa struttura:
-{
-    "sport": "NBA" oppure "Calcio" oppure "Tennis" oppure altro sport,
-    "match": "Squadra1 vs Squadra2 o Giocatore1 vs Giocatore2",
-    "bet_type": "descrizione esatta della scommessa (es: OVER 1.5 tiri da 3, Vincente, Under 2.5 gol, ecc)",
-    "player": "nome completo del giocatore se la scommessa riguarda un giocatore specifico, altrimenti null",
-    "quota": 1.75,
-    "importo": 250.00,
-    "vincita_potenziale": 437.50,
-    "date": "05/02/2026 02:10"
-}
-
-REGOLE:
-- Estrai TUTTI i dettagli visibili
-- Per le quote usa il punto decimale (es: 1.75 non 1,75)
-- Per date usa formato DD/MM/YYYY HH:MM
-- Se un campo non è visibile metti null
-- Per il calcio scrivi "Calcio" non "Football" o "Soccer"
-- Rispondi SOLO con il JSON, niente testo aggiuntivo"""
-
-            response = model.generate_content([prompt, image])
-            
-            # Estrai il JSON dalla risposta
-            text = response.text.strip()
-            # Rimuovi eventuali markdown code blocks
-            text = re.sub(r'```json\s*|\s*```', '', text).strip()
-            
-            bet_info = json.loads(text)
+            model = self.get_gemini_model()
+        except Exception as e:
+            print(f"Errore nell'estrazione: {e}")
+            return None
+        
+        # I byte JPEG di Telegram vanno inviati così come sono (niente decodifica PIL)
+        image = {'mime_type': 'image/jpeg', 'data': image_bytes}
+        return generate_bet_info(model, [EXTRACTION_PROMPT, image], 'image', len(image_bytes), key)
+    
+    def extract_bet_info_from_text(self, text):
+        """Schedina copiata come testo: parser locale, Gemini (solo testo) se non basta"""
+        bet_info = parse_slip_text(text)
+        if bet_info:
+            metrics.incr('slip.text.local')
             return bet_info
-            
+        
+        metrics.incr('slip.text.gemini')
+        key = extraction_key('text', text.encode('utf-8'))
+        bet_info = cached_bet_info(key, 'text')
+        if bet_info is not None:
+            return bet_info
+        
+        try:
+            model = self.get_gemini_model()
         except Exception as e:
             print(f"Errore nell'estrazione: {e}")
             return None
+        return generate_bet_info(model, [EXTRACTION_PROMPT, f"Schedina copiata come testo:\n{text}"], 'text',
+                                 cache_key=key)
+    
+    def get_match_result(self, sport, match, date, bet_type, player=None):
+        """Verifica una singola selezione tramite le API sportive"""
+        return self.api_manager.check_bet(sport, match, bet_type, date, player)
+    
+    def evaluate_bet(self, bet_info):
+        """Verifica la schedina: singola direttamente, multipla selezione per selezione"""
+        legs = bet_info.get('legs')
+        if legs:
+            return evaluate_legs(legs, lambda leg: self.get_match_result(
+                leg['sport'], leg['match'], leg.get('date') or bet_info.get('date', ''),
+                leg['bet_type'], leg.get('player')
+            ))
+        
+        return self.get_match_result(
+            bet_info['sport'],
+            bet_info['match'],
+            bet_info.get('date', ''),
+            bet_info['bet_type'],
+            bet_info.get('player')
+        )
     
     def calculate_profit_loss(self, bet_info, bet_won):
         """Calcola profitto o perdita"""
@@ -95,52 +220,71 @@ REGOLE:
         else:
             return -importo  # Perdita totale
     
-    def add_bet(self, bet_info, result_info):
-        """Aggiunge una scommessa allo storico"""
+    def add_bet(self, bet_info, result_info, chat_id=None):
+        """
+        Aggiunge una scommessa allo storico. Se la stessa schedina è già registrata
+        ne aggiorna l'esito invece di contarla due volte.
+        Ritorna (record, True se era un duplicato).
+        """
         profit_loss = self.calculate_profit_loss(bet_info, result_info['bet_won'])
+        fingerprint = bet_info_fingerprint(chat_id, bet_info)
+        position = self.dedup.find(fingerprint)
+        if position is None and chat_id is not None:
+            # Scommesse salvate prima che lo storico avesse chat_id (impronta senza chat)
+            position = self.dedup.find(bet_info_fingerprint(None, bet_info))
+            if position is not None:
+                self.dedup.add(fingerprint, position)
         
-        bet_record = {
-            **bet_info,
-            "result": result_info['result'],
-            "result_details": result_info.get('details', ''),
-            "won": result_info['bet_won'],
-            "profit_loss": profit_loss,
-            "analyzed_at": datetime.now().isoformat()
-        }
+        if position is not None:
+            existing = self.history["bets"][position]
+            # Un esito già noto non torna "in corso" (es. provider irraggiungibile)
+            if result_info['bet_won'] is None or existing.won is not None:
+                metrics.incr('bets.duplicates')
+                return existing, True
+            
+            bet_record = BetRecord.from_result(bet_info, result_info, profit_loss, existing.analyzed_at, chat_id)
+            self.history["bets"].replace(position, bet_record)
+            self.update_sport_stats(existing, -1)
+            self.update_sport_stats(bet_record, +1)
+            self._columns = None  # Le colonne assumono uno storico solo in append
+            if self._query_index is not None:
+                self._query_index.replace(position, existing, bet_record)
+            self.track_football(position, bet_record)
+            metrics.incr('bets.upserts')
+            self.save_history()
+            return bet_record, True
         
+        bet_record = BetRecord.from_result(bet_info, result_info, profit_loss, datetime.now().isoformat(), chat_id)
         self.history["bets"].append(bet_record)
-        
-        # Aggiorna statistiche per sport
-        sport = bet_info['sport']
-        if sport not in self.history["stats_by_sport"]:
-            self.history["stats_by_sport"][sport] = {
-                "total_bets": 0,
-                "won": 0,
-                "lost": 0,
-                "pending": 0,
-                "total_profit_loss": 0.0,
-                "total_staked": 0.0
-            }
-        
-        stats = self.history["stats_by_sport"][sport]
-        stats["total_bets"] += 1
-        stats["total_staked"] += float(bet_info['importo'])
-        
-        if result_info['bet_won'] is True:
-            stats["won"] += 1
-            stats["total_profit_loss"] += profit_loss
-        elif result_info['bet_won'] is False:
-            stats["lost"] += 1
-            stats["total_profit_loss"] += profit_loss
-        else:
-            stats["pending"] += 1
-        
+        self.dedup.add(fingerprint, len(self.history["bets"]) - 1)
+        self.update_sport_stats(bet_record, +1)
+        if self._query_index is not None:
+            self._query_index.add(bet_record)
+        self.track_football(len(self.history["bets"]) - 1, bet_record)
         self.save_history()
-        return bet_record
+        return bet_record, False
+    
+    def update_sport_stats(self, bet_record, sign):
+        """Aggiunge (sign=+1) o toglie (sign=-1) una scommessa dalle statistiche per sport"""
+        bet_query = timed_import("bet_query")
+        bet_query.merge_stats(self.history["stats_by_sport"], bet_query.record_stats(bet_record), sign)
+    
+    def get_total_bets(self):
+        """Scommesse analizzate in totale (dagli aggregati)"""
+        return sum(s['total_bets'] for s in self.history['stats_by_sport'].values())
     
     def get_stats_summary(self):
-        """Ritorna un riepilogo delle statistiche"""
-        if not self.history["stats_by_sport"]:
+        """Riepilogo delle statistiche, formattato una volta per ogni modifica allo storico"""
+        if self._summary is None:
+            self._summary = self.render_stats_summary()
+            metrics.incr('stats.summary.rendered')
+        return self._summary
+    
+    def render_stats_summary(self, stats_by_sport=None):
+        """Ritorna un riepilogo delle statistiche (di tutto lo storico o di una query)"""
+        if stats_by_sport is None:
+            stats_by_sport = self.history["stats_by_sport"]
+        if not stats_by_sport:
             return "Nessuna scommessa analizzata ancora!"
         
         summary = []
@@ -154,10 +298,11 @@ REGOLE:
             "Football": "🏈",
             "Baseball": "⚾",
             "Hockey": "🏒",
-            "Basket": "🏀"
+            "Basket": "🏀",
+            "Multipla": "🧩"
         }
         
-        for sport, stats in sorted(self.history["stats_by_sport"].items()):
+        for sport, stats in sorted(stats_by_sport.items()):
             icon = sport_icons.get(sport, "🎯")
             profit = stats["total_profit_loss"]
             staked = stats["total_staked"]
@@ -185,10 +330,169 @@ REGOLE:
         summary.append(f"💵 Investito: {total_staked:.2f}€")
         
         return "\n".join(summary)
+    
+    def get_query_index(self):
+        """Indici secondari dello storico (costruiti al primo uso, poi aggiornati da add_bet)"""
+        bets = self.history["bets"]
+        if self._query_index is None or self._query_index.count != len(bets):
+            self._query_index = timed_import("bet_query").StatsIndex.from_bets(bets)
+        return self._query_index
+    
+    def query_stats(self, args):
+        """Riepilogo delle scommesse che soddisfano i filtri di /stats (ValueError se non validi)"""
+        bet_query = timed_import("bet_query")
+        query = bet_query.parse_query(args)
+        index = self.get_query_index()
+        
+        start = time.perf_counter()
+        rows = index.select(query)
+        stats_by_sport = index.aggregate(rows)
+        metrics.observe('stats.query_ms', (time.perf_counter() - start) * 1000)
+        
+        if not stats_by_sport:
+            return 0, "Nessuna scommessa corrisponde ai filtri."
+        return len(rows), self.render_stats_summary(stats_by_sport)
+    
+    def is_watched_football(self, record):
+        """Scommessa di calcio singola, in corso e con una chat da avvisare"""
+        football_sports = timed_import("football_watcher").FOOTBALL_SPORTS
+        return (record.won is None and record.chat_id is not None and not record.legs
+                and (record.sport or '').lower() in football_sports)
+    
+    def track_football(self, position, record):
+        """Aggiorna l'insieme delle scommesse seguite dal watcher (se già creato)"""
+        if self._pending_football is None:
+            return
+        if self.is_watched_football(record):
+            self._pending_football[position] = record
+        else:
+            self._pending_football.pop(position, None)
+    
+    def pending_football_bets(self):
+        """
+        Scommesse di calcio in corso con una chat da avvisare: [(posizione, record)].
+        Al primo uso si scorre solo il segmento caldo (il watcher guarda le partite
+        di oggi, i giorni passati li risolve l'archivio risultati), poi add_bet
+        aggiorna l'insieme.
+        """
+        if self._pending_football is None:
+            bets = self.history["bets"]
+            hot = enumerate(bets.iter_from(bets.hot_start), bets.hot_start)
+            self._pending_football = {
+                position: record for position, record in hot if self.is_watched_football(record)
+            }
+        return sorted(self._pending_football.items())
+    
+    def settle_bet(self, record, result_info):
+        """Registra l'esito arrivato dal watcher (stessa impronta: aggiorna la scommessa esistente)"""
+        bet_info = normalize_bet_info(record.to_dict())
+        bet_record, _ = self.add_bet(bet_info, result_info, record.chat_id)
+        return bet_record
+    
+    def get_columns(self):
+        """Storico in colonne NumPy, aggiornato in modo incrementale"""
+        bets = self.history["bets"]
+        BetColumns = timed_import("bet_analytics").BetColumns
+        
+        # Le scommesse sono solo in append: converti solo quelle nuove
+        if self._columns is None or len(self._columns) > len(bets):
+            self._columns = BetColumns.from_bets(bets)
+        elif len(self._columns) < len(bets):
+            self._columns = self._columns.extend(BetColumns.from_bets(bets[len(self._columns):]))
+        return self._columns
+    
+    def get_advanced_stats(self):
+        """Ritorna le metriche avanzate (bankroll, drawdown, serie, calibrazione)"""
+        if not self.history["bets"]:
+            return "Nessuna scommessa analizzata ancora!"
+        
+        analytics = timed_import("bet_analytics")
+        return analytics.format_advanced_stats(analytics.advanced_stats(self.get_columns()))
+    
+    def get_simulation(self, columns, strategy, fraction, paths):
+        """
+        Monte Carlo del bankroll con la strategia indicata.
+        Gira in un thread: riceve le colonne lette prima sul loop (get_columns),
+        immutabili, così add_bet può continuare ad aggiornare lo storico.
+        """
+        if len(columns) == 0:
+            return "Nessuna scommessa analizzata ancora!"
+        
+        simulator = timed_import("bet_simulator")
+        result = simulator.simulate(columns, strategy, fraction, paths)
+        if result is None:
+            return "Nessuna scommessa conclusa da simulare!"
+        return simulator.format_simulation(result)
+
 
+# Analyzer del bot, creato da main() (l'import del modulo non tocca il disco)
+analyzer: BettingAnalyzer = None
 
-# Inizializza analyzer
-analyzer = BettingAnalyzer()
+# Riepiloghi in attesa di invio, per chat
+_summary_tasks = {}
+
+def cancel_summary(chat_id):
+    """Annulla il riepilogo in attesa (True se ce n'era uno da recuperare)"""
+    task = _summary_tasks.pop(chat_id, None)
+    if task is None or task.done():
+        return False
+    task.cancel()
+    metrics.incr('stats.summary.coalesced')
+    return True
+
+def schedule_summary(context: ContextTypes.DEFAULT_TYPE, chat_id, attempt=0):
+    """
+    Invia il riepilogo dopo SUMMARY_DEBOUNCE secondi senza nuove schedine;
+    se l'invio fallisce lo riprogramma (al massimo SUMMARY_RETRIES volte).
+    """
+    async def send_later():
+        await asyncio.sleep(SUMMARY_DEBOUNCE)
+        _summary_tasks.pop(chat_id, None)
+        try:
+            await outbox.send(
+                context.bot,
+                chat_id,
+                f"📊 *RIEPILOGO AGGIORNATO*\n\n{analyzer.get_stats_summary()}",
+                parse_mode='Markdown'
+            )
+        except Exception as e:
+            # Task in background: nessuno attende il risultato, l'errore va registrato qui
+            metrics.incr('stats.summary.failed')
+            print(f"Riepilogo non inviato a {chat_id}: {e}")
+            # Una nuova schedina nel frattempo ha già programmato il suo riepilogo
+            if attempt < SUMMARY_RETRIES and chat_id not in _summary_tasks:
+                schedule_summary(context, chat_id, attempt + 1)
+    
+    cancel_summary(chat_id)
+    _summary_tasks[chat_id] = asyncio.create_task(send_later())
+
+# Chat a cui inviare i report del profiler
+_profile_chat = None
+
+async def send_profile(context: ContextTypes.DEFAULT_TYPE, report):
+    """Invia i report del profiler: stack in formato collapsed (flamegraph) e memoria"""
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    caption = f"🔬 {report['label']}: {report['seconds']:.2f}s, {report['samples']} campioni"
+    await outbox.send_document(context.bot, _profile_chat, report['collapsed'].encode('utf-8'),
+                               f"profile_{stamp}.folded", caption=caption)
+    await outbox.send_document(context.bot, _profile_chat, report['memory'].encode('utf-8'),
+                               f"memory_{stamp}.txt")
+
+def profiled(handler):
+    """Profila l'handler se il profiler è armato (altrimenti un solo controllo)"""
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        session = profiler.begin(handler.__name__)
+        if session is None:
+            return await handler(update, context)
+        try:
+            return await handler(update, context)
+        finally:
+            profiler.detach(session)
+            report = await asyncio.to_thread(profiler.end, session)
+            if report is not None:  # None: già chiusa da /profile off
+                await send_profile(context, report)
+    return wrapper
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Comando /start"""
@@ -199,12 +503,17 @@ Benvenuto! Sono il tuo assistente per analizzare le scommesse.
 
 *Come funziona:*
 📸 Invia uno screenshot della tua scommessa
+📋 ...oppure incolla il testo della schedina (più veloce)
 🔍 Analizzerò automaticamente tutti i dettagli
 ✅/❌ Ti dirò se hai vinto o perso
+🔔 Calcio in corso: ti avviso io appena la partita finisce
 💰 Calcolerò il tuo profitto/perdita
 
 *Comandi disponibili:*
 /stats - Visualizza statistiche complete
+/stats advanced - Bankroll, drawdown, serie e calibrazione
+/stats sport:nba quota>2 mese - Statistiche filtrate
+/simulate - Monte Carlo del bankroll (flat, percent, kelly)
 /reset - Azzera tutto lo storico
 /help - Mostra questo messaggio
 
@@ -216,7 +525,7 @@ Benvenuto! Sono il tuo assistente per analizzare le scommesse.
 
 Invia il tuo primo screenshot per iniziare! 🚀
 """
-    await update.message.reply_text(welcome_text, parse_mode='Markdown')
+    await outbox.reply(update.message, welcome_text, parse_mode='Markdown')
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Comando /help"""
@@ -224,41 +533,159 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Mostra statistiche complete"""
+    if context.args and context.args[0].lower() == 'advanced':
+        summary = analyzer.get_advanced_stats()
+        await outbox.reply(update.message, f"📈 *STATISTICHE AVANZATE*\n\n{summary}", parse_mode='Markdown')
+        return
+    
+    if context.args:
+        try:
+            count, summary = analyzer.query_stats(context.args)
+        except ValueError as e:
+            await outbox.reply(
+                update.message,
+                f"❌ {e}\n\nFiltri: sport:nba mercato:giocatore giocatore:lebron esito:vinte "
+                "quota>2 quota:1.5-2.5 oggi|settimana|mese|anno dal:01/02/2026 al:28/02/2026"
+            )
+            return
+        header = f"🔎 *STATISTICHE FILTRATE*\n\nScommesse trovate: {count}\n\n"
+        await outbox.reply(update.message, header + summary, parse_mode='Markdown')
+        return
+    
     summary = analyzer.get_stats_summary()
     
     header = "📊 *STATISTICHE COMPLETE*\n\n"
-    total_bets = sum(s['total_bets'] for s in analyzer.history['stats_by_sport'].values())
-    header += f"Scommesse analizzate: {total_bets}\n\n"
+    header += f"Scommesse analizzate: {analyzer.get_total_bets()}\n\n"
+    
+    await outbox.reply(update.message, header + summary, parse_mode='Markdown')
+
+async def simulate(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /simulate [flat|percent|kelly] [valore] [percorsi]"""
+    args = [a.lower() for a in context.args or []]
+    strategy = args[0] if args else 'percent'
+    if strategy not in ('flat', 'percent', 'kelly'):
+        await outbox.reply(
+            update.message,
+            "Uso: /simulate [flat|percent|kelly] [valore] [percorsi]\n"
+            "es. /simulate flat 2 (2% del bankroll iniziale), /simulate kelly 0.25"
+        )
+        return
     
-    await update.message.reply_text(header + summary, parse_mode='Markdown')
+    try:
+        value = float(args[1].replace(',', '.')) if len(args) > 1 else (0.25 if strategy == 'kelly' else 2.0)
+        paths = int(args[2]) if len(args) > 2 else 10000
+    except ValueError:
+        await outbox.reply(update.message, "❌ Valori non validi.")
+        return
+    # flat/percent in punti percentuali, Kelly come frazione
+    fraction = value if strategy == 'kelly' else value / 100
+    paths = max(100, min(paths, 50000))
+    
+    processing_msg = await outbox.reply(update.message, f"🎲 Simulo {paths} percorsi...")
+    columns = analyzer.get_columns()
+    summary = await asyncio.to_thread(analyzer.get_simulation, columns, strategy, fraction, paths)
+    await outbox.edit(processing_msg, f"🎲 *SIMULAZIONE BANKROLL*\n\n{summary}", parse_mode='Markdown')
+
+async def metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /metrics (solo admin): costi e latenze di Gemini e salute dei provider"""
+    if update.effective_chat.id not in ADMIN_CHAT_IDS:
+        return
+    
+    text = (f"📟 *METRICHE*\n\nModello: `{GEMINI_MODEL}` | Cache: `{cache.name}`\n\n"
+            f"{format_metrics(metrics.snapshot())}")
+    
+    # Provider solo se già creati (non forza l'import delle API sportive)
+    if analyzer._api_manager is not None:
+        text += "\n\n*Provider*"
+        for name, health in analyzer._api_manager.router.status().items():
+            state = "🔴" if health['circuit_open'] else "🟢"
+            text += (f"\n{state} `{name}`: errori {health['error_rate']:.0%}, "
+                     f"{health['avg_latency']:.2f}s, quota {health['quota_remaining']}, "
+                     f"oggi {health['calls_today']} richieste")
+    
+    await outbox.reply(update.message, text, parse_mode='Markdown')
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /profile (solo admin): /profile N | /profile 30s | /profile off"""
+    global _profile_chat
+    if update.effective_chat.id not in ADMIN_CHAT_IDS:
+        return
+    
+    arg = context.args[0].lower() if context.args else ""
+    if arg == "off":
+        session = profiler.stop()
+        report = await asyncio.to_thread(profiler.end, session) if session is not None else None
+        await outbox.reply(update.message, "🔬 Profiler spento.")
+        if report is not None:
+            await send_profile(context, report)
+    elif arg.endswith("s") and arg[:-1].isdigit():
+        seconds = int(arg[:-1])
+        try:
+            session = profiler.start_window(seconds)
+        except ValueError as e:
+            await outbox.reply(update.message, f"❌ {e}.")
+            return
+        if session is None:
+            await outbox.reply(update.message, "🔬 C'è già una profilazione in corso.")
+            return
+        _profile_chat = update.effective_chat.id
+        await outbox.reply(update.message, f"🔬 Profilo tutto il processo per {seconds}s...")
+        
+        async def close_window():
+            await asyncio.sleep(seconds)
+            report = await asyncio.to_thread(profiler.end, session)
+            if report is not None:  # None: già chiusa da /profile off
+                await send_profile(context, report)
+        # Task tenuto da Application (un create_task senza riferimenti può sparire)
+        context.application.create_task(close_window())
+    elif arg.isdigit():
+        requests = int(arg)
+        if not 1 <= requests <= MAX_PROFILE_REQUESTS:
+            await outbox.reply(update.message, f"❌ N deve essere tra 1 e {MAX_PROFILE_REQUESTS} (per spegnere: /profile off).")
+            return
+        profiler.arm(requests)
+        _profile_chat = update.effective_chat.id
+        await outbox.reply(update.message, f"🔬 Profilo le prossime {requests} schedine.")
+    else:
+        state = "acceso" if profiler.enabled else "spento"
+        await outbox.reply(
+            update.message,
+            f"🔬 Profiler {state} ({profiler.remaining} richieste in coda)\n"
+            f"Uso: /profile N (prossime N schedine, max {MAX_PROFILE_REQUESTS}), "
+            f"/profile 30s (finestra, max {MAX_WINDOW_SECONDS}s), /profile off"
+        )
 
 async def reset(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Reset storico con conferma"""
-    total_bets = sum(s['total_bets'] for s in analyzer.history['stats_by_sport'].values())
+    total_bets = analyzer.get_total_bets()
     
     if total_bets == 0:
-        await update.message.reply_text("📊 Lo storico è già vuoto!")
+        await outbox.reply(update.message, "📊 Lo storico è già vuoto!")
         return
     
-    # Salva backup
+    # Salva backup (solo manifest: i segmenti restano su disco, niente copie)
     backup_file = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    snapshot = analyzer.history["bets"].snapshot(analyzer.history["stats_by_sport"])
     with open(backup_file, 'w', encoding='utf-8') as f:
-        json.dump(analyzer.history, f, ensure_ascii=False, indent=2)
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
     
     # Reset
-    analyzer.history = {"bets": [], "stats_by_sport": {}}
-    analyzer.save_history()
+    analyzer.clear_history()
     
-    await update.message.reply_text(
+    await outbox.reply(
+        update.message,
         f"🗑️ *Storico azzerato!*\n\n"
         f"Backup salvato in: `{backup_file}`\n"
         f"Scommesse cancellate: {total_bets}",
         parse_mode='Markdown'
     )
 
+@profiled
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Gestisce gli screenshot ricevuti"""
-    processing_msg = await update.message.reply_text("🔍 Analizzo lo screenshot...")
+    chat_id = update.effective_chat.id
+    summary_due = cancel_summary(chat_id)
+    processing_msg = await outbox.reply(update.message, "🔍 Analizzo lo screenshot...")
     
     try:
         # Scarica l'immagine
@@ -269,11 +696,12 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         image_bytes = await file.download_as_bytearray()
         
         # Estrai info dalla scommessa usando Gemini Vision
-        await processing_msg.edit_text("🤖 Leggo i dettagli della scommessa...")
-        bet_info = analyzer.extract_bet_info(bytes(image_bytes))
+        outbox.edit(processing_msg, "🤖 Leggo i dettagli della scommessa...", status=True)
+        bet_info = await profiler.to_thread(analyzer.extract_bet_info, bytes(image_bytes))
         
         if not bet_info:
-            await processing_msg.edit_text(
+            await outbox.edit(
+                processing_msg,
                 "❌ *Errore nella lettura*\n\n"
                 "Non riesco a leggere lo screenshot.\n"
                 "Assicurati che l'immagine sia:\n"
@@ -284,77 +712,164 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        # Cerca il risultato della partita
-        await processing_msg.edit_text("🔎 Cerco il risultato della partita...")
-        result_info = analyzer.get_match_result(
-            bet_info['sport'],
-            bet_info['match'],
-            bet_info.get('date', ''),
-            bet_info['bet_type'],
-            bet_info.get('player')
-        )
-        
-        # Salva nello storico
-        bet_record = analyzer.add_bet(bet_info, result_info)
+        await reply_with_result(processing_msg, bet_info)
+        summary_due = True
         
-        # Prepara risposta dettagliata
-        sport_icons = {
-            "NBA": "🏀",
-            "Calcio": "⚽",
-            "Tennis": "🎾",
-            "Football": "🏈"
-        }
-        icon = sport_icons.get(bet_info['sport'], "🎯")
-        
-        response = f"{icon} *{bet_info['sport'].upper()}*\n\n"
-        response += f"⚡ *{bet_info['match']}*\n"
-        response += f"📋 {bet_info['bet_type']}\n"
-        
-        if bet_info.get('player'):
-            response += f"👤 Giocatore: {bet_info['player']}\n"
-        
-        response += f"\n💰 Quota: *{bet_info['quota']}*\n"
-        response += f"💵 Puntata: {bet_info['importo']:.2f}€\n"
-        response += f"🎯 Vincita pot.: {bet_info['vincita_potenziale']:.2f}€\n"
-        
-        response += "\n" + "─" * 30 + "\n\n"
-        
-        # Risultato
-        if result_info['bet_won'] is True:
-            profit = bet_record['profit_loss']
-            response += f"✅ *SCOMMESSA VINTA!*\n"
-            response += f"💚 Profitto: +{profit:.2f}€"
-        elif result_info['bet_won'] is False:
-            loss = bet_record['profit_loss']
-            response += f"❌ *Scommessa persa*\n"
-            response += f"💔 Perdita: {loss:.2f}€"
-        else:
-            response += f"⏳ *{result_info['result']}*"
+    except Exception as e:
+        await report_error(processing_msg, e)
+    finally:
+        if summary_due:
+            schedule_summary(context, chat_id)
+
+@profiled
+async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Gestisce le schedine incollate come testo (senza screenshot)"""
+    text = update.message.text or ""
+    if not looks_like_slip(text):
+        # Nei gruppi il bot legge tutti i messaggi: suggerimento solo in privato
+        if update.effective_chat.type == 'private':
+            await outbox.reply(
+                update.message,
+                "📸 Inviami uno screenshot della scommessa oppure incolla il testo della schedina."
+            )
+        return
+    
+    chat_id = update.effective_chat.id
+    summary_due = cancel_summary(chat_id)
+    processing_msg = await outbox.reply(update.message, "🔍 Leggo la schedina...")
+    
+    try:
+        bet_info = await profiler.to_thread(analyzer.extract_bet_info_from_text, text)
         
-        if result_info.get('details'):
-            response += f"\n\n📊 {result_info['details']}"
+        if not bet_info:
+            await outbox.edit(
+                processing_msg,
+                "❌ *Errore nella lettura*\n\n"
+                "Non riesco a leggere la schedina.\n"
+                "Assicurati che il testo contenga:\n"
+                "✓ La partita (es. Inter - Juventus)\n"
+                "✓ L'esito giocato e la quota\n"
+                "✓ L'importo",
+                parse_mode='Markdown'
+            )
+            return
         
-        await processing_msg.edit_text(response, parse_mode='Markdown')
+        await reply_with_result(processing_msg, bet_info)
+        summary_due = True
         
-        # Mostra stats aggiornate dopo 1 secondo
-        import asyncio
-        await asyncio.sleep(1)
+    except Exception as e:
+        await report_error(processing_msg, e)
+    finally:
+        if summary_due:
+            schedule_summary(context, chat_id)
+
+async def reply_with_result(processing_msg, bet_info):
+    """Verifica la schedina, la salva e risponde con l'esito (il riepilogo arriva a parte)"""
+    # Cerca il risultato della partita (multiple: selezioni in parallelo)
+    outbox.edit(processing_msg, "🔎 Cerco il risultato della partita...", status=True)
+    result_info = await profiler.to_thread(analyzer.evaluate_bet, bet_info)
+    
+    # Salva nello storico (una schedina già inviata viene solo aggiornata)
+    bet_record, duplicate = analyzer.add_bet(bet_info, result_info, processing_msg.chat_id)
+    
+    # Prepara risposta dettagliata
+    sport_icons = {
+        "NBA": "🏀",
+        "Calcio": "⚽",
+        "Tennis": "🎾",
+        "Football": "🏈",
+        "Multipla": "🧩"
+    }
+    icon = sport_icons.get(bet_info['sport'], "🎯")
+    
+    response = f"{icon} *{bet_info['sport'].upper()}*\n\n"
+    response += f"⚡ *{bet_info['match']}*\n"
+    response += f"📋 {bet_info['bet_type']}\n"
+    
+    if bet_info.get('player'):
+        response += f"👤 Giocatore: {bet_info['player']}\n"
+    
+    response += f"\n💰 Quota: *{bet_info['quota']}*\n"
+    response += f"💵 Puntata: {bet_info['importo']:.2f}€\n"
+    response += f"🎯 Vincita pot.: {bet_info['vincita_potenziale']:.2f}€\n"
+    
+    response += "\n" + "─" * 30 + "\n\n"
+    
+    if duplicate:
+        response += "♻️ _Schedina già registrata: non viene contata due volte_\n\n"
+    
+    # Risultato (quello salvato: per un duplicato può essere già noto)
+    response += format_outcome(bet_record)
+    
+    await outbox.edit(processing_msg, response, parse_mode='Markdown')
+
+def format_outcome(bet_record):
+    """Esito della scommessa salvata (vinta, persa o in corso) con i dettagli"""
+    if bet_record.won is True:
+        profit = bet_record.profit_loss
+        response = f"✅ *SCOMMESSA VINTA!*\n"
+        response += f"💚 Profitto: +{profit:.2f}€"
+    elif bet_record.won is False:
+        loss = bet_record.profit_loss
+        response = f"❌ *Scommessa persa*\n"
+        response += f"💔 Perdita: {loss:.2f}€"
+    else:
+        response = f"⏳ *{bet_record.result}*"
+    
+    if bet_record.result_details:
+        response += f"\n\n📊 {bet_record.result_details}"
+    return response
+
+async def report_error(processing_msg, e):
+    """Messaggio di errore imprevisto (con traceback in console)"""
+    error_msg = f"❌ *Errore imprevisto*\n\n`{str(e)}`\n\nRiprova o contatta il supporto."
+    await outbox.edit(processing_msg, error_msg, parse_mode='Markdown')
+    print(f"Errore completo: {e}")
+    import traceback
+    traceback.print_exc()
+
+async def watch_football(application):
+    """
+    Ogni FOOTBALL_WATCH_INTERVAL secondi: una lettura del feed live per tutte le scommesse
+    di calcio aperte; quelle concluse vengono salvate e notificate alla chat.
+    """
+    watcher = None
+    while True:
+        await asyncio.sleep(FOOTBALL_WATCH_INTERVAL)
+        pending = analyzer.pending_football_bets()
+        if not pending:
+            continue
+        if watcher is None:
+            watcher = timed_import("football_watcher").FootballWatcher(analyzer.api_manager)
         
-        summary = analyzer.get_stats_summary()
-        await update.message.reply_text(
-            f"📊 *RIEPILOGO AGGIORNATO*\n\n{summary}",
-            parse_mode='Markdown'
-        )
+        try:
+            settled = await asyncio.to_thread(watcher.poll, pending)
+        except Exception as e:
+            print(f"Errore watcher calcio: {e}")
+            continue
         
-    except Exception as e:
-        error_msg = f"❌ *Errore imprevisto*\n\n`{str(e)}`\n\nRiprova o contatta il supporto."
-        await processing_msg.edit_text(error_msg, parse_mode='Markdown')
-        print(f"Errore completo: {e}")
-        import traceback
-        traceback.print_exc()
+        for position, record, result_info in settled:
+            bet_record = analyzer.settle_bet(record, result_info)
+            metrics.incr('watcher.settled')
+            message = (
+                f"🔔 *SCOMMESSA CONCLUSA*\n\n"
+                f"⚡ *{bet_record.match}*\n"
+                f"📋 {bet_record.bet_type}\n\n"
+                f"{format_outcome(bet_record)}"
+            )
+            try:
+                await outbox.send(application.bot, bet_record.chat_id, message, parse_mode='Markdown')
+            except Exception as e:
+                print(f"Notifica non inviata a {bet_record.chat_id}: {e}")
+
+async def start_background_tasks(application):
+    """Avviato da Application dopo l'inizializzazione"""
+    if FOOTBALL_WATCH_INTERVAL > 0:
+        application.create_task(watch_football(application))
 
 def main():
     """Avvia il bot"""
+    global analyzer
     print("🚀 Inizializzazione bot...")
     
     # Verifica configurazione
@@ -367,22 +882,41 @@ def main():
         print("   Ottienila gratis su: https://makersuite.google.com/app/apikey")
         return
     
+    # Storico (legge solo gli aggregati; crea history/ al primo avvio)
+    analyzer = BettingAnalyzer()
+    # Backend di CACHE_URL aperto subito: un URL non valido ferma l'avvio qui
+    cache.backend
+    
+    # Import Telegram solo dopo aver validato la configurazione
+    telegram = timed_import("telegram")
+    telegram_ext = timed_import("telegram.ext")
+    Application = telegram_ext.Application
+    CommandHandler = telegram_ext.CommandHandler
+    MessageHandler = telegram_ext.MessageHandler
+    filters = telegram_ext.filters
+    
     # Crea application
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    application = Application.builder().token(TELEGRAM_TOKEN).post_init(start_background_tasks).build()
     
     # Aggiungi handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("stats", stats))
     application.add_handler(CommandHandler("reset", reset))
+    application.add_handler(CommandHandler("simulate", simulate))
+    application.add_handler(CommandHandler("metrics", metrics_command))
+    application.add_handler(CommandHandler("profile", profile_command))
     application.add_handler(MessageHandler(filters.PHOTO, handle_photo))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text))
     
     # Avvia
+    if STARTUP_REPORT:
+        print(f"⏱️  Avvio completato in {(time.perf_counter() - _PROCESS_START) * 1000:.0f} ms")
     print("✅ Bot attivo e in ascolto!")
     print("📱 Invia screenshot su Telegram per iniziare.")
     print("\n🛑 Premi CTRL+C per fermare il bot.\n")
     
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    application.run_polling(allowed_updates=telegram.Update.ALL_TYPES)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,139 @@
+"""
+Modulo Calcio - archivio locale dei risultati dei giorni passati
+Le partite concluse di una data vengono scaricate in blocco (storico LiveScore
+o API-Football per data), salvate su disco e indicizzate per coppia di squadre
+normalizzate. Un giorno si riscarica al massimo ogni REFRESH_SECONDS finché non
+è definitivo, poi mai più: le scommesse sui giorni passati si risolvono dai
+dati locali. Un download può richiedere più pagine (vedi HISTORY_MAX_PAGES).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sports_providers import ProviderRouter, normalize_name, teams_match
+
+RESULTS_DIR = "football_results"
+# Un giorno è definitivo se scaricato almeno così tanto dopo la sua fine
+# (partite dopo mezzanotte, risultati corretti in ritardo)
+FINAL_AFTER_HOURS = 12
+# Giorno non ancora definitivo: dopo quanto riscaricarlo
+REFRESH_SECONDS = 3600
+# Giorni tenuti in memoria (gli altri restano su disco)
+MAX_DAYS = 31
+
+# Campi salvati per ogni partita ('raw' resta fuori per tenere piccoli i file)
+STORED_FIELDS = ('provider', 'id', 'date', 'home', 'away', 'home_score', 'away_score', 'finished', 'status')
+
+
+def pair_key(home: str, away: str) -> frozenset:
+    """Chiave della partita indipendente dall'ordine delle squadre"""
+    return frozenset((normalize_name(home), normalize_name(away)))
+
+
+class FootballResultsWarehouse:
+    """
+    Risultati calcio per data: {data: {coppia di squadre: partita}}.
+    Un file JSON per giorno in RESULTS_DIR; i giorni definitivi non vengono
+    mai più riscaricati. In memoria restano gli ultimi MAX_DAYS giorni usati.
+    Thread-safe.
+    """
+
+    def __init__(self, router: ProviderRouter, directory: str = RESULTS_DIR):
+        self.router = router
+        self.directory = directory
+        self._days: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()  # protegge _days e _day_locks (mai tenuto durante la rete)
+        self._day_locks: Dict[str, threading.Lock] = {}
+
+    def path(self, date: str) -> str:
+        return os.path.join(self.directory, f"{date}.json")
+
+    @staticmethod
+    def is_past(date: str) -> bool:
+        """True per i giorni già terminati (solo questi vanno in archivio)"""
+        return date < datetime.now().strftime('%Y-%m-%d')
+
+    @staticmethod
+    def is_final(date: str, fetched_at: float) -> bool:
+        """
+        Il giorno non può più cambiare: scaricato ben dopo la sua fine.
+        Non si guardano gli stati delle partite: lo storico LiveScore contiene
+        solo partite concluse anche quando quelle serali mancano ancora.
+        """
+        day_end = datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)
+        return fetched_at >= (day_end + timedelta(hours=FINAL_AFTER_HOURS)).timestamp()
+
+    def _read(self, date: str) -> Optional[Dict]:
+        try:
+            with open(self.path(date), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, date: str, day: Dict):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.path(date) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(day, f, ensure_ascii=False)
+        os.replace(tmp, self.path(date))
+
+    def _day_lock(self, date: str) -> threading.Lock:
+        """Un download alla volta per giorno; gli altri giorni restano consultabili"""
+        with self._lock:
+            return self._day_locks.setdefault(date, threading.Lock())
+
+    def _index(self, day: Dict) -> Dict:
+        day['index'] = {pair_key(m['home'], m['away']): m for m in day['matches']}
+        return day
+
+    def _fetch(self, date: str) -> Dict:
+        matches = self.router.run('football_matches', lambda p: p.football_matches(date))
+        matches = [{field: m.get(field) for field in STORED_FIELDS} for m in matches]
+        fetched_at = time.time()
+        day = {
+            'date': date,
+            'fetched_at': fetched_at,
+            'final': self.is_final(date, fetched_at),
+            'matches': matches
+        }
+        self._write(date, day)
+        return self._index(day)
+
+    def load_day(self, date: str) -> Dict:
+        """Giorno dall'archivio (memoria, poi disco); scaricato se manca o non è definitivo"""
+        with self._day_lock(date):
+            with self._lock:
+                day = self._days.get(date)
+            if day is None:
+                day = self._read(date)
+                if day is not None:
+                    # Ricalcolato: i file vecchi potevano essere "definitivi" troppo presto
+                    day['final'] = self.is_final(date, day['fetched_at'])
+                    day = self._index(day)
+            if day is None or (not day['final'] and time.time() - day['fetched_at'] >= REFRESH_SECONDS):
+                day = self._fetch(date)
+
+            with self._lock:
+                self._days[date] = day
+                self._days.move_to_end(date)
+                while len(self._days) > MAX_DAYS:
+                    oldest, _ = self._days.popitem(last=False)
+                    self._day_locks.pop(oldest, None)
+            return day
+
+    def find(self, team1: str, team2: str, date: str) -> Optional[Dict]:
+        """Partita tra le due squadre in un giorno passato (None se non c'è)"""
+        day = self.load_day(date)
+        match = day['index'].get(pair_key(team1, team2))
+        if match:
+            return match
+        # Nomi non identici ("Inter" / "Inter Milan"): confronto sui soli match del giorno
+        for match in day['matches']:
+            if teams_match(team1, team2, match['home'], match['away']):
+                return match
+        return None
@@ -0,0 +1,104 @@
+"""
+Modulo Watcher Calcio - esiti delle scommesse in corso senza nuovo screenshot
+A ogni intervallo legge UNA volta il feed live (football_live_matches, lo
+stesso di get_football_match, condiviso tra le repliche) per tutte le
+scommesse di calcio aperte di oggi, confronta il feed con la lettura
+precedente e rivaluta solo le scommesse la cui partita ha cambiato punteggio
+o stato. Le scommesse concluse vengono restituite al bot, che aggiorna lo
+storico e avvisa la chat. Le scommesse sono riconosciute dall'impronta
+(bet_records.fingerprint), non dalla posizione nello storico.
+"""
+
+from datetime import datetime
+from typing import Dict, Hashable, List, Tuple
+
+from bet_records import BetRecord
+from sports_providers import normalize_name, teams_match
+
+# Sport delle scommesse seguite (come in SportsAPIManager.route_bet)
+FOOTBALL_SPORTS = ('calcio', 'football', 'soccer')
+
+
+def match_key(match: Dict) -> Hashable:
+    """Identità della partita nel feed (id del provider, altrimenti le squadre)"""
+    if match.get('id') is not None:
+        return (match.get('provider'), match['id'])
+    return (normalize_name(match['home']), normalize_name(match['away']))
+
+
+def match_state(match: Dict) -> Tuple:
+    """Ciò che, se cambia, può cambiare l'esito di una scommessa"""
+    return (match['home_score'], match['away_score'], match['status'], match['finished'])
+
+
+class FootballWatcher:
+    """
+    Diff tra letture successive del feed live.
+    `poll` è sincrona (rete): il bot la esegue in un thread.
+    """
+
+    def __init__(self, api_manager):
+        self.api = api_manager
+        self.day = None
+        self._states: Dict[Hashable, Tuple] = {}   # partita -> stato all'ultima lettura
+        self._matched: Dict[str, Hashable] = {}    # impronta scommessa -> partita
+        self._known: set = set()                   # impronte già confrontate con il feed
+
+    def _reset(self, day: str):
+        self.day = day
+        self._states.clear()
+        self._matched.clear()
+        self._known.clear()
+
+    def _find_match(self, record: BetRecord, matches: Dict[Hashable, Dict], keys) -> Hashable:
+        team1, team2 = self.api.extract_teams(record.match)
+        if not team1 or not team2:
+            return None
+        for key in keys:
+            if teams_match(team1, team2, matches[key]['home'], matches[key]['away']):
+                return key
+        return None
+
+    def poll(self, pending: List[Tuple[int, BetRecord]]) -> List[Tuple[int, BetRecord, Dict]]:
+        """
+        Una lettura del feed per tutte le scommesse `pending` (posizione, record).
+        Ritorna (posizione, record, result_info) di quelle ora concluse.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        if today != self.day:
+            self._reset(today)
+
+        # Solo le partite di oggi sono nel feed live; i giorni passati li risolve l'archivio
+        bets = [(position, record) for position, record in pending if self.api.parse_date(record.date) == today]
+        if not bets:
+            return []
+
+        matches = {match_key(m): m for m in self.api.football_live_matches(today)}
+        changed = {key for key, match in matches.items() if self._states.get(key) != match_state(match)}
+        self._states = {key: match_state(match) for key, match in matches.items()}
+
+        settled = []
+        open_bets = set()
+        for position, record in bets:
+            fingerprint = record.fingerprint()
+            open_bets.add(fingerprint)
+            is_new = fingerprint not in self._known
+            self._known.add(fingerprint)
+            key = self._matched.get(fingerprint)
+            if key is None:
+                # Scommessa nuova: tutto il feed; già vista: basta guardare le partite cambiate
+                key = self._find_match(record, matches, matches if is_new else changed)
+                if key is None:
+                    continue
+                self._matched[fingerprint] = key
+            elif key not in changed:
+                continue
+
+            result = self.api.football_result(matches[key], record.bet_type)
+            if result['bet_won'] is not None:
+                settled.append((position, record, result))
+
+        # Dimentica le scommesse non più aperte
+        self._matched = {f: k for f, k in self._matched.items() if f in open_bets}
+        self._known &= open_bets
+        return settled
@@ -0,0 +1,255 @@
+"""
+Modulo Archivio Storico - segmenti mensili compressi
+Lo storico è diviso in un segmento per mese: solo quello del mese corrente è
+"caldo" (JSON Lines + indice, vedi BetStore), i mesi passati sono compressi in
+gzip e letti solo quando servono. Un piccolo manifest tiene l'elenco, più i
+file referenziati da un backup ("pinned"): solo quelli sopravvivono quando un
+segmento viene riscritto o lo storico azzerato.
+"""
+
+import bisect
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Union
+
+from bet_records import BetRecord
+from bet_store import BetStore
+
+MANIFEST_NAME = "manifest.json"
+
+
+def current_month() -> str:
+    """Mese corrente in formato YYYY-MM"""
+    return datetime.now().strftime('%Y-%m')
+
+
+def record_month(record: BetRecord) -> str:
+    """Mese in cui la scommessa è stata registrata"""
+    return (record.analyzed_at or '')[:7] or current_month()
+
+
+class HistoryArchive:
+    """
+    Sequenza di BetRecord distribuita su segmenti mensili.
+    Stessa interfaccia di BetStore (len, indice, slice, iter, append).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"generation": 0, "segments": [], "active": None}
+        self.manifest.setdefault("pinned", [])
+
+        self._active = None
+        self._cold_cache = (None, [])  # (file, records) dell'ultimo segmento freddo letto
+        self._refresh_offsets()
+
+    # ==================== MANIFEST ====================
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _refresh_offsets(self):
+        """Posizione globale del primo record di ogni segmento freddo"""
+        self._starts = []
+        total = 0
+        for segment in self.manifest["segments"]:
+            self._starts.append(total)
+            total += segment["count"]
+        self._cold_count = total
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _discard(self, name: str):
+        """Elimina un segmento freddo non più nel manifest, se nessun backup lo usa"""
+        if name not in self.manifest["pinned"]:
+            try:
+                os.remove(self._segment_path(name))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def active(self) -> Optional[BetStore]:
+        """Segmento del mese corrente (aperto al primo accesso)"""
+        if self._active is None and self.manifest["active"]:
+            self._active = BetStore(self._segment_path(self.manifest["active"]["file"]))
+        return self._active
+
+    # ==================== ROTAZIONE ====================
+
+    def _open_active(self, month: str):
+        """Crea il segmento caldo per `month`"""
+        name = f"{month}_g{self.manifest['generation']}_{len(self.manifest['segments'])}.jsonl"
+        self.manifest["active"] = {"month": month, "file": name}
+        self._active = BetStore(self._segment_path(name))
+        self._save_manifest()
+
+    def rotate(self):
+        """Comprime il segmento caldo e lo sposta tra quelli freddi"""
+        active = self.active
+        if active is None:
+            return
+        info = self.manifest["active"]
+        if len(active) > 0:
+            active.compact()  # nel segmento freddo solo i record vivi
+            name = info["file"] + '.gz'
+            with open(active.path, 'rb') as src, gzip.open(self._segment_path(name), 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            self.manifest["segments"].append({"month": info["month"], "file": name, "count": len(active)})
+        os.remove(active.path)
+        os.remove(active.index_path)
+        self.manifest["active"] = None
+        self._active = None
+        self._refresh_offsets()
+        self._save_manifest()
+
+    def _ensure_active(self, month: str) -> BetStore:
+        info = self.manifest["active"]
+        if info and info["month"] != month:
+            self.rotate()
+        if self.manifest["active"] is None:
+            self._open_active(month)
+        return self.active
+
+    # ==================== LETTURA ====================
+
+    def _read_segment(self, index: int) -> List[BetRecord]:
+        """Decomprime un segmento freddo (tiene in cache l'ultimo letto)"""
+        name = self.manifest["segments"][index]["file"]
+        if self._cold_cache[0] != name:
+            with gzip.open(self._segment_path(name), 'rt', encoding='utf-8') as f:
+                records = [BetRecord.from_dict(json.loads(line)) for line in f if line.strip()]
+            self._cold_cache = (name, records)
+        return self._cold_cache[1]
+
+    def __len__(self) -> int:
+        active = self.active
+        return self._cold_count + (len(active) if active is not None else 0)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[BetRecord, List[BetRecord]]:
+        total = len(self)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(total)
+            if step == 1:
+                return list(self.iter_from(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+
+        if key < 0:
+            key += total
+        if not 0 <= key < total:
+            raise IndexError("HistoryArchive index out of range")
+        if key >= self._cold_count:
+            return self.active[key - self._cold_count]
+        segment = bisect.bisect_right(self._starts, key) - 1
+        return self._read_segment(segment)[key - self._starts[segment]]
+
+    @property
+    def hot_start(self) -> int:
+        """Posizione globale del primo record del segmento caldo"""
+        return self._cold_count
+
+    def iter_from(self, start: int = 0, stop: int = None) -> Iterator[BetRecord]:
+        """Scorre i record da `start` a `stop`, aprendo solo i segmenti necessari"""
+        total = len(self)
+        stop = total if stop is None else min(stop, total)
+
+        for segment, first in enumerate(self._starts):
+            last = first + self.manifest["segments"][segment]["count"]
+            if last <= start or first >= stop:
+                continue
+            records = self._read_segment(segment)
+            yield from records[max(start, first) - first:min(stop, last) - first]
+
+        if stop > self._cold_count and self.active is not None:
+            yield from self.active.iter_from(max(start - self._cold_count, 0), stop - self._cold_count)
+
+    def __iter__(self) -> Iterator[BetRecord]:
+        return self.iter_from(0)
+
+    # ==================== SCRITTURA ====================
+
+    def append(self, record: BetRecord):
+        """Aggiunge un record al segmento del mese corrente (ruota se il mese è cambiato)"""
+        self._ensure_active(current_month()).append(record)
+
+    def extend(self, records):
+        """Importa record già esistenti, ognuno nel segmento del proprio mese"""
+        batch, month = [], None
+        for record in records:
+            if batch and record_month(record) != month:
+                self._ensure_active(month).extend(batch)
+                batch = []
+            month = record_month(record)
+            batch.append(record)
+        if batch:
+            self._ensure_active(month).extend(batch)
+
+    def replace(self, position: int, record: BetRecord):
+        """
+        Sostituisce il record in `position`. I segmenti freddi vengono riscritti
+        in un nuovo file: quello vecchio resta solo se un backup lo referenzia.
+        """
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("HistoryArchive index out of range")
+        if position >= self._cold_count:
+            self.active.replace(position - self._cold_count, record)
+            return
+
+        index = bisect.bisect_right(self._starts, position) - 1
+        segment = self.manifest["segments"][index]
+        records = list(self._read_segment(index))
+        records[position - self._starts[index]] = record
+
+        revision = segment.get("revision", 0) + 1
+        name = f"{segment['month']}_g{self.manifest['generation']}_{index}_r{revision}.jsonl.gz"
+        with gzip.open(self._segment_path(name), 'wt', encoding='utf-8') as f:
+            for item in records:
+                f.write(json.dumps(item.to_dict(), ensure_ascii=False) + '\n')
+        self.manifest["segments"][index] = {**segment, "file": name, "revision": revision}
+        self._cold_cache = (name, records)
+        self._save_manifest()
+        self._discard(segment["file"])
+
+    def snapshot(self, stats: Dict) -> Dict:
+        """
+        Backup senza copie: chiude il segmento caldo e ritorna manifest + aggregati.
+        I file dei segmenti restano su disco e sono referenziati dal backup.
+        """
+        self.rotate()
+        pinned = set(self.manifest["pinned"])
+        self.manifest["pinned"] += [s["file"] for s in self.manifest["segments"] if s["file"] not in pinned]
+        self._save_manifest()
+        return {
+            "directory": self.directory,
+            "segments": list(self.manifest["segments"]),
+            "stats_by_sport": stats,
+            "created_at": datetime.now().isoformat()
+        }
+
+    def clear(self):
+        """Ricomincia da vuoto con una nuova generazione (restano solo i segmenti dei backup)"""
+        if self.active is not None:
+            self.rotate()
+        old_segments = self.manifest["segments"]
+        self.manifest = {"generation": self.manifest["generation"] + 1, "segments": [], "active": None,
+                         "pinned": self.manifest["pinned"]}
+        self._cold_cache = (None, [])
+        self._refresh_offsets()
+        self._save_manifest()
+        for segment in old_segments:
+            self._discard(segment["file"])
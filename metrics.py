@@ -0,0 +1,100 @@
+"""
+Modulo Metriche - contatori e distribuzioni in memoria
+Ogni chiamata costosa (Gemini, provider sportivi, ...) registra qui quanto è
+costata; /metrics mostra totali, medie e percentili per tarare costi e latenze.
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+# Campioni tenuti per calcolare i percentili di ogni serie
+SAMPLE_WINDOW = 500
+
+
+class Series:
+    """Distribuzione di una misura: conteggio, somma e ultimi campioni"""
+
+    __slots__ = ('count', 'total', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'total': round(self.total, 3),
+            'avg': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50': round(self.percentile(0.5), 3),
+            'p95': round(self.percentile(0.95), 3)
+        }
+
+
+class Metrics:
+    """Registro thread-safe: contatori (incr) e serie di valori (observe)"""
+
+    def __init__(self):
+        self._counters: Dict[str, float] = {}
+        self._series: Dict[str, Series] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: Optional[float]):
+        if value is None:
+            return
+        with self._lock:
+            self._series.setdefault(name, Series()).add(value)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'series': {name: series.snapshot() for name, series in self._series.items()}
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._series.clear()
+
+
+# Registro unico del processo
+metrics = Metrics()
+
+
+def format_metrics(snapshot: Dict) -> str:
+    """Testo Markdown per Telegram"""
+    lines = []
+    counters = snapshot.get('counters', {})
+    if counters:
+        lines.append("*Contatori*")
+        for name in sorted(counters):
+            value = counters[name]
+            lines.append(f"`{name}`: {value:g}")
+
+    series = snapshot.get('series', {})
+    if series:
+        if lines:
+            lines.append("")
+        lines.append("*Distribuzioni* (media / p50 / p95)")
+        for name in sorted(series):
+            s = series[name]
+            lines.append(f"`{name}`: {s['avg']:g} / {s['p50']:g} / {s['p95']:g} (n={s['count']}, tot {s['total']:g})")
+
+    return "\n".join(lines) if lines else "Nessuna metrica registrata."
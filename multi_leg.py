@@ -0,0 +1,107 @@
+"""
+Modulo Multiple - valutazione scommesse con più eventi (multipla/parlay)
+Le selezioni vengono verificate in parallelo; appena una risulta persa la
+multipla è persa e le verifiche non ancora partite vengono annullate, così
+non si consuma quota API inutilmente.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+# Verifiche contemporanee per multipla (basso per non bruciare la quota API)
+MAX_CONCURRENT_LEGS = 4
+
+LEG_ICONS = {True: '✅', False: '❌', None: '⏳'}
+
+
+def combined_odds(legs: List[Dict]) -> Optional[float]:
+    """Quota totale della multipla (prodotto delle quote), None se ne manca una"""
+    total = 1.0
+    for leg in legs:
+        if not leg.get('quota'):
+            return None
+        total *= leg['quota']
+    return round(total, 2)
+
+
+def evaluate_legs(legs: List[Dict], check_leg: Callable[[Dict], Dict],
+                  max_workers: int = MAX_CONCURRENT_LEGS) -> Dict:
+    """
+    Verifica tutte le selezioni in parallelo con `check_leg(leg) -> result_info`.
+    Si ferma alla prima selezione persa. Ritorna un result_info per la multipla
+    con l'esito di ogni selezione in `legs`.
+    """
+    stop = threading.Event()
+    results = [None] * len(legs)
+
+    def run(position: int):
+        if stop.is_set():
+            return position, None
+        return position, check_leg(legs[position])
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(legs))))
+    futures = {executor.submit(run, i): i for i in range(len(legs))}
+    try:
+        for future in as_completed(futures):
+            try:
+                position, result = future.result()
+            except Exception as e:
+                print(f"Errore verifica selezione {futures[future] + 1}: {e}")
+                continue
+            results[position] = result
+            if result and result.get('bet_won') is False:
+                # Short-circuit: la multipla è persa, le verifiche in coda non partono
+                stop.set()
+                break
+    finally:
+        # Non aspettare le richieste già in volo: il loro esito non serve più
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return summarize_legs(legs, results)
+
+
+def summarize_legs(legs: List[Dict], results: List[Dict]) -> Dict:
+    """Combina gli esiti delle selezioni nell'esito della multipla"""
+    settled_legs = []
+    for leg, result in zip(legs, results):
+        result = result or {}
+        settled_legs.append({
+            **leg,
+            'won': result.get('bet_won'),
+            'result': result.get('result', '⏳ Non verificata')
+        })
+
+    outcomes = [leg['won'] for leg in settled_legs]
+    won_count = outcomes.count(True)
+    pending = [leg for leg in settled_legs if leg['won'] is None]
+
+    if False in outcomes:
+        lost = next(leg for leg in settled_legs if leg['won'] is False)
+        bet_won = False
+        result = f"Multipla persa: {lost['match']} ({lost['bet_type']})"
+    elif not pending:
+        bet_won = True
+        result = f"Multipla vinta: {won_count}/{len(legs)} selezioni"
+    else:
+        bet_won = None
+        result = f"⏳ Multipla in corso: {won_count}/{len(legs)} vinte, {len(pending)} da giocare"
+
+    return {
+        'found': won_count > 0 or bet_won is False,
+        'result': result,
+        'bet_won': bet_won,
+        'details': format_legs(settled_legs),
+        'legs': settled_legs
+    }
+
+
+def format_legs(legs: List[Dict]) -> str:
+    """Una riga per selezione con l'icona dell'esito"""
+    lines = []
+    for leg in legs:
+        icon = LEG_ICONS[leg.get('won')]
+        player = f" - {leg['player']}" if leg.get('player') else ''
+        odds = f" @{leg['quota']}" if leg.get('quota') else ''
+        lines.append(f"{icon} {leg['match']}{player}: {leg['bet_type']}{odds}")
+    return "\n".join(lines)
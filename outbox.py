@@ -0,0 +1,164 @@
+"""
+Modulo Outbox - invio dei messaggi Telegram con limiti di frequenza
+Tutti i messaggi passano da qui: un intervallo minimo per chat e uno globale
+(limiti di Telegram), attesa automatica sui RetryAfter (per la chat e per
+tutto il bot) e fusione delle
+modifiche di stato: se per lo stesso messaggio c'è già una modifica in coda,
+viene inviato solo il testo più recente.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from metrics import metrics
+
+# Telegram: circa 1 messaggio/s per chat e 30/s in totale
+CHAT_INTERVAL = 1.0
+GLOBAL_INTERVAL = 1 / 30
+# Tentativi dopo un RetryAfter prima di rinunciare
+MAX_RETRIES = 3
+# Chat con uno slot in memoria oltre cui si eliminano quelli già passati
+CHAT_STATE_MAX = 1024
+
+
+def flood_wait(error: Exception) -> Optional[float]:
+    """Secondi da attendere se l'errore è un RetryAfter di Telegram (None altrimenti)"""
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is None:
+        return None
+    # python-telegram-bot >= 21 usa timedelta
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+def not_modified(error: Exception) -> bool:
+    """Modifica con lo stesso testo già presente: non è un errore"""
+    return 'message is not modified' in str(error).lower()
+
+
+class Outbox:
+    """
+    Coda di uscita condivisa da tutti gli handler.
+    `reply`/`send` e le modifiche finali vanno attese; le modifiche di stato
+    (`edit(..., status=True)`) no: partono in background e si fondono.
+    """
+
+    def __init__(self, chat_interval: float = CHAT_INTERVAL, global_interval: float = GLOBAL_INTERVAL):
+        self.chat_interval = chat_interval
+        self.global_interval = global_interval
+        self._chat_next: Dict[int, float] = {}
+        self._global_next = 0.0
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._chat_users: Dict[int, int] = {}  # invii in corso o in attesa per chat (il lock vive finché > 0)
+        self._prune_at = CHAT_STATE_MAX
+        self._latest_edit: Dict[tuple, tuple] = {}
+        self._edit_tasks: Dict[tuple, asyncio.Task] = {}
+
+    def _prune_slots(self, now: float):
+        """Dimentica le chat il cui prossimo slot è già passato (valgono come nuove)"""
+        self._chat_next = {chat_id: t for chat_id, t in self._chat_next.items() if t > now}
+        self._prune_at = max(CHAT_STATE_MAX, 2 * len(self._chat_next))
+
+    async def _wait_slot(self, chat_id: int):
+        """Aspetta il primo istante libero per la chat e per il bot"""
+        now = time.monotonic()
+        if len(self._chat_next) >= self._prune_at:
+            self._prune_slots(now)
+        slot = max(now, self._chat_next.get(chat_id, 0.0), self._global_next)
+        self._chat_next[chat_id] = slot + self.chat_interval
+        self._global_next = slot + self.global_interval
+        if slot > now:
+            metrics.observe('telegram.queue_wait_s', slot - now)
+            await asyncio.sleep(slot - now)
+
+    async def _deliver(self, chat_id: int, call):
+        """Esegue la chiamata nei limiti, in ordine per chat; ripete dopo un RetryAfter"""
+        lock = self._chat_locks.setdefault(chat_id, asyncio.Lock())
+        self._chat_users[chat_id] = self._chat_users.get(chat_id, 0) + 1
+        try:
+            async with lock:
+                for attempt in range(MAX_RETRIES + 1):
+                    await self._wait_slot(chat_id)
+                    try:
+                        result = await call()
+                        metrics.incr('telegram.sent')
+                        return result
+                    except Exception as e:
+                        wait = flood_wait(e)
+                        if wait is None:
+                            raise
+                        metrics.incr('telegram.retry_after')
+                        # Il flood control vale per tutto il bot: si ferma anche lo slot globale,
+                        # pure se per questo messaggio si rinuncia
+                        resume = time.monotonic() + wait
+                        self._chat_next[chat_id] = resume
+                        self._global_next = max(self._global_next, resume)
+                        if attempt == MAX_RETRIES:
+                            raise
+        finally:
+            self._chat_users[chat_id] -= 1
+            if self._chat_users[chat_id] == 0:
+                # Nessun altro invio per la chat: il lock non serve più
+                del self._chat_users[chat_id]
+                del self._chat_locks[chat_id]
+
+    async def reply(self, message, text: str, **kwargs):
+        """Risposta a un messaggio (ritorna il messaggio inviato)"""
+        return await self._deliver(message.chat_id, lambda: message.reply_text(text, **kwargs))
+
+    async def send(self, bot, chat_id: int, text: str, **kwargs):
+        """Nuovo messaggio nella chat"""
+        return await self._deliver(chat_id, lambda: bot.send_message(chat_id, text, **kwargs))
+
+    async def send_document(self, bot, chat_id: int, data: bytes, filename: str, **kwargs):
+        """File allegato (report, backup...)"""
+        return await self._deliver(
+            chat_id, lambda: bot.send_document(chat_id, document=data, filename=filename, **kwargs)
+        )
+
+    def edit(self, message, text: str, status: bool = False, **kwargs) -> asyncio.Task:
+        """
+        Modifica un messaggio inviato. Se una modifica dello stesso messaggio
+        è in coda, il testo viene sostituito e ne parte una sola.
+        Le modifiche di stato (status=True) non sollevano errori.
+        """
+        key = (message.chat_id, message.message_id)
+        if key in self._latest_edit:
+            metrics.incr('telegram.edits_coalesced')
+        self._latest_edit[key] = (text, kwargs, status)
+
+        task = self._edit_tasks.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._flush_edits(message, key))
+            self._edit_tasks[key] = task
+        return task
+
+    async def _flush_edits(self, message, key: tuple):
+        """Invia l'ultimo testo in coda finché ne arrivano di nuovi"""
+        current = None
+
+        def latest_edit():
+            # Il testo si sceglie quando c'è lo slot libero, non quando si entra in coda
+            nonlocal current
+            if key in self._latest_edit:
+                current = self._latest_edit.pop(key)
+            text, kwargs, _ = current
+            return message.edit_text(text, **kwargs)
+
+        try:
+            while key in self._latest_edit:
+                try:
+                    await self._deliver(message.chat_id, latest_edit)
+                except Exception as e:
+                    if not_modified(e):
+                        continue
+                    if current[2]:
+                        print(f"Modifica di stato non inviata: {e}")
+                        continue
+                    raise
+        finally:
+            self._edit_tasks.pop(key, None)
+
+
+# Coda unica del processo
+outbox = Outbox()
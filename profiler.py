@@ -0,0 +1,212 @@
+"""
+Modulo Profiler - profilazione a campionamento attivabile a caldo
+Un thread campiona gli stack di tutti i thread (anche i worker di
+asyncio.to_thread, dove girano Gemini e le API) e li salva in formato
+"collapsed" (flamegraph.pl, speedscope). tracemalloc riporta le allocazioni
+del periodo profilato. Da spento il costo è un solo controllo per richiesta.
+
+Una sessione per richiesta tiene solo i campioni della richiesta: il thread
+del loop mentre esegue il suo task e i worker avviati con profiler.to_thread.
+Le finestre di tempo campionano tutto il processo.
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+# Intervallo di campionamento degli stack
+SAMPLE_INTERVAL = 0.005
+# Righe del report memoria
+MEMORY_TOP = 25
+# Limiti di /profile: richieste profilate in coda e durata di una finestra
+MAX_PROFILE_REQUESTS = 20
+MAX_WINDOW_SECONDS = 300
+
+# Sessione della richiesta in corso (per task asyncio, passa ai worker di to_thread)
+_current_session: contextvars.ContextVar = contextvars.ContextVar('profile_session', default=None)
+
+
+class StackSampler(threading.Thread):
+    """Campiona periodicamente gli stack degli altri thread (quelli accettati da `accept`)"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, accept: Optional[Callable[[int], bool]] = None):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.accept = accept
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.accept is not None and not self.accept(thread_id)):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        """Stack nel formato "a;b;c conteggio", uno per riga"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    """
+    Una profilazione in corso (campionatore + tracemalloc).
+    Con `request=True` va creata nel task della richiesta: campiona il thread del
+    loop solo mentre esegue quel task, più i worker registrati con `run_tracked`.
+    """
+
+    def __init__(self, label: str, request: bool = False):
+        self.label = label
+        self.started = time.perf_counter()
+        self._threads = set()  # worker che stanno eseguendo codice della richiesta
+        self._loop = self._task = self._loop_thread = None
+        self.context_token = None  # valore precedente di _current_session (richieste)
+        if request:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            self._loop_thread = threading.get_ident()
+        self._own_tracemalloc = not tracemalloc.is_tracing()
+        if self._own_tracemalloc:
+            tracemalloc.start()
+        self.sampler = StackSampler(accept=self.accept if request else None)
+        self.sampler.start()
+
+    def accept(self, thread_id: int) -> bool:
+        """Il campione del thread appartiene alla richiesta?"""
+        if thread_id in self._threads:
+            return True
+        return thread_id == self._loop_thread and asyncio.current_task(self._loop) is self._task
+
+    def run_tracked(self, func: Callable, *args, **kwargs):
+        """Esegue `func` nel thread corrente contando i suoi campioni nella sessione"""
+        thread_id = threading.get_ident()
+        self._threads.add(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._threads.discard(thread_id)
+
+    def finish(self) -> Dict:
+        """Ferma tutto e ritorna i report: {'label', 'seconds', 'samples', 'collapsed', 'memory'}"""
+        self.sampler.stop()
+        elapsed = time.perf_counter() - self.started
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+
+        lines = [f"{self.label}: {elapsed:.2f}s",
+                 f"Memoria allocata ancora in uso: {current / 1024:.0f} KB, picco: {peak / 1024:.0f} KB",
+                 "", f"Top {MEMORY_TOP} allocazioni (file:riga):"]
+        for stat in snapshot.statistics('lineno')[:MEMORY_TOP]:
+            lines.append(str(stat))
+
+        return {
+            'label': self.label,
+            'seconds': elapsed,
+            'samples': self.sampler.samples,
+            'collapsed': self.sampler.collapsed(),
+            'memory': "\n".join(lines)
+        }
+
+
+class Profiler:
+    """
+    Interruttore del profiler: prossime N richieste (`arm`) oppure una
+    finestra di tempo (`start_window`). Una sessione alla volta.
+    """
+
+    def __init__(self):
+        self.remaining = 0
+        self.active: Optional[ProfileSession] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.remaining > 0 or self.active is not None
+
+    def arm(self, requests: int):
+        """Profila le prossime `requests` richieste (0 = spegni, al massimo MAX_PROFILE_REQUESTS)"""
+        self.remaining = min(max(0, requests), MAX_PROFILE_REQUESTS)
+
+    def begin(self, label: str) -> Optional[ProfileSession]:
+        """
+        Sessione per la richiesta del task corrente, se il profiler è armato e libero.
+        Da qui in poi profiler.to_thread nel task conta anche i worker.
+        """
+        if self.remaining <= 0:
+            return None
+        with self._lock:
+            if self.remaining <= 0 or self.active is not None:
+                return None
+            self.remaining -= 1
+            session = self.active = ProfileSession(label, request=True)
+        session.context_token = _current_session.set(session)
+        return session
+
+    def detach(self, session: ProfileSession):
+        """
+        Scollega la sessione dal task della richiesta (da chiamare nello stesso task):
+        gli handler successivi nello stesso task non la vedono più.
+        """
+        if session.context_token is not None:
+            _current_session.reset(session.context_token)
+            session.context_token = None
+
+    async def to_thread(self, func: Callable, *args, **kwargs):
+        """asyncio.to_thread che, dentro una richiesta profilata, campiona anche il worker"""
+        session = _current_session.get()
+        if session is None:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return await asyncio.to_thread(session.run_tracked, func, *args, **kwargs)
+
+    def start_window(self, seconds: float) -> Optional[ProfileSession]:
+        """
+        Profila tutto il processo da adesso (da chiudere con `end` dopo `seconds`).
+        ValueError se la durata non è tra 1 e MAX_WINDOW_SECONDS.
+        """
+        if not 1 <= seconds <= MAX_WINDOW_SECONDS:
+            raise ValueError(f"Durata della finestra tra 1 e {MAX_WINDOW_SECONDS} secondi")
+        with self._lock:
+            if self.active is not None:
+                return None
+            self.active = ProfileSession(f"Finestra di {seconds:g}s")
+            return self.active
+
+    def stop(self) -> Optional[ProfileSession]:
+        """Spegne il profiler; ritorna la sessione attiva da chiudere con `end` (se c'è)"""
+        self.remaining = 0
+        return self.active
+
+    def end(self, session: ProfileSession) -> Optional[Dict]:
+        """Chiude la sessione e ritorna i report (None se era già stata chiusa)"""
+        with self._lock:
+            if self.active is not session:
+                return None
+            self.active = None
+        return session.finish()
+
+
+# Profiler unico del processo
+profiler = Profiler()
@@ -0,0 +1,115 @@
+"""
+Modulo Ricontrolli - cache dei risultati negativi
+Quando una partita non è trovata o non è ancora finita, il risultato viene
+ricordato insieme al momento del prossimo controllo: mai prima del fischio
+finale previsto (calcolato dall'orario nella schedina), poi con backoff
+esponenziale.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+# Fuso orario degli orari scritti sulle schedine (indipendente da quello del server)
+SLIP_TIMEZONE = ZoneInfo(os.getenv("SLIP_TIMEZONE", "Europe/Rome") or "Europe/Rome")
+
+# Durata tipica di una partita (inizio -> risultato definitivo), in minuti
+GAME_DURATION_MINUTES = {
+    'calcio': 115,   # 90' + intervallo + recupero
+    'nba': 150,
+    'tennis': 180,
+}
+DEFAULT_DURATION_MINUTES = 150
+
+# Backoff dopo la fine prevista: 5 min, 10, 20, ... fino a 6 ore
+BACKOFF_BASE_SECONDS = 300
+BACKOFF_MAX_SECONDS = 6 * 3600
+# Voci tenute in memoria: oltre si scartano le meno usate (schedine che non si
+# risolveranno mai, es. squadre scritte male o campionati non coperti)
+MAX_ENTRIES = 5000
+
+
+def parse_kickoff(date_string: str, tz: Optional[ZoneInfo] = None) -> Optional[float]:
+    """
+    Timestamp di inizio da "05/02/2026 20:45" nell'ora locale della schedina
+    (SLIP_TIMEZONE se `tz` non è indicato). None se manca o non è leggibile.
+    """
+    if not date_string:
+        return None
+    for fmt in ('%d/%m/%Y %H:%M', '%d/%m/%Y'):
+        try:
+            kickoff = datetime.strptime(date_string.strip(), fmt)
+        except ValueError:
+            continue
+        return kickoff.replace(tzinfo=tz or SLIP_TIMEZONE).timestamp()
+    return None
+
+
+def expected_end(sport_key: str, date_string: str) -> Optional[float]:
+    """Quando ci si aspetta il risultato finale"""
+    kickoff = parse_kickoff(date_string)
+    if kickoff is None:
+        return None
+    minutes = GAME_DURATION_MINUTES.get(sport_key, DEFAULT_DURATION_MINUTES)
+    return kickoff + minutes * 60
+
+
+class RecheckCache:
+    """
+    Risultati "non trovata / non conclusa" con il loro prossimo ricontrollo.
+    Thread-safe (le multiple verificano più selezioni in parallelo).
+    Al massimo MAX_ENTRIES voci, scartate in ordine LRU.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, now: Optional[float] = None) -> Optional[Dict]:
+        """Risultato in cache se non è ancora ora di ricontrollare"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            if now < entry['next_check']:
+                return entry['result']
+        return None
+
+    def store(self, key: tuple, result: Dict, sport_key: str, date_string: str,
+              now: Optional[float] = None) -> Dict:
+        """Ricorda un risultato negativo; ritorna il risultato con `next_check` e nota per l'utente"""
+        now = time.time() if now is None else now
+        end = expected_end(sport_key, date_string)
+
+        with self._lock:
+            attempts = self._entries.get(key, {}).get('attempts', 0)
+            if end is not None and now < end:
+                # Partita non ancora finita: nessun controllo prima del fischio finale
+                next_check = end
+            else:
+                next_check = now + min(BACKOFF_BASE_SECONDS * 2 ** attempts, BACKOFF_MAX_SECONDS)
+                attempts += 1
+
+            note = f"Prossima verifica dopo le {datetime.fromtimestamp(next_check, SLIP_TIMEZONE).strftime('%d/%m %H:%M')}"
+            details = result.get('details')
+            result = {
+                **result,
+                'next_check': next_check,
+                'details': f"{details}\n{note}" if details else note
+            }
+            self._entries[key] = {'result': result, 'next_check': next_check, 'attempts': attempts}
+            self._entries.move_to_end(key)
+            while len(self._entries) > MAX_ENTRIES:
+                self._entries.popitem(last=False)
+        return result
+
+    def discard(self, key: tuple):
+        """Dimentica la voce (es. risultato trovato)"""
+        with self._lock:
+            self._entries.pop(key, None)
@@ -0,0 +1,346 @@
+"""
+Modulo Cache Condivisa - backend chiave/valore per risultati API, OCR e quote
+Più istanze del bot (es. dietro un webhook) condividono la stessa cache e non
+moltiplicano le richieste ai provider. Il backend si sceglie con CACHE_URL:
+- vuoto / memory://            LRU nel processo (default, nessuna condivisione)
+- sqlite:///cache.db           file SQLite (istanze sulla stessa macchina)
+- redis://[:password@]host:6379/0   server Redis (protocollo RESP, nessuna dipendenza)
+I valori sono JSON: tutti i backend restituiscono gli stessi tipi (tuple -> liste,
+chiavi dei dict -> stringhe). Un backend irraggiungibile vale come cache vuota.
+
+Passano da qui solo le letture puntuali (risultati NBA/calcio, riferimenti
+giocatore, feed live, OCR) e quota/contatori dei provider. Restano invece per
+processo, e ogni replica li ricostruisce per conto suo:
+- RecheckCache (recheck_cache.py): stato dei ricontrolli delle scommesse aperte
+- TennisResultsIndex (tennis_results.py): giorni di risultati tennis in memoria
+- FootballResultsWarehouse (football_results.py): archivio dei giorni di calcio su disco
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from metrics import metrics
+
+CACHE_URL = os.getenv("CACHE_URL", "")
+# Prefisso delle chiavi (più bot sullo stesso Redis)
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "betbot:")
+# Voci massime della cache in memoria
+MEMORY_MAX_ENTRIES = 4096
+# Timeout di connessione/lettura verso Redis
+REDIS_TIMEOUT = 2.0
+# Ogni quante scritture SQLite elimina le voci scadute
+SQLITE_PURGE_EVERY = 500
+# Errori del backend stampati al massimo una volta ogni tanti secondi
+ERROR_LOG_INTERVAL = 60.0
+
+
+class CacheError(Exception):
+    """Errore del backend (connessione, risposta non valida)"""
+    pass
+
+
+class CacheBackend:
+    """
+    Interfaccia comune: get / set / delete / incr con TTL in secondi (None = senza scadenza).
+    Le sottoclassi implementano le operazioni su stringhe (_get, _set, _delete, _incr).
+    """
+
+    name = ''
+
+    def __init__(self, prefix: str = CACHE_PREFIX):
+        self.prefix = prefix
+        self._last_error_log = 0.0
+
+    def _safe(self, operation, *args):
+        try:
+            return operation(*args)
+        except (OSError, CacheError, sqlite3.Error) as e:
+            metrics.incr('cache.errors')
+            now = time.monotonic()
+            if now - self._last_error_log >= ERROR_LOG_INTERVAL:
+                self._last_error_log = now
+                print(f"Errore cache {self.name}: {e}")
+            return None
+
+    def get(self, key: str) -> Any:
+        """Valore in cache (None se assente, scaduto o backend non raggiungibile)"""
+        raw = self._safe(self._get, self.prefix + key)
+        if raw is None:
+            metrics.incr('cache.misses')
+            return None
+        metrics.incr('cache.hits')
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._safe(self._set, self.prefix + key, json.dumps(value, ensure_ascii=False), ttl)
+
+    def delete(self, key: str):
+        self._safe(self._delete, self.prefix + key)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> Optional[int]:
+        """Contatore atomico; il TTL vale dalla creazione. None se il backend non risponde"""
+        return self._safe(self._incr, self.prefix + key, amount, ttl)
+
+    def _get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def _set(self, key: str, raw: str, ttl: Optional[float]):
+        raise NotImplementedError
+
+    def _delete(self, key: str):
+        raise NotImplementedError
+
+    def _incr(self, key: str, amount: int, ttl: Optional[float]) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """LRU nel processo, thread-safe"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = MEMORY_MAX_ENTRIES, prefix: str = CACHE_PREFIX):
+        super().__init__(prefix)
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # chiave -> (valore, scadenza)
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and time.time() >= entry[1]:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, raw: str, expires: Optional[float]):
+        self._entries[key] = (raw, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def _set(self, key: str, raw: str, ttl: Optional[float]):
+        with self._lock:
+            self._store(key, raw, time.time() + ttl if ttl else None)
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _incr(self, key: str, amount: int, ttl: Optional[float]) -> int:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                value, expires = amount, time.time() + ttl if ttl else None
+            else:
+                value, expires = int(entry[0]) + amount, entry[1]
+            self._store(key, str(value), expires)
+            return value
+
+
+class SQLiteCache(CacheBackend):
+    """Tabella chiave/valore in un file SQLite (WAL: più processi sulla stessa macchina)"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, prefix: str = CACHE_PREFIX):
+        super().__init__(prefix)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and time.time() >= row[1]):
+            return None
+        return row[0]
+
+    def _write(self, sql: str, params: tuple):
+        self._conn.execute(sql, params)
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            self._conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+
+    def _set(self, key: str, raw: str, ttl: Optional[float]):
+        with self._lock:
+            self._write("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                        (key, raw, time.time() + ttl if ttl else None))
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _incr(self, key: str, amount: int, ttl: Optional[float]) -> int:
+        with self._lock:
+            # BEGIN IMMEDIATE: lettura e scrittura atomiche anche tra processi
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None or (row[1] is not None and now >= row[1]):
+                    value, expires = amount, now + ttl if ttl else None
+                else:
+                    value, expires = int(row[0]) + amount, row[1]
+                self._write("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                            (key, str(value), expires))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return value
+
+
+class RedisCache(CacheBackend):
+    """Client Redis minimo (protocollo RESP su socket, una connessione riaperta se cade)"""
+
+    name = 'redis'
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = REDIS_TIMEOUT, prefix: str = CACHE_PREFIX):
+        super().__init__(prefix)
+        self.host, self.port, self.db, self.password, self.timeout = host, port, db, password, timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def encode(args) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connessione Redis chiusa")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise CacheError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            size = int(rest)
+            if size < 0:
+                return None
+            data = self._reader.read(size + 2)
+            if len(data) != size + 2:
+                raise ConnectionError("connessione Redis chiusa")
+            return data[:-2].decode('utf-8')
+        if kind == b'*':
+            size = int(rest)
+            return None if size < 0 else [self._read_reply() for _ in range(size)]
+        raise CacheError(f"risposta Redis non valida: {line!r}")
+
+    def _call(self, *args):
+        self._sock.sendall(self.encode(args))
+        return self._read_reply()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    def command(self, *args):
+        """Esegue un comando Redis (riconnette alla prossima chiamata se la connessione cade)"""
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._call(*args)
+            except OSError:
+                self._close()
+                raise
+
+    def _get(self, key: str) -> Optional[str]:
+        return self.command('GET', key)
+
+    def _set(self, key: str, raw: str, ttl: Optional[float]):
+        if ttl:
+            self.command('SET', key, raw, 'PX', max(1, int(ttl * 1000)))
+        else:
+            self.command('SET', key, raw)
+
+    def _delete(self, key: str):
+        self.command('DEL', key)
+
+    def _incr(self, key: str, amount: int, ttl: Optional[float]) -> int:
+        value = self.command('INCRBY', key, amount)
+        if ttl and value == amount:
+            # Contatore appena creato: parte la scadenza
+            self.command('PEXPIRE', key, max(1, int(ttl * 1000)))
+        return value
+
+
+def open_cache(url: str) -> CacheBackend:
+    """Backend indicato da CACHE_URL (ValueError se lo schema non è supportato)"""
+    if not url or url.startswith('memory'):
+        return MemoryCache()
+    if url.startswith('sqlite://'):
+        # sqlite:///cache.db (relativo), sqlite:////var/lib/bot/cache.db (assoluto)
+        return SQLiteCache(url[len('sqlite://'):][1:] or 'cache.db')
+    if url.startswith('redis://'):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return RedisCache(parsed.hostname or 'localhost', parsed.port or 6379, db, parsed.password)
+    raise ValueError(f"CACHE_URL non supportato: {url}")
+
+
+class LazyCache:
+    """
+    Backend di CACHE_URL aperto al primo uso: importare i moduli che usano
+    `cache` non crea file SQLite né connessioni Redis.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._backend: Optional[CacheBackend] = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = open_cache(self.url)
+        return self._backend
+
+    def __getattr__(self, name: str):
+        return getattr(self.backend, name)
+
+
+# Cache unica del processo
+cache = LazyCache(CACHE_URL)
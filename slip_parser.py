@@ -0,0 +1,187 @@
+"""
+Modulo Schedine Testuali - parser locale per le schedine copiate come testo
+Riconosce i formati più comuni dei bookmaker (etichette "Evento/Esito/Quota/
+Importo", righe "Esito @ 1.80", multiple a blocchi) e produce lo stesso
+bet_info dell'estrazione da screenshot. Se qualcosa non torna ritorna None
+e il bot ripiega su Gemini in modalità testo.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from bet_records import normalize_bet_info
+
+# Prima le migliaia complete ("1.000", "1.250,00"), poi la forma decimale semplice
+_NUMBER = r'(\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{1,2})?(?!\d)|\d+(?:[.,]\d+)?)'
+# Scarto massimo tra importo × quota e vincita (arrotondamenti della quota)
+PAYOUT_TOLERANCE = 0.02
+
+MATCH_RE = re.compile(r'^(?:evento|partita|match|incontro)?\s*:?\s*'
+                      r'(?P<home>[^\d@:|]{2,}?)\s+(?:vs\.?|v|-|–)\s+(?P<away>[^\d@:|]{2,}?)\s*$', re.IGNORECASE)
+SELECTION_RE = re.compile(r'^(?P<bet>[^@]+?)\s*@\s*(?P<odds>\d+[.,]\d+)\s*$')
+LABEL_RE = re.compile(r'^(?P<label>[a-zà ]+?)\s*:\s*(?P<value>.+)$', re.IGNORECASE)
+DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})(?:\D+(\d{1,2}[:.]\d{2}))?')
+
+# Etichette -> campo (selezione) o campo della schedina
+LEG_LABELS = {
+    'esito': 'bet_type', 'scommessa': 'bet_type', 'selezione': 'bet_type', 'pronostico': 'bet_type',
+    'mercato': 'bet_type', 'tipo': 'bet_type', 'tipo scommessa': 'bet_type',
+    'quota': 'quota', 'odds': 'quota',
+    'giocatore': 'player', 'player': 'player',
+    'sport': 'sport',
+}
+SLIP_LABELS = {
+    'importo': 'importo', 'puntata': 'importo', 'stake': 'importo', 'giocata': 'importo', 'importo giocato': 'importo',
+    'vincita': 'vincita_potenziale', 'vincita potenziale': 'vincita_potenziale', 'vincita max': 'vincita_potenziale',
+    'potential win': 'vincita_potenziale', 'payout': 'vincita_potenziale',
+    'quota totale': 'quota', 'quota complessiva': 'quota', 'total odds': 'quota',
+}
+# Importi anche senza i due punti ("Puntata 10,00 €")
+SLIP_LABEL_RE = re.compile(r'^(?P<label>' + '|'.join(sorted(SLIP_LABELS, key=len, reverse=True)) +
+                           r')\b\s*:?\s*(?P<value>\D{0,3}\d.*)$', re.IGNORECASE)
+ODDS_LINE_RE = re.compile(r'^@?\s*(\d+[.,]\d+)$')
+
+# Parole chiave -> sport (campionato o mercato tipico)
+SPORT_KEYWORDS = (
+    ('NBA', r'\bnba\b|tiri da (?:3|tre)|rimbalzi|rebounds|\bassist'),
+    ('Calcio', r'\bcalcio\b|serie [ab]\b|premier league|la ?liga|bundesliga|ligue 1|champions league|'
+               r'europa league|\bgol\b|\bgoal\b|\b1x2\b|\bgg\b|\bng\b|doppia chance'),
+    ('Tennis', r'\btennis\b|\batp\b|\bwta\b|wimbledon|roland garros|\bus open\b|australian open|\bset\b|\bgame\b'),
+)
+
+
+def detect_sport(text: str) -> Optional[str]:
+    """Sport dedotto da campionato o mercato (None se ambiguo o assente)"""
+    found = [sport for sport, pattern in SPORT_KEYWORDS if re.search(pattern, text, re.IGNORECASE)]
+    return found[0] if len(found) == 1 else None
+
+
+def looks_like_slip(text: str) -> bool:
+    """Il messaggio sembra una schedina (una partita e almeno un numero decimale)"""
+    has_match = any(MATCH_RE.match(DATE_RE.sub('', line).strip(' -|,')) for line in text.splitlines())
+    return has_match and re.search(r'\d+[.,]\d+', text) is not None
+
+
+def parse_date(text: str) -> Optional[str]:
+    """Data nel formato della schedina: DD/MM/YYYY HH:MM"""
+    m = DATE_RE.search(text)
+    if not m:
+        return None
+    date = f"{int(m.group(1)):02d}/{int(m.group(2)):02d}/{m.group(3)}"
+    return f"{date} {m.group(4).replace('.', ':')}" if m.group(4) else date
+
+
+def _amount(value: str) -> Optional[str]:
+    m = re.search(_NUMBER, value)
+    return m.group(1) if m else None
+
+
+def payout_matches(bet_info: Dict) -> bool:
+    """La vincita letta è coerente con importo × quota"""
+    expected = bet_info['importo'] * bet_info['quota']
+    return abs(bet_info['vincita_potenziale'] - expected) <= max(0.05, expected * PAYOUT_TOLERANCE)
+
+
+def parse_slip_text(text: str) -> Optional[Dict]:
+    """
+    Schedina testuale -> bet_info normalizzato.
+    None se manca qualcosa (partita, esito, sport, quota o importo)
+    o se la vincita non torna con importo × quota.
+    """
+    slip: Dict = {}
+    legs: List[Dict] = []
+    leg_lines: List[List[str]] = []
+    pending: Dict = {}
+    pending_lines: List[str] = []
+
+    def assign(field: str, value, line: str):
+        # Campo già presente nella selezione corrente: appartiene alla prossima
+        if not legs or field in legs[-1]:
+            pending.setdefault(field, value)
+            pending_lines.append(line)
+        else:
+            legs[-1][field] = value
+            leg_lines[-1].append(line)
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        slip_label = SLIP_LABEL_RE.match(line)
+        if slip_label:
+            slip[SLIP_LABELS[slip_label.group('label').lower()]] = _amount(slip_label.group('value'))
+            continue
+        label = LABEL_RE.match(line)
+        key = label.group('label').strip().lower() if label else None
+        if key in LEG_LABELS and LEG_LABELS[key] != 'bet_type':
+            field = LEG_LABELS[key]
+            value = _amount(label.group('value')) if field == 'quota' else label.group('value').strip()
+            assign(field, value, line)
+            continue
+
+        # Partita (eventuale data/ora sulla stessa riga)
+        match = MATCH_RE.match(DATE_RE.sub('', line).strip(' -|,'))
+        if match:
+            legs.append({'match': f"{match.group('home').strip()} vs {match.group('away').strip()}", **pending})
+            leg_lines.append([line, *pending_lines])
+            pending, pending_lines = {}, []
+            date = parse_date(line)
+            if date:
+                legs[-1].setdefault('date', date)
+            continue
+
+        if key in LEG_LABELS:
+            value = label.group('value').strip()
+            selection = SELECTION_RE.match(value)
+            if selection:
+                assign('bet_type', selection.group('bet'), line)
+                assign('quota', selection.group('odds'), line)
+            else:
+                assign('bet_type', value, line)
+            continue
+
+        selection = SELECTION_RE.match(line)
+        if selection:
+            assign('bet_type', selection.group('bet'), line)
+            assign('quota', selection.group('odds'), line)
+            continue
+
+        odds = ODDS_LINE_RE.match(line)
+        if odds:
+            assign('quota', odds.group(1), line)
+            continue
+
+        date = parse_date(line)
+        if date:
+            assign('date', date, line)
+            continue
+
+        # Riga senza etichetta: potrebbe indicare campionato/sport
+        if legs:
+            leg_lines[-1].append(line)
+        else:
+            pending_lines.append(line)
+
+    if not legs or pending.get('bet_type'):
+        return None
+
+    default_sport = detect_sport(text)
+    for leg, lines in zip(legs, leg_lines):
+        if not leg.get('sport'):
+            leg['sport'] = detect_sport("\n".join(lines)) or default_sport
+        if not leg.get('bet_type') or not leg.get('sport'):
+            return None
+
+    if len(legs) == 1:
+        # Singola: la quota può stare solo nella selezione
+        slip.setdefault('quota', legs[0].get('quota'))
+
+    try:
+        bet_info = normalize_bet_info({**slip, 'legs': legs})
+    except ValueError:
+        return None
+    # Numeri letti male: meglio ripiegare su Gemini che salvare un P/L sbagliato
+    if slip.get('vincita_potenziale') and not payout_matches(bet_info):
+        return None
+    return bet_info
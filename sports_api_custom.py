@@ -1,28 +1,56 @@
 """
-Modulo API Sportive - BallDontLie (NBA) + LiveScore (Calcio)
-Ottimizzato per le API che hai già
+Modulo API Sportive - BallDontLie / API-Basketball (NBA) + LiveScore / API-Football (Calcio)
+Le richieste passano dal router dei provider (vedi sports_providers), che
+sceglie il provider più affidabile e fa failover se uno non risponde.
 """
 
-import os
-import requests
+import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from football_results import FootballResultsWarehouse
+from recheck_cache import RecheckCache
+from shared_cache import cache
+from tennis_results import TennisResultsIndex, evaluate_tennis_bet
+from sports_providers import HttpClient, ProviderError, SportsProvider, build_router, normalize_name, teams_match
+
+# Tempo massimo complessivo per verificare una scommessa NBA
+NBA_BET_DEADLINE = 12.0
+# Validità delle partite NBA in cache se il giorno ha ancora partite aperte
+NBA_GAMES_TTL = 300
+# Dati che non cambiano più (giorni conclusi, statistiche di partite finite)
+FINAL_TTL = 7 * 86400
+# ID dei giocatori presso il provider
+PLAYER_REF_TTL = 30 * 86400
+# Feed live del calcio: condiviso da tutte le scommesse (e repliche) per questo tempo
+FOOTBALL_LIVE_TTL = 60
+
+
+def without_raw(matches: List[Dict]) -> List[Dict]:
+    """Partite senza il payload originale del provider (non serve e occupa la cache)"""
+    return [{k: v for k, v in match.items() if k != 'raw'} for match in matches]
+
 
 class SportsAPIManager:
     """
-    Gestore per BallDontLie (NBA) e LiveScore (Calcio)
+    Gestore risultati NBA e Calcio (provider scelti dal router)
     """
     
     def __init__(self):
-        # API Keys dalle variabili d'ambiente
-        self.balldontlie_key = os.getenv("BALLDONTLIE_API_KEY", "")
-        self.livescore_key = os.getenv("LIVESCORE_API_KEY", "")
-        
-        # Base URLs
-        self.nba_url = "https://api.balldontlie.io/v1"
-        self.livescore_url = "https://livescore-api.com/api-client"
-        
+        # Connessioni HTTP condivise + router con health check dei provider
+        self.http = HttpClient()
+        self.router = build_router(self.http)
+        # Lookup in parallelo (pool separato da quello HTTP per evitare deadlock)
+        self._lookup_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lookup")
+        # Partite non trovate / non concluse: quando ricontrollarle
+        self.recheck_cache = RecheckCache()
+        # Risultati tennis scaricati per giorno/torneo
+        self.tennis_index = TennisResultsIndex(self.router)
+        # Risultati calcio dei giorni passati, salvati su disco
+        self.football_results = FootballResultsWarehouse(self.router)
+    
     def parse_date(self, date_string: str) -> str:
         """Converte data in formato YYYY-MM-DD"""
         try:
@@ -41,11 +69,7 @@ class SportsAPIManager:
     
     def normalize_name(self, name: str) -> str:
         """Normalizza nomi per matching"""
-        name = name.strip().lower()
-        name = re.sub(r'\s+', ' ', name)
-        # Rimuovi caratteri speciali
-        name = re.sub(r'[^\w\s]', '', name)
-        return name
+        return normalize_name(name)
     
     def extract_teams(self, match: str) -> Tuple[str, str]:
         """Estrae le due squadre dalla stringa match"""
@@ -60,125 +84,212 @@ class SportsAPIManager:
             return self.normalize_name(parts[0]), self.normalize_name(parts[1])
         return "", ""
     
-    # ==================== NBA - BALLDONTLIE ====================
+    # ==================== NBA ====================
     
-    def get_nba_player_id(self, player_name: str) -> Optional[int]:
-        """Trova ID giocatore NBA da nome"""
-        try:
-            url = f"{self.nba_url}/players"
-            
-            headers = {
-                "Authorization": self.balldontlie_key
-            }
-            
-            # Cerca per nome
-            params = {
-                "search": player_name.split()[0]  # Primo nome o cognome
-            }
-            
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-            
-            if response.status_code != 200:
-                print(f"BallDontLie error: {response.status_code}")
-                return None
-            
-            data = response.json()
-            players = data.get('data', [])
-            
-            # Cerca match esatto o parziale
-            player_lower = self.normalize_name(player_name)
-            
-            for player in players:
-                first = player.get('first_name', '').lower()
-                last = player.get('last_name', '').lower()
-                full = f"{first} {last}"
-                
-                # Match trovato
-                if player_lower in full or full in player_lower or \
-                   last in player_lower or player_lower in last:
-                    return player.get('id')
-            
-            return None
-            
-        except Exception as e:
-            print(f"Errore get_nba_player_id: {e}")
-            return None
+    def nba_games(self, provider: SportsProvider, game_date: str, deadline: Optional[float] = None) -> List[Dict]:
+        """
+        Partite NBA del giorno, nella cache condivisa: FINAL_TTL se sono tutte
+        finite, altrimenti NBA_GAMES_TTL secondi.
+        """
+        key = f"nba_games:{provider.name}:{game_date}"
+        games = cache.get(key)
+        if games is not None:
+            return games
+        
+        games = without_raw(provider.nba_games(game_date, deadline))
+        cache.set(key, games, FINAL_TTL if games and all(g['finished'] for g in games) else NBA_GAMES_TTL)
+        return games
     
-    def get_nba_game_id(self, team1: str, team2: str, date: str) -> Optional[int]:
-        """Trova ID partita NBA"""
-        try:
-            game_date = self.parse_date(date)
-            
-            url = f"{self.nba_url}/games"
-            
-            headers = {
-                "Authorization": self.balldontlie_key
-            }
-            
-            params = {
-                "dates[]": game_date
-            }
-            
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-            
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            games = data.get('data', [])
-            
-            # Normalizza team names
-            team1_norm = self.normalize_name(team1)
-            team2_norm = self.normalize_name(team2)
-            
-            for game in games:
-                home = self.normalize_name(game['home_team']['full_name'])
-                away = self.normalize_name(game['visitor_team']['full_name'])
-                
-                # Match trovato
-                if (team1_norm in home or team1_norm in away) and \
-                   (team2_norm in home or team2_norm in away):
-                    return game.get('id')
-            
-            return None
-            
-        except Exception as e:
-            print(f"Errore get_nba_game_id: {e}")
-            return None
+    def find_nba_game(self, provider: SportsProvider, team1: str, team2: str, date: str,
+                      deadline: Optional[float] = None) -> Optional[Dict]:
+        """Trova la partita NBA (normalizzata) tra quelle del giorno sul provider dato"""
+        game_date = self.parse_date(date)
+        for game in self.nba_games(provider, game_date, deadline):
+            if teams_match(team1, team2, game['home'], game['away']):
+                return game
+        return None
+    
+    def nba_game_periods(self, provider: SportsProvider, game: Dict, deadline: Optional[float] = None) -> List[tuple]:
+        """Punteggi per quarto: dal payload delle partite o, se mancano, un'unica richiesta per data"""
+        if game.get('periods'):
+            return game['periods']
+        key = f"nba_periods:{provider.name}:{game['date']}"
+        scores = cache.get(key)
+        if scores is None:
+            # Chiavi JSON: gli ID partita diventano stringhe
+            scores = {str(game_id): periods for game_id, periods in
+                      provider.nba_period_scores(game['date'], deadline).items()}
+            cache.set(key, scores, NBA_GAMES_TTL)
+        return scores.get(str(game['id']), [])
+    
+    def nba_player_ref(self, provider: SportsProvider, player_name: str, deadline: Optional[float] = None):
+        """Riferimento del giocatore presso il provider (in cache per PLAYER_REF_TTL)"""
+        key = f"nba_player:{provider.name}:{normalize_name(player_name)}"
+        player_ref = cache.get(key)
+        if player_ref is None:
+            player_ref = provider.nba_player_ref(player_name, deadline)
+            if player_ref is not None:
+                cache.set(key, player_ref, PLAYER_REF_TTL)
+        return player_ref
+    
+    def nba_player_stats(self, provider: SportsProvider, game: Dict, player_ref,
+                         deadline: Optional[float] = None) -> Optional[Dict]:
+        """Statistiche del giocatore nella partita (in cache solo a partita finita)"""
+        key = f"nba_stats:{provider.name}:{game['id']}:{player_ref}"
+        stats = cache.get(key)
+        if stats is None:
+            stats = provider.nba_player_stats(game['id'], player_ref, deadline)
+            if stats and game['finished']:
+                cache.set(key, stats, FINAL_TTL)
+        return stats
     
-    def get_nba_player_stats(self, game_id: int, player_id: int) -> Optional[Dict]:
-        """Ottiene stats giocatore NBA in una partita specifica"""
+    def check_nba_game_bet(self, match: str, bet_type: str, date: str) -> Dict:
+        """Verifica scommessa NBA sulla partita (testa a testa, handicap, totali, quarti/tempi)"""
+        team1, team2 = self.extract_teams(match)
+        
+        if not team1 or not team2:
+            return {
+                'found': False,
+                'result': '⏳ Impossibile identificare le squadre',
+                'bet_won': None
+            }
+        
+        deadline = time.monotonic() + NBA_BET_DEADLINE
+        periods_needed = self.parse_nba_period(bet_type) is not None
+        
+        def resolve(provider: SportsProvider):
+            game = self.find_nba_game(provider, team1, team2, date, deadline)
+            periods = []
+            if game and game['finished'] and periods_needed:
+                periods = self.nba_game_periods(provider, game, deadline)
+            return game, periods
+        
         try:
-            url = f"{self.nba_url}/stats"
-            
-            headers = {
-                "Authorization": self.balldontlie_key
+            game, periods = self.router.run('nba_games', resolve)
+        except ProviderError as e:
+            print(f"Errore provider NBA: {e}")
+            return {
+                'found': False,
+                'result': '⏳ Servizio risultati NBA non raggiungibile',
+                'bet_won': None,
+                'details': 'Riproverò più tardi',
+                'retry': True
             }
-            
-            params = {
-                "game_ids[]": game_id,
-                "player_ids[]": player_id
+        
+        if not game:
+            return {
+                'found': False,
+                'result': '⏳ Partita non trovata o non ancora conclusa',
+                'bet_won': None,
+                'retry': True
             }
-            
-            response = requests.get(url, headers=headers, params=params, timeout=10)
-            
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            stats = data.get('data', [])
-            
-            if stats and len(stats) > 0:
-                return stats[0]
-            
-            return None
-            
-        except Exception as e:
-            print(f"Errore get_nba_player_stats: {e}")
-            return None
+        
+        if not game['finished']:
+            return {
+                'found': True,
+                'result': '⏳ Partita ancora in corso',
+                'bet_won': None,
+                'retry': True
+            }
+        
+        bet_won, details = self.evaluate_nba_game_bet(bet_type, game, periods)
+        
+        return {
+            'found': True,
+            'result': f"{game['home']} {game['home_score']}-{game['away_score']} {game['away']}",
+            'bet_won': bet_won,
+            'details': details
+        }
+    
+    def parse_nba_period(self, bet_type: str) -> Optional[List[int]]:
+        """Quarti coinvolti (indici 0-3) se la scommessa è su un quarto o un tempo"""
+        bet_lower = bet_type.lower()
+        ordinals = {'1': 0, 'primo': 0, 'first': 0, '2': 1, 'secondo': 1, 'second': 1,
+                    '3': 2, 'terzo': 2, 'third': 2, '4': 3, 'quarto': 3, 'fourth': 3}
+        
+        quarter = re.search(r'\b(1|2|3|4|primo|secondo|terzo|quarto|first|second|third|fourth)\s*[°º]?\s*(?:quarto|quarter)\b', bet_lower) \
+            or re.search(r'\b(?:q)([1-4])\b|\b([1-4])q\b', bet_lower)
+        if quarter:
+            value = next(g for g in quarter.groups() if g)
+            return [ordinals[value]]
+        
+        half = re.search(r'\b(1|2|primo|secondo|first|second)\s*[°º]?\s*(?:tempo|half|metà)\b', bet_lower) \
+            or re.search(r'\b([12])(?:h|t)\b', bet_lower)
+        if half:
+            first_half = ordinals[half.group(1)] == 0
+            return [0, 1] if first_half else [2, 3]
+        return None
+    
+    def nba_bet_team(self, bet_type: str, game: Dict) -> Optional[str]:
+        """'home' o 'away' se la scommessa nomina una squadra (o usa 1/2)"""
+        bet_words = set(self.normalize_name(re.sub(r'[+-]?\d+(?:[.,]\d+)?', ' ', bet_type)).split())
+        for side in ('home', 'away'):
+            # Nickname (ultima parola: "lakers") o città/nome completo
+            words = self.normalize_name(game[side]).split()
+            if words and (words[-1] in bet_words or ' '.join(words) in self.normalize_name(bet_type)):
+                return side
+        tokens = self.normalize_name(bet_type).split()
+        if '1' in tokens or 'casa' in tokens or 'home' in tokens:
+            return 'home'
+        if '2' in tokens or 'trasferta' in tokens or 'away' in tokens:
+            return 'away'
+        return None
+    
+    def evaluate_nba_game_bet(self, bet_type: str, game: Dict, periods: List[tuple]) -> Tuple[Optional[bool], str]:
+        """Valuta testa a testa, handicap, totale e totale squadra (anche su quarti/tempi)"""
+        bet_lower = bet_type.lower()
+        selected = self.parse_nba_period(bet_type)
+        
+        if selected is not None:
+            if not periods:
+                return None, 'Punteggi per quarto non disponibili'
+            home = sum(periods[i][0] for i in selected)
+            away = sum(periods[i][1] for i in selected)
+            scope = 'Parziale'
+        else:
+            home, away = int(game['home_score'] or 0), int(game['away_score'] or 0)
+            scope = 'Finale'
+        details = f'{scope}: {home}-{away} (totale {home + away})'
+        
+        # Il numero del quarto/tempo non va letto come 1/2 né come linea
+        market = re.sub(r'\b(?:[1-4]|primo|secondo|terzo|quarto|first|second|third|fourth)\s*[°º]?\s*'
+                        r'(?:quarto|quarter|tempo|half|metà)\b|\bq[1-4]\b|\b[1-4]q\b|\b[12][ht]\b',
+                        ' ', bet_type, flags=re.IGNORECASE)
+        team = self.nba_bet_team(market, game)
+        numbers = re.findall(r'[+-]?\d+(?:[.,]\d+)?', market)
+        
+        # Totale partita o totale squadra
+        if 'over' in bet_lower or 'under' in bet_lower:
+            lines = [float(n.replace(',', '.')) for n in numbers if '.' in n or ',' in n] or \
+                    [float(n.replace(',', '.')) for n in numbers]
+            if not lines:
+                return None, details
+            line = abs(lines[-1])
+            points = (home if team == 'home' else away) if team else home + away
+            if points == line:
+                return None, details + ' | Push'
+            return (points > line if 'over' in bet_lower else points < line), details
+        
+        if team is None:
+            return None, details
+        
+        margin = home - away if team == 'home' else away - home
+        
+        # Handicap / spread: linea con segno (es. "Lakers -5.5", "handicap +3.5")
+        spread = [n for n in numbers if n[0] in '+-']
+        if spread or 'handicap' in bet_lower or 'spread' in bet_lower:
+            if not spread:
+                return None, details
+            line = float(spread[-1].replace(',', '.'))
+            if margin + line == 0:
+                return None, details + ' | Push'
+            return margin + line > 0, details + f' | Linea {line:+g}'
+        
+        # Testa a testa (moneyline)
+        return margin > 0, details
     
     def check_nba_player_bet(self, match: str, player_name: str, bet_type: str, date: str) -> Dict:
-        """Verifica scommessa giocatore NBA con BallDontLie"""
+        """Verifica scommessa giocatore NBA (BallDontLie o API-Basketball)"""
         
         team1, team2 = self.extract_teams(match)
         
@@ -190,21 +301,43 @@ class SportsAPIManager:
                 'details': ''
             }
         
-        # Trova game ID
-        game_id = self.get_nba_game_id(team1, team2, date)
+        deadline = time.monotonic() + NBA_BET_DEADLINE
+        
+        def resolve(provider: SportsProvider):
+            # Partita e giocatore sono indipendenti: cercali in parallelo.
+            # Tutta la catena resta sullo stesso provider (gli ID non sono condivisi)
+            game_future = self._lookup_pool.submit(self.find_nba_game, provider, team1, team2, date, deadline)
+            player_future = self._lookup_pool.submit(self.nba_player_ref, provider, player_name, deadline)
+            game = game_future.result()
+            if not game:
+                return None, None, None
+            player_ref = player_future.result()
+            if player_ref is None:
+                return game, None, None
+            return game, player_ref, self.nba_player_stats(provider, game, player_ref, deadline)
         
-        if not game_id:
+        try:
+            game, player_ref, stats = self.router.run('nba_player', resolve)
+        except ProviderError as e:
+            print(f"Errore provider NBA: {e}")
             return {
                 'found': False,
-                'result': '⏳ Partita non trovata o non ancora conclusa',
+                'result': '⏳ Servizio risultati NBA non raggiungibile',
                 'bet_won': None,
-                'details': 'Verifica che la partita sia terminata'
+                'details': 'Riproverò più tardi',
+                'retry': True
             }
         
-        # Trova player ID
-        player_id = self.get_nba_player_id(player_name)
+        if not game:
+            return {
+                'found': False,
+                'result': '⏳ Partita non trovata o non ancora conclusa',
+                'bet_won': None,
+                'details': 'Verifica che la partita sia terminata',
+                'retry': True
+            }
         
-        if not player_id:
+        if player_ref is None:
             return {
                 'found': False,
                 'result': f'⚠️ Giocatore {player_name} non trovato',
@@ -212,15 +345,13 @@ class SportsAPIManager:
                 'details': 'Controlla il nome del giocatore'
             }
         
-        # Ottieni stats
-        stats = self.get_nba_player_stats(game_id, player_id)
-        
         if not stats:
             return {
                 'found': True,
                 'result': f'⚠️ Statistiche di {player_name} non disponibili',
                 'bet_won': None,
-                'details': 'Il giocatore potrebbe non aver giocato'
+                'details': 'Il giocatore potrebbe non aver giocato',
+                'retry': True
             }
         
         # Analizza bet type
@@ -288,7 +419,7 @@ class SportsAPIManager:
         return over_under, threshold, None
     
     def get_stat_value_from_balldontlie(self, stats: Dict, stat_type: str) -> Optional[float]:
-        """Estrae valore da stats BallDontLie"""
+        """Estrae valore da stats normalizzate (chiavi BallDontLie)"""
         try:
             # BallDontLie usa questi nomi:
             # pts, ast, reb, fg3m (3-pointers made), blk, stl
@@ -313,52 +444,43 @@ class SportsAPIManager:
         }
         return names.get(stat_type, stat_type)
     
-    # ==================== CALCIO - LIVESCORE ====================
+    # ==================== CALCIO ====================
     
     def get_football_match(self, team1: str, team2: str, date: str) -> Optional[Dict]:
-        """Trova partita calcio su LiveScore"""
-        try:
-            game_date = self.parse_date(date)
-            
-            # LiveScore API endpoint (adatta in base alla loro documentazione)
-            url = f"{self.livescore_url}/scores/live.json"
-            
-            params = {
-                "key": self.livescore_key,
-                "secret": self.livescore_key  # Se richiesto
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code != 200:
-                print(f"LiveScore error: {response.status_code}")
+        """
+        Trova partita calcio (normalizzata): i giorni passati dall'archivio locale,
+        oggi dal feed live del provider più affidabile
+        """
+        game_date = self.parse_date(date)
+        if self.football_results.is_past(game_date):
+            try:
+                return self.football_results.find(team1, team2, game_date)
+            except ProviderError as e:
+                print(f"Errore provider calcio: {e}")
                 return None
-            
-            data = response.json()
-            
-            # Cerca la partita (adatta in base alla struttura risposta LiveScore)
-            team1_norm = self.normalize_name(team1)
-            team2_norm = self.normalize_name(team2)
-            
-            # Nota: Adatta questa parte alla struttura specifica di LiveScore
-            matches = data.get('data', {}).get('match', [])
-            
-            for match in matches:
-                home = self.normalize_name(match.get('home_name', ''))
-                away = self.normalize_name(match.get('away_name', ''))
-                
-                if (team1_norm in home or team1_norm in away) and \
-                   (team2_norm in home or team2_norm in away):
-                    return match
-            
-            return None
-            
-        except Exception as e:
-            print(f"Errore LiveScore: {e}")
+        
+        try:
+            matches = self.football_live_matches(game_date)
+        except ProviderError as e:
+            print(f"Errore provider calcio: {e}")
             return None
+        
+        for match in matches:
+            if teams_match(team1, team2, match['home'], match['away']):
+                return match
+        return None
+    
+    def football_live_matches(self, game_date: str) -> List[Dict]:
+        """Feed live del giorno (una richiesta ogni FOOTBALL_LIVE_TTL secondi per tutte le scommesse)"""
+        key = f"football_live:{game_date}"
+        matches = cache.get(key)
+        if matches is None:
+            matches = without_raw(self.router.run('football_matches', lambda p: p.football_matches(game_date)))
+            cache.set(key, matches, FOOTBALL_LIVE_TTL)
+        return matches
     
     def check_football_bet(self, match: str, bet_type: str, date: str) -> Dict:
-        """Verifica scommessa calcio con LiveScore"""
+        """Verifica scommessa calcio (LiveScore o API-Football)"""
         team1, team2 = self.extract_teams(match)
         
         if not team1 or not team2:
@@ -374,25 +496,30 @@ class SportsAPIManager:
             return {
                 'found': False,
                 'result': '⏳ Partita non trovata o non ancora conclusa',
-                'bet_won': None
+                'bet_won': None,
+                'retry': True
             }
         
+        return self.football_result(match_data, bet_type, team1, team2)
+    
+    def football_result(self, match_data: Dict, bet_type: str, team1: str = '', team2: str = '') -> Dict:
+        """Esito della scommessa su una partita già trovata (anche dal feed live, vedi football_watcher)"""
         # Controlla se finita
-        status = match_data.get('status', '')
-        if status not in ['finished', 'FT', '90']:
+        if not match_data['finished']:
             return {
                 'found': True,
                 'result': '⏳ Partita ancora in corso',
-                'bet_won': None
+                'bet_won': None,
+                'retry': True
             }
         
         # Ottieni risultato
-        goals_home = int(match_data.get('home_score', 0))
-        goals_away = int(match_data.get('away_score', 0))
+        goals_home = int(match_data['home_score'] or 0)
+        goals_away = int(match_data['away_score'] or 0)
         total_goals = goals_home + goals_away
         
-        home_team = match_data.get('home_name', team1)
-        away_team = match_data.get('away_name', team2)
+        home_team = match_data['home'] or team1
+        away_team = match_data['away'] or team2
         
         # Valuta scommessa
         bet_won = self.evaluate_football_bet(bet_type, goals_home, goals_away, total_goals)
@@ -435,25 +562,111 @@ class SportsAPIManager:
         
         return None
     
+    # ==================== TENNIS ====================
+    
+    def extract_players(self, match: str) -> Tuple[str, str]:
+        """Estrae i due giocatori (nomi originali) dalla stringa match"""
+        parts = re.split(r'\s+vs\.?\s+|\s+-\s+', match.strip(), flags=re.IGNORECASE)
+        if len(parts) == 2:
+            return parts[0].strip(), parts[1].strip()
+        return "", ""
+    
+    def check_tennis_bet(self, match: str, bet_type: str, date: str) -> Dict:
+        """Verifica scommessa tennis dall'indice locale dei risultati"""
+        players = self.extract_players(match)
+        
+        if not players[0] or not players[1]:
+            return {
+                'found': False,
+                'result': '⏳ Impossibile identificare i giocatori',
+                'bet_won': None
+            }
+        
+        try:
+            match_data = self.tennis_index.find(players[0], players[1], self.parse_date(date))
+        except ProviderError as e:
+            print(f"Errore provider tennis: {e}")
+            return {
+                'found': False,
+                'result': '⏳ Servizio risultati tennis non raggiungibile',
+                'bet_won': None,
+                'retry': True
+            }
+        
+        if not match_data:
+            return {
+                'found': False,
+                'result': '⏳ Partita non trovata o non ancora conclusa',
+                'bet_won': None,
+                'retry': True
+            }
+        
+        if not match_data['finished']:
+            return {
+                'found': True,
+                'result': '⏳ Partita ancora in corso',
+                'bet_won': None,
+                'retry': True
+            }
+        
+        sets_text = ' '.join(f'{a}-{b}' for a, b in match_data['sets'])
+        bet_won = evaluate_tennis_bet(bet_type, match_data, players)
+        
+        return {
+            'found': True,
+            'result': f"{match_data['home']} {match_data['home_score']}-{match_data['away_score']} {match_data['away']}",
+            'bet_won': bet_won,
+            'details': f"Set: {sets_text}" if bet_won is not None else 'Tipo di scommessa non riconosciuto automaticamente'
+        }
+    
     # ==================== ROUTER PRINCIPALE ====================
     
     def check_bet(self, sport: str, match: str, bet_type: str, date: str, player: Optional[str] = None) -> Dict:
-        """Router principale per tutte le scommesse"""
+        """Router principale, con cache dei risultati negativi"""
+        sport_key = self.sport_key(sport)
+        # Mercati diversi sulla stessa partita condividono lo stato della partita
+        key = (sport_key, self.normalize_name(match), self.parse_date(date),
+               self.normalize_name(player) if player else None)
+        
+        cached = self.recheck_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = self.route_bet(sport, match, bet_type, date, player)
+        
+        if result.get('retry'):
+            result = self.recheck_cache.store(key, result, sport_key, date)
+        else:
+            self.recheck_cache.discard(key)
+        return result
+    
+    def sport_key(self, sport: str) -> str:
+        """Chiave sport canonica ('nba', 'calcio', 'tennis', ...)"""
+        sport_lower = sport.lower()
+        if sport_lower in ['nba', 'basket', 'basketball']:
+            return 'nba'
+        if sport_lower in ['calcio', 'football', 'soccer']:
+            return 'calcio'
+        if sport_lower in ['tennis', 'atp', 'wta']:
+            return 'tennis'
+        return sport_lower
+    
+    def route_bet(self, sport: str, match: str, bet_type: str, date: str, player: Optional[str] = None) -> Dict:
+        """Smista la scommessa al controllo dello sport giusto"""
         sport_lower = sport.lower()
         
         if sport_lower in ['nba', 'basket', 'basketball']:
             if player:
                 return self.check_nba_player_bet(match, player, bet_type, date)
             else:
-                return {
-                    'found': False,
-                    'result': '⏳ Scommesse su risultato NBA non ancora supportate',
-                    'bet_won': None
-                }
+                return self.check_nba_game_bet(match, bet_type, date)
         
         elif sport_lower in ['calcio', 'football', 'soccer']:
             return self.check_football_bet(match, bet_type, date)
         
+        elif sport_lower in ['tennis', 'atp', 'wta']:
+            return self.check_tennis_bet(match, bet_type, date)
+        
         else:
             return {
                 'found': False,
@@ -0,0 +1,632 @@
+"""
+Modulo Provider Sportivi - interfaccia unica + router con failover
+Ogni provider (BallDontLie, API-Sports, LiveScore) espone gli stessi metodi con
+dati normalizzati. Il router sceglie il provider più "sano" (errori, latenza,
+quota residua) e, se uno è giù, passa al successivo grazie a un circuit breaker.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from shared_cache import cache
+
+# Dopo quanto una richiesta lenta viene duplicata (hedging)
+HEDGE_DELAY = 2.5
+# Timeout della singola richiesta HTTP
+REQUEST_TIMEOUT = 10
+
+# Finestra per le statistiche di salute (ultime N richieste, non più vecchie di 5 minuti:
+# così un provider scartato torna a essere provato)
+HEALTH_WINDOW = 20
+HEALTH_MAX_AGE = 300.0
+# Circuit breaker: errori consecutivi per aprirlo e pausa prima di riprovare
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60.0
+# Sotto questa quota residua il provider viene usato solo come ultima scelta
+LOW_QUOTA = 5
+# Pagine massime dello storico LiveScore per una singola data: un download del
+# giorno costa una richiesta per pagina (di solito 1-3, al massimo questo)
+HISTORY_MAX_PAGES = 20
+# Quota residua letta dagli header, condivisa tra le repliche del bot per un'ora
+# (poi si torna a leggerla dalle risposte)
+QUOTA_TTL = 3600
+# Contatore condiviso delle richieste per provider e giorno, tenuto per due giorni
+# (il giorno corrente resta leggibile fino a mezzanotte anche se creato tardi)
+CALLS_TTL = 2 * 86400
+
+
+class ProviderError(Exception):
+    """Errore del provider (HTTP, quota esaurita, risposta non valida)"""
+
+
+def normalize_name(name: str) -> str:
+    """Normalizza nomi per matching"""
+    name = name.strip().lower()
+    name = re.sub(r'\s+', ' ', name)
+    # Rimuovi caratteri speciali
+    name = re.sub(r'[^\w\s]', '', name)
+    return name
+
+
+def teams_match(team1: str, team2: str, home: str, away: str) -> bool:
+    """True se le due squadre (già normalizzate) corrispondono alla partita"""
+    home = normalize_name(home)
+    away = normalize_name(away)
+    return (team1 in home or team1 in away) and (team2 in home or team2 in away)
+
+
+# ==================== HTTP ====================
+
+class HttpClient:
+    """Sessione HTTP condivisa con GET "hedged" e deadline complessiva"""
+
+    def __init__(self, max_workers: int = 8):
+        self.session = requests.Session()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http")
+
+    def get(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None,
+            deadline: Optional[float] = None, on_send: Optional[Callable[[], None]] = None) -> requests.Response:
+        """
+        GET con hedging: se la risposta non arriva entro HEDGE_DELAY parte una
+        seconda richiesta identica e vince la prima che risponde. `deadline` è
+        un istante time.monotonic() oltre il quale si rinuncia. `on_send` è
+        chiamata per ogni richiesta effettivamente inviata (anche quella di riserva).
+        """
+        if deadline is None:
+            deadline = time.monotonic() + REQUEST_TIMEOUT
+
+        def remaining() -> float:
+            return deadline - time.monotonic()
+
+        def attempt():
+            # Il pool può far partire la richiesta in ritardo: a deadline scaduta non si invia
+            left = remaining()
+            if left <= 0:
+                raise requests.Timeout(f"Deadline superata per {url}")
+            if on_send is not None:
+                on_send()
+            return self.session.get(url, headers=headers, params=params,
+                                    timeout=min(REQUEST_TIMEOUT, left))
+
+        if remaining() <= 0:
+            raise requests.Timeout(f"Deadline superata per {url}")
+        pending = {self._pool.submit(attempt)}
+        hedged = False
+        last_error = None
+
+        while pending and remaining() > 0:
+            wait_for = remaining() if hedged else min(HEDGE_DELAY, remaining())
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    last_error = e
+                    continue
+                if response.status_code < 500:
+                    return response
+                last_error = requests.HTTPError(f"HTTP {response.status_code}", response=response)
+
+            # Richiesta lenta o fallita: una sola richiesta di riserva
+            if not hedged and remaining() > 0:
+                hedged = True
+                pending.add(self._pool.submit(attempt))
+
+        raise last_error or requests.Timeout(f"Deadline superata per {url}")
+
+
+# ==================== SALUTE PROVIDER ====================
+
+class ProviderHealth:
+    """Latenza ed errori sulle ultime richieste, quota residua e circuit breaker"""
+
+    def __init__(self):
+        self._samples = deque(maxlen=HEALTH_WINDOW)  # (istante, latenza, ok)
+        self._lock = threading.Lock()
+        self.consecutive_errors = 0
+        self.open_until = 0.0
+        self.quota_remaining: Optional[int] = None
+
+    def record(self, latency: float, ok: bool, quota_remaining: Optional[int] = None):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, ok))
+            if quota_remaining is not None:
+                self.quota_remaining = quota_remaining
+            if ok:
+                self.consecutive_errors = 0
+                self.open_until = 0.0
+            else:
+                self.consecutive_errors += 1
+                if self.consecutive_errors >= BREAKER_THRESHOLD:
+                    # Backoff del breaker: raddoppia a ogni fallimento oltre la soglia
+                    extra = self.consecutive_errors - BREAKER_THRESHOLD
+                    self.open_until = time.monotonic() + BREAKER_COOLDOWN * 2 ** min(extra, 5)
+
+    def trip(self, seconds: float):
+        """Apre il breaker per `seconds` (es. quota esaurita)"""
+        with self._lock:
+            self.open_until = max(self.open_until, time.monotonic() + seconds)
+
+    @property
+    def is_open(self) -> bool:
+        """Breaker aperto: il provider non va usato (dopo il cooldown si riprova, half-open)"""
+        return time.monotonic() < self.open_until
+
+    def recent(self) -> List[tuple]:
+        """Campioni (latenza, ok) ancora dentro la finestra temporale"""
+        cutoff = time.monotonic() - HEALTH_MAX_AGE
+        with self._lock:
+            return [(latency, ok) for ts, latency, ok in self._samples if ts >= cutoff]
+
+    @property
+    def error_rate(self) -> float:
+        samples = self.recent()
+        if not samples:
+            return 0.0
+        return sum(1 for _, ok in samples if not ok) / len(samples)
+
+    @property
+    def avg_latency(self) -> float:
+        latencies = [latency for latency, ok in self.recent() if ok]
+        return sum(latencies) / len(latencies) if latencies else 0.0
+
+    def score(self) -> float:
+        """Punteggio (più basso = più sano)"""
+        score = self.error_rate * 10 + self.avg_latency
+        if self.quota_remaining is not None and self.quota_remaining < LOW_QUOTA:
+            score += 100
+        return score
+
+    def snapshot(self) -> Dict:
+        return {
+            'error_rate': round(self.error_rate, 2),
+            'avg_latency': round(self.avg_latency, 3),
+            'quota_remaining': self.quota_remaining,
+            'circuit_open': self.is_open
+        }
+
+
+# ==================== PROVIDER ====================
+
+class SportsProvider:
+    """
+    Interfaccia comune. Le partite sono dict normalizzati:
+    {'provider', 'id', 'date', 'home', 'away', 'home_score', 'away_score', 'finished', 'status', 'raw'}
+    Le partite NBA hanno anche 'periods': [(casa, trasferta), ...] per quarto (+ supplementari),
+    vuota se il provider non li include.
+    Le statistiche giocatore usano le chiavi BallDontLie: pts, reb, ast, fg3m, blk, stl.
+    """
+
+    name = ''
+    capabilities = ()  # 'nba_games', 'nba_player', 'football_matches', 'tennis_matches'
+    quota_header = None
+
+    def __init__(self, http: HttpClient):
+        self.http = http
+        self.health = ProviderHealth()
+
+    def calls_key(self) -> str:
+        return f"calls:{self.name}:{datetime.now().strftime('%Y-%m-%d')}"
+
+    def request(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None,
+                deadline: Optional[float] = None) -> Dict:
+        """GET con registrazione di latenza, errori e quota; solleva ProviderError"""
+        if self.quota_header:
+            # Quota vista da un'altra replica: esaurita = niente richiesta
+            shared_quota = cache.get(f"quota:{self.name}")
+            if shared_quota is not None:
+                self.health.quota_remaining = shared_quota
+                if shared_quota == 0:
+                    self.health.trip(BREAKER_COOLDOWN * 10)
+                    raise ProviderError(f"{self.name}: quota esaurita")
+
+        start = time.monotonic()
+        try:
+            # Contata una volta per richiesta inviata: la richiesta di riserva consuma quota anche lei
+            response = self.http.get(url, headers=headers, params=params, deadline=deadline,
+                                     on_send=lambda: cache.incr(self.calls_key(), ttl=CALLS_TTL))
+        except requests.RequestException as e:
+            self.health.record(time.monotonic() - start, False)
+            raise ProviderError(f"{self.name}: {e}") from e
+
+        quota = None
+        if self.quota_header and response.headers.get(self.quota_header, '').isdigit():
+            quota = int(response.headers[self.quota_header])
+            cache.set(f"quota:{self.name}", quota, QUOTA_TTL if quota else BREAKER_COOLDOWN * 10)
+
+        if response.status_code != 200:
+            self.health.record(time.monotonic() - start, False, quota)
+            if response.status_code == 429 or quota == 0:
+                self.health.trip(BREAKER_COOLDOWN * 10)
+            raise ProviderError(f"{self.name}: HTTP {response.status_code}")
+
+        self.health.record(time.monotonic() - start, True, quota)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise ProviderError(f"{self.name}: risposta non JSON") from e
+
+    # Metodi delle capabilities: il router chiama solo quelli dichiarati in `capabilities`,
+    # i default (nessun dato) valgono per i provider che non li offrono
+    def nba_games(self, date: str, deadline: Optional[float] = None) -> List[Dict]:
+        """Partite NBA del giorno"""
+        return []
+
+    def nba_player_ref(self, player_name: str, deadline: Optional[float] = None):
+        """Riferimento al giocatore da passare a nba_player_stats (None se non trovato)"""
+        return None
+
+    def nba_period_scores(self, date: str, deadline: Optional[float] = None) -> Dict:
+        """Punteggi per quarto di tutte le partite del giorno: {game_id: periods}"""
+        return {}
+
+    def nba_player_stats(self, game_id, player_ref, deadline: Optional[float] = None) -> Optional[Dict]:
+        """Statistiche del giocatore nella partita (None se non ha giocato)"""
+        return None
+
+    def football_matches(self, date: str, deadline: Optional[float] = None) -> List[Dict]:
+        """Partite di calcio del giorno"""
+        return []
+
+    def tennis_matches(self, date: str, tournament: Optional[str] = None,
+                       deadline: Optional[float] = None) -> List[Dict]:
+        """Partite del giorno (tutti i tornei o solo `tournament`), con 'tournament' e 'sets'"""
+        return []
+
+
+class BallDontLieProvider(SportsProvider):
+    """BallDontLie: partite e statistiche giocatori NBA"""
+
+    name = 'balldontlie'
+    capabilities = ('nba_games', 'nba_player')
+    quota_header = 'x-ratelimit-remaining'
+
+    def __init__(self, http: HttpClient):
+        super().__init__(http)
+        self.api_key = os.getenv("BALLDONTLIE_API_KEY", "")
+        self.base_url = "https://api.balldontlie.io/v1"
+
+    @property
+    def headers(self) -> Dict:
+        return {"Authorization": self.api_key}
+
+    def nba_games(self, date: str, deadline: Optional[float] = None) -> List[Dict]:
+        data = self.request(f"{self.base_url}/games", self.headers, {"dates[]": date}, deadline)
+        return [
+            {
+                'provider': self.name,
+                'id': game.get('id'),
+                'date': date,
+                'home': game['home_team']['full_name'],
+                'away': game['visitor_team']['full_name'],
+                'home_score': game.get('home_team_score'),
+                'away_score': game.get('visitor_team_score'),
+                'finished': str(game.get('status', '')).lower() == 'final',
+                'status': game.get('status', ''),
+                'periods': self.periods(game),
+                'raw': game
+            }
+            for game in data.get('data', [])
+        ]
+
+    def periods(self, game: Dict) -> List[tuple]:
+        """Quarti e supplementari (campi home_q1 / visitor_q1 ..., se presenti)"""
+        names = ['q1', 'q2', 'q3', 'q4', 'ot1', 'ot2', 'ot3']
+        periods = []
+        for name in names:
+            home, away = game.get(f'home_{name}'), game.get(f'visitor_{name}')
+            if home is None or away is None:
+                break
+            periods.append((home, away))
+        return periods if len(periods) >= 4 else []
+
+    def nba_period_scores(self, date: str, deadline: Optional[float] = None) -> Dict:
+        # Box score del giorno: una richiesta per tutte le partite
+        data = self.request(f"{self.base_url}/box_scores", self.headers, {"date": date}, deadline)
+        scores = {}
+        for game in data.get('data', []):
+            flat = {
+                **{f'home_{k}': v for k, v in (game.get('home_team') or {}).items()},
+                **{f'visitor_{k}': v for k, v in (game.get('visitor_team') or {}).items()},
+                **game
+            }
+            periods = self.periods(flat)
+            if periods and game.get('id') is not None:
+                scores[game['id']] = periods
+        return scores
+
+    def nba_player_ref(self, player_name: str, deadline: Optional[float] = None) -> Optional[int]:
+        # Cerca per nome (primo nome o cognome)
+        params = {"search": player_name.split()[0]}
+        data = self.request(f"{self.base_url}/players", self.headers, params, deadline)
+
+        # Cerca match esatto o parziale
+        player_lower = normalize_name(player_name)
+        for player in data.get('data', []):
+            first = player.get('first_name', '').lower()
+            last = player.get('last_name', '').lower()
+            full = f"{first} {last}"
+            if player_lower in full or full in player_lower or \
+               last in player_lower or player_lower in last:
+                return player.get('id')
+        return None
+
+    def nba_player_stats(self, game_id, player_ref, deadline: Optional[float] = None) -> Optional[Dict]:
+        params = {"game_ids[]": game_id, "player_ids[]": player_ref}
+        data = self.request(f"{self.base_url}/stats", self.headers, params, deadline)
+        stats = data.get('data', [])
+        return stats[0] if stats else None
+
+
+class ApiSportsBasketballProvider(SportsProvider):
+    """API-Basketball (api-sports.io): partite NBA e box score giocatori"""
+
+    name = 'api-basketball'
+    capabilities = ('nba_games', 'nba_player')
+    quota_header = 'x-ratelimit-requests-remaining'
+    NBA_LEAGUE_ID = 12
+    FINISHED = ('FT', 'AOT')
+
+    def __init__(self, http: HttpClient, api_key: str):
+        super().__init__(http)
+        self.api_key = api_key
+        self.base_url = "https://v1.basketball.api-sports.io"
+
+    @property
+    def headers(self) -> Dict:
+        return {'x-apisports-key': self.api_key}
+
+    def season(self, date: str) -> str:
+        """Stagione NBA nel formato API ("2025-2026"), inizia a ottobre"""
+        day = datetime.strptime(date, '%Y-%m-%d')
+        start = day.year if day.month >= 10 else day.year - 1
+        return f"{start}-{start + 1}"
+
+    def nba_games(self, date: str, deadline: Optional[float] = None) -> List[Dict]:
+        params = {'league': self.NBA_LEAGUE_ID, 'season': self.season(date), 'date': date}
+        data = self.request(f"{self.base_url}/games", self.headers, params, deadline)
+        games = []
+        for game in data.get('response', []):
+            status = game.get('status', {}).get('short', '')
+            games.append({
+                'provider': self.name,
+                'id': game.get('id'),
+                'date': date,
+                'home': game['teams']['home']['name'],
+                'away': game['teams']['away']['name'],
+                'home_score': game['scores']['home'].get('total'),
+                'away_score': game['scores']['away'].get('total'),
+                'finished': status in self.FINISHED,
+                'status': status,
+                'periods': self.periods(game['scores']),
+                'raw': game
+            })
+        return games
+
+    def periods(self, scores: Dict) -> List[tuple]:
+        """Quarti (+ supplementari) dal blocco scores di API-Basketball"""
+        home, away = scores['home'], scores['away']
+        periods = []
+        for quarter in ('quarter_1', 'quarter_2', 'quarter_3', 'quarter_4'):
+            if home.get(quarter) is None or away.get(quarter) is None:
+                return []
+            periods.append((home[quarter], away[quarter]))
+        if home.get('over_time') is not None and away.get('over_time') is not None:
+            periods.append((home['over_time'], away['over_time']))
+        return periods
+
+    def nba_player_ref(self, player_name: str, deadline: Optional[float] = None) -> Optional[str]:
+        # Il box score contiene i nomi: basta il nome normalizzato, nessuna richiesta
+        return normalize_name(player_name)
+
+    def nba_player_stats(self, game_id, player_ref, deadline: Optional[float] = None) -> Optional[Dict]:
+        data = self.request(f"{self.base_url}/games/statistics/players", self.headers, {'id': game_id}, deadline)
+        for row in data.get('response', []):
+            name = normalize_name(row.get('player', {}).get('name', ''))
+            # API-Sports usa "Cognome Nome"
+            if player_ref in name or set(player_ref.split()) <= set(name.split()):
+                return {
+                    'pts': row.get('points'),
+                    'reb': (row.get('rebounds') or {}).get('total'),
+                    'ast': row.get('assists'),
+                    'fg3m': (row.get('threepoint_goals') or {}).get('total'),
+                    'blk': row.get('blocks'),
+                    'stl': row.get('steals'),
+                }
+        return None
+
+
+class LiveScoreProvider(SportsProvider):
+    """LiveScore API: partite di calcio"""
+
+    name = 'livescore'
+    capabilities = ('football_matches',)
+    FINISHED = ('finished', 'FT', '90', 'FINISHED')
+
+    def __init__(self, http: HttpClient):
+        super().__init__(http)
+        self.api_key = os.getenv("LIVESCORE_API_KEY", "")
+        self.api_secret = os.getenv("LIVESCORE_API_SECRET", self.api_key)
+        self.base_url = "https://livescore-api.com/api-client"
+
+    def normalize_match(self, match: Dict, date: str) -> Dict:
+        home_score, away_score = match.get('home_score'), match.get('away_score')
+        if home_score is None and match.get('score'):
+            # Formato "2 - 1"
+            parts = re.findall(r'\d+', match['score'])
+            if len(parts) >= 2:
+                home_score, away_score = parts[0], parts[1]
+        return {
+            'provider': self.name,
+            'id': match.get('id'),
+            'date': date,
+            'home': match.get('home_name', ''),
+            'away': match.get('away_name', ''),
+            'home_score': int(home_score) if home_score not in (None, '') else None,
+            'away_score': int(away_score) if away_score not in (None, '') else None,
+            'finished': match.get('status', '') in self.FINISHED,
+            'status': match.get('status', ''),
+            'raw': match
+        }
+
+    def football_matches(self, date: str, deadline: Optional[float] = None) -> List[Dict]:
+        """Oggi: feed live. Giorni passati: storico della data (tutte le pagine)"""
+        params = {"key": self.api_key, "secret": self.api_secret}
+        if date >= datetime.now().strftime('%Y-%m-%d'):
+            data = self.request(f"{self.base_url}/scores/live.json", params=params, deadline=deadline)
+            return [self.normalize_match(m, date) for m in data.get('data', {}).get('match', [])]
+
+        matches = []
+        params.update({"from": date, "to": date, "page": 1})
+        for _ in range(HISTORY_MAX_PAGES):
+            data = self.request(f"{self.base_url}/scores/history.json", params=params, deadline=deadline)
+            page = data.get('data', {})
+            for match in page.get('match', []):
+                # Lo storico contiene solo partite concluse (non usato per la finalità del giorno)
+                matches.append(self.normalize_match({'status': 'FINISHED', **match}, date))
+            if not page.get('next_page'):
+                break
+            params['page'] += 1
+        return matches
+
+
+class ApiFootballProvider(SportsProvider):
+    """API-Football (api-sports.io): tutte le partite di una data"""
+
+    name = 'api-football'
+    capabilities = ('football_matches',)
+    quota_header = 'x-ratelimit-requests-remaining'
+    FINISHED = ('FT', 'AET', 'PEN')
+
+    def __init__(self, http: HttpClient, api_key: str):
+        super().__init__(http)
+        self.api_key = api_key
+        self.base_url = "https://v3.football.api-sports.io"
+
+    def football_matches(self, date: str, deadline: Optional[float] = None) -> List[Dict]:
+        headers = {'x-apisports-key': self.api_key}
+        data = self.request(f"{self.base_url}/fixtures", headers, {'date': date}, deadline)
+        matches = []
+        for fixture in data.get('response', []):
+            status = fixture['fixture']['status']['short']
+            matches.append({
+                'provider': self.name,
+                'id': fixture['fixture']['id'],
+                'date': date,
+                'home': fixture['teams']['home']['name'],
+                'away': fixture['teams']['away']['name'],
+                'home_score': fixture['goals']['home'],
+                'away_score': fixture['goals']['away'],
+                'finished': status in self.FINISHED,
+                'status': status,
+                'raw': fixture
+            })
+        return matches
+
+
+class ApiTennisProvider(SportsProvider):
+    """API-Tennis (api-tennis.com): partite di un giorno, per torneo"""
+
+    name = 'api-tennis'
+    capabilities = ('tennis_matches',)
+
+    def __init__(self, http: HttpClient, api_key: str):
+        super().__init__(http)
+        self.api_key = api_key
+        self.base_url = "https://api.api-tennis.com/tennis/"
+
+    def normalize_match(self, event: Dict, date: str) -> Dict:
+        sets = []
+        for score in event.get('scores') or []:
+            try:
+                sets.append((int(float(score['score_first'])), int(float(score['score_second']))))
+            except (KeyError, TypeError, ValueError):
+                continue
+        winner = {'First Player': 'home', 'Second Player': 'away'}.get(event.get('event_winner'))
+        return {
+            'provider': self.name,
+            'id': event.get('event_key'),
+            'date': date,
+            'tournament': str(event.get('tournament_key', '')),
+            'tournament_name': event.get('tournament_name', ''),
+            'home': event.get('event_first_player', ''),
+            'away': event.get('event_second_player', ''),
+            'home_score': sum(1 for a, b in sets if a > b),
+            'away_score': sum(1 for a, b in sets if b > a),
+            'finished': event.get('event_status') in ('Finished', 'Retired', 'Walk Over'),
+            'status': event.get('event_status', ''),
+            'winner': winner,
+            'sets': sets,
+            'raw': event
+        }
+
+    def tennis_matches(self, date: str, tournament: Optional[str] = None,
+                       deadline: Optional[float] = None) -> List[Dict]:
+        params = {'method': 'get_fixtures', 'APIkey': self.api_key, 'date_start': date, 'date_stop': date}
+        if tournament:
+            params['tournament_key'] = tournament
+        data = self.request(self.base_url, params=params, deadline=deadline)
+        if not data.get('success', 1):
+            raise ProviderError(f"{self.name}: {data.get('error', 'errore sconosciuto')}")
+        return [self.normalize_match(event, date) for event in data.get('result') or []]
+
+
+# ==================== ROUTER ====================
+
+class ProviderRouter:
+    """Sceglie il provider più sano per ogni capability e fa failover sugli errori"""
+
+    def __init__(self, providers: List[SportsProvider]):
+        self.providers = providers
+
+    def ranked(self, capability: str) -> List[SportsProvider]:
+        """Provider con la capability, dal più sano; quelli col breaker aperto in fondo"""
+        candidates = [p for p in self.providers if capability in p.capabilities]
+        # sorted è stabile: a parità di punteggio vale l'ordine di configurazione
+        return sorted(candidates, key=lambda p: (p.health.is_open, p.health.score()))
+
+    def run(self, capability: str, call: Callable[[SportsProvider], object]):
+        """
+        Esegue `call(provider)` sul provider migliore; se solleva ProviderError
+        passa al successivo. Con tutti i breaker aperti prova comunque il migliore.
+        """
+        ranked = self.ranked(capability)
+        if not ranked:
+            raise ProviderError(f"Nessun provider per {capability}")
+
+        healthy = [p for p in ranked if not p.health.is_open] or ranked[:1]
+        last_error = None
+        for provider in healthy:
+            try:
+                return call(provider)
+            except ProviderError as e:
+                print(f"Failover {capability}: {e}")
+                last_error = e
+        raise last_error
+
+    def status(self) -> Dict[str, Dict]:
+        """Salute di tutti i provider (per diagnostica)"""
+        return {p.name: {**p.health.snapshot(), 'calls_today': cache.get(p.calls_key()) or 0}
+                for p in self.providers}
+
+
+def build_router(http: HttpClient) -> ProviderRouter:
+    """Router con i provider configurati (API-Sports e API-Tennis solo se c'è la chiave)"""
+    providers = [BallDontLieProvider(http), LiveScoreProvider(http)]
+    api_sports_key = os.getenv("API_SPORTS_KEY", "")
+    if api_sports_key:
+        providers.append(ApiSportsBasketballProvider(http, api_sports_key))
+        providers.append(ApiFootballProvider(http, api_sports_key))
+    api_tennis_key = os.getenv("API_TENNIS_KEY", "")
+    if api_tennis_key:
+        providers.append(ApiTennisProvider(http, api_tennis_key))
+    return ProviderRouter(providers)
@@ -0,0 +1,218 @@
+"""
+Modulo Tennis - indice locale dei risultati per giorno e torneo
+Il primo controllo di una data scarica in blocco tutte le partite del giorno e
+le indicizza per coppia di giocatori; gli aggiornamenti successivi riscaricano
+solo il torneo della partita non ancora conclusa, o tutto il giorno (di rado)
+finché non è definitivo. Così N scommesse sullo stesso giorno costano una
+richiesta, non N.
+"""
+
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sports_providers import ProviderRouter, normalize_name
+
+# Dopo quanto riscaricare un torneo con partite non concluse
+TOURNAMENT_REFRESH_SECONDS = 600
+# Giorno non ancora definitivo: dopo quanto riscaricarlo per intero
+# (partite non ancora iniziate o finite dopo il primo download)
+DAY_REFRESH_SECONDS = 1800
+# Un giorno è definitivo se scaricato almeno così tanto dopo la sua fine
+FINAL_AFTER_HOURS = 12
+# Giorni tenuti in memoria
+MAX_DAYS = 14
+
+# Parole ammesse in un testa a testa oltre ai nomi ("Sinner vincente", "T/T 1")
+MONEYLINE_WORDS = {
+    'vincente', 'vince', 'vincitore', 'vittoria', 'winner', 'win', 'to', 'testa', 'a', 'tt',
+    'match', 'partita', 'incontro', 'moneyline', 'ml', 'esito', 'finale', '1', '2', 'home', 'away'
+}
+
+
+def surname(player: str) -> str:
+    """Cognome normalizzato ("J. Sinner", "Jannik Sinner", "Sinner J." -> "sinner")"""
+    tokens = [t for t in normalize_name(player).split() if len(t) > 1]
+    return tokens[-1] if tokens else normalize_name(player)
+
+
+def player_key(player1: str, player2: str) -> frozenset:
+    """Chiave della partita indipendente dall'ordine dei giocatori"""
+    return frozenset((surname(player1), surname(player2)))
+
+
+class TennisResultsIndex:
+    """
+    Indice data -> {coppia di cognomi: partita normalizzata}.
+    Ogni giorno viene scaricato in blocco; finché non è definitivo (vedi
+    is_final) viene riscaricato al massimo ogni DAY_REFRESH_SECONDS, e i tornei
+    con partite aperte al massimo ogni TOURNAMENT_REFRESH_SECONDS. In memoria
+    restano gli ultimi MAX_DAYS giorni usati.
+    """
+
+    def __init__(self, router: ProviderRouter):
+        self.router = router
+        # data -> {'fetched_at', 'final', 'matches': {coppia: partita}, 'tournaments': {torneo: istante}}
+        self._days: Dict[str, Dict] = {}
+        self._lock = threading.Lock()  # protegge _days e _day_locks (mai tenuto durante la rete)
+        self._day_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def is_final(date: str, fetched_at: float) -> bool:
+        """Scaricato ben dopo la fine del giorno: non può più cambiare"""
+        day_end = datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)
+        return fetched_at >= (day_end + timedelta(hours=FINAL_AFTER_HOURS)).timestamp()
+
+    def _day_lock(self, date: str) -> threading.Lock:
+        """Un download alla volta per giorno; gli altri giorni restano consultabili"""
+        with self._lock:
+            return self._day_locks.setdefault(date, threading.Lock())
+
+    @staticmethod
+    def _index(day: Dict, matches: List[Dict], now: float):
+        for match in matches:
+            day['matches'][player_key(match['home'], match['away'])] = match
+            day['tournaments'][match['tournament']] = now
+
+    def _evict(self):
+        """Scarta i giorni usati meno di recente oltre MAX_DAYS (chiamato con _lock)"""
+        while len(self._days) > MAX_DAYS:
+            oldest = min(self._days, key=lambda d: self._days[d]['used_at'])
+            del self._days[oldest]
+            self._day_locks.pop(oldest, None)
+
+    def load_day(self, date: str):
+        """Scarica in blocco le partite del giorno (di nuovo se non è definitivo e il dato è vecchio)"""
+        with self._day_lock(date):
+            with self._lock:
+                day = self._days.get(date)
+                if day is not None:
+                    day['used_at'] = time.time()
+                    if day['final'] or time.time() - day['fetched_at'] < DAY_REFRESH_SECONDS:
+                        return
+
+            matches = self.router.run('tennis_matches', lambda p: p.tennis_matches(date))
+            now = time.time()
+            day = {'fetched_at': now, 'used_at': now, 'final': self.is_final(date, now),
+                   'matches': {}, 'tournaments': {}}
+            self._index(day, matches, now)
+            with self._lock:
+                self._days[date] = day
+                self._evict()
+
+    def refresh_tournament(self, date: str, tournament: str):
+        """Riscarica solo il torneo indicato, se l'ultimo download è vecchio"""
+        with self._day_lock(date):
+            with self._lock:
+                day = self._days.get(date)
+                if day is None or time.time() - day['tournaments'].get(tournament, 0) < TOURNAMENT_REFRESH_SECONDS:
+                    return
+
+            matches = self.router.run('tennis_matches', lambda p: p.tennis_matches(date, tournament))
+            with self._lock:
+                self._index(day, matches, time.time())
+
+    def _lookup(self, date: str, key: frozenset) -> Optional[Dict]:
+        with self._lock:
+            return self._days.get(date, {}).get('matches', {}).get(key)
+
+    def find(self, player1: str, player2: str, date: str) -> Optional[Dict]:
+        """Partita tra i due giocatori in quella data (aggiornata se non conclusa)"""
+        self.load_day(date)
+        key = player_key(player1, player2)
+        match = self._lookup(date, key)
+        if match and not match['finished']:
+            self.refresh_tournament(date, match['tournament'])
+            match = self._lookup(date, key)
+        return match
+
+
+def oriented(match: Dict, player: str) -> Tuple[List[Tuple[int, int]], bool]:
+    """Set dal punto di vista di `player` e True se è lui il vincitore"""
+    is_home = surname(player) == surname(match['home'])
+    sets = match['sets'] if is_home else [(b, a) for a, b in match['sets']]
+    return sets, match['winner'] == ('home' if is_home else 'away')
+
+
+def pick_player(bet_type: str, match_string_players: Tuple[str, str]) -> Optional[str]:
+    """Giocatore scelto nella scommessa: cognome nel testo, oppure 1/2"""
+    bet_norm = normalize_name(bet_type)
+    for player in match_string_players:
+        if surname(player) and surname(player) in bet_norm.split():
+            return player
+    tokens = bet_norm.split()
+    if '1' in tokens or 'home' in tokens:
+        return match_string_players[0]
+    if '2' in tokens or 'away' in tokens:
+        return match_string_players[1]
+    return None
+
+
+def named_player(bet_type: str, match_string_players: Tuple[str, str]) -> Optional[str]:
+    """Giocatore citato per cognome nel testo (niente 1/2)"""
+    tokens = normalize_name(bet_type).split()
+    for player in match_string_players:
+        if surname(player) and surname(player) in tokens:
+            return player
+    return None
+
+
+def is_moneyline(bet_type: str, players: Tuple[str, str]) -> bool:
+    """
+    True se il testo è solo un testa a testa: nomi dei giocatori, 1/2 e parole
+    come "vincente". Handicap, game, set e ogni altro mercato restano fuori.
+    """
+    names = {token for player in players for token in normalize_name(player).split()}
+    for token in normalize_name(bet_type).split():
+        if token in names or token in MONEYLINE_WORDS:
+            continue
+        if len(token) == 1 and token.isalpha():
+            continue  # iniziale del nome ("J. Sinner")
+        return False
+    return True
+
+
+def evaluate_tennis_bet(bet_type: str, match: Dict, players: Tuple[str, str]) -> Optional[bool]:
+    """
+    Valuta i mercati tennis dai punteggi: vincente, over/under game o set,
+    risultato esatto in set (es. "Sinner 2-1"). None se il mercato non è
+    riconosciuto (handicap, primo set, "almeno un set"...): meglio lasciare la
+    scommessa in corso che chiuderla come testa a testa.
+    """
+    bet_lower = bet_type.lower()
+    sets = match['sets']
+
+    if 'handicap' in bet_lower or re.search(r'(?:^|[^\d\s.])\s*[+-]\s*\d', bet_type):
+        return None
+
+    # Over/Under game (o set se specificato)
+    if 'over' in bet_lower or 'under' in bet_lower:
+        numbers = re.findall(r'\d+\.?\d*', bet_type)
+        if not numbers:
+            return None
+        threshold = float(numbers[0])
+        if re.search(r'\bset\b', bet_lower):
+            total = len(sets)
+        else:
+            total = sum(a + b for a, b in sets)
+        return total > threshold if 'over' in bet_lower else total < threshold
+
+    # Risultato esatto in set ("Sinner 2-1"): serve il cognome
+    score = re.fullmatch(r'\s*(?:risultato esatto\s*:?\s*)?(.*?)\s*(\d)\s*[-:]\s*(\d)\s*(?:set)?\s*', bet_lower)
+    if score:
+        player = named_player(bet_type, players)
+        if player is None or not is_moneyline(score.group(1), players):
+            return None
+        player_sets, _ = oriented(match, player)
+        won_sets = sum(1 for a, b in player_sets if a > b)
+        lost_sets = sum(1 for a, b in player_sets if b > a)
+        return (won_sets, lost_sets) == (int(score.group(2)), int(score.group(3)))
+
+    # Vincente (testa a testa): solo se il testo non dice altro
+    player = pick_player(bet_type, players)
+    if player is None or not is_moneyline(bet_type, players):
+        return None
+    _, player_won = oriented(match, player)
+    return player_won
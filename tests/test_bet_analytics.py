@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from bet_analytics import (BetColumns, advanced_stats, bankroll_curve, calibration, longest_streaks,
+                           max_drawdown, odds_bucket_report, parse_timestamp)
+from bet_records import BetRecord
+
+
+def record(sport, quota, won, day, importo=10.0, analyzed_at=None):
+    pnl = None if won is None else (importo * (quota - 1) if won else -importo)
+    return BetRecord(sport, 'Casa vs Ospiti', '1', None, quota, importo, importo * quota,
+                     f'{day:02d}/03/2026', '', '', won, pnl, analyzed_at or f'2026-03-{day:02d}T12:00:00')
+
+
+@pytest.fixture
+def bets():
+    # Fuori ordine: le colonne vengono riordinate per data
+    return [
+        record('Calcio', 3.0, True, 4),
+        record('NBA', 2.0, True, 1),
+        record('Tennis', 1.5, None, 5),
+        record('NBA', 2.0, False, 2),
+        record('Calcio', 1.25, False, 3),
+    ]
+
+
+def test_parse_timestamp():
+    bet = record('Calcio', 2.0, True, 1)
+    assert parse_timestamp(bet) > 0
+    bet.date = 'ieri sera'
+    assert parse_timestamp(bet) == datetime(2026, 3, 1, 12, 0).timestamp()
+    bet.analyzed_at = ''
+    assert parse_timestamp(bet) == 0.0
+
+
+def test_columns_sorted_by_date(bets):
+    columns = BetColumns.from_bets(bets)
+    assert columns.odds.tolist() == [2.0, 2.0, 1.25, 3.0, 1.5]
+    assert [columns.sports[code] for code in columns.sport_code] == ['NBA', 'NBA', 'Calcio', 'Calcio', 'Tennis']
+    assert columns.settled.tolist() == [True, True, True, True, False]
+
+
+def test_extend_remaps_sports(bets):
+    merged = BetColumns.from_bets(bets[:2]).extend(BetColumns.from_bets(bets[2:]))
+    full = BetColumns.from_bets(bets)
+    assert merged.sports == full.sports
+    assert merged.sport_code.tolist() == full.sport_code.tolist()
+    assert merged.pnl.tolist() == full.pnl.tolist()
+
+
+def test_curve_drawdown_streaks(bets):
+    columns = BetColumns.from_bets(bets)
+    curve = bankroll_curve(columns)
+    assert curve.tolist() == [10.0, 0.0, -10.0, 10.0]
+    assert max_drawdown(curve) == 20.0
+    assert max_drawdown(np.array([-5.0, -3.0])) == 5.0  # il picco di partenza è 0
+    assert max_drawdown(np.array([])) == 0.0
+    assert longest_streaks(columns.outcome) == {'win': 1, 'loss': 2}
+    assert longest_streaks(np.array([-1, -1], dtype=np.int8)) == {'win': 0, 'loss': 0}
+
+
+def test_odds_buckets(bets):
+    report = odds_bucket_report(BetColumns.from_bets(bets))
+    assert [(b['low'], b['high'], b['bets']) for b in report] == [(1.0, 1.5, 1), (2.0, 3.0, 2), (3.0, 5.0, 1)]
+    middle = report[1]
+    assert (middle['roi'], middle['hit_rate'], middle['implied']) == (0.0, 50.0, 50.0)
+    assert report[2]['roi'] == 200.0
+
+
+def test_calibration(bets):
+    result = calibration(BetColumns.from_bets(bets))
+    implied = np.array([0.5, 0.5, 0.8, 1 / 3])
+    won = np.array([1.0, 0.0, 0.0, 1.0])
+    assert result['brier'] == pytest.approx(np.mean((implied - won) ** 2))
+    assert result['edge'] == pytest.approx(np.mean(won - implied) * 100)
+    assert sum(row['bets'] for row in result['table']) == 4
+    assert calibration(BetColumns.from_bets([])) == {'brier': None, 'edge': None, 'table': []}
+
+
+def test_advanced_stats(bets):
+    stats = advanced_stats(BetColumns.from_bets(bets))
+    assert (stats['bets'], stats['settled'], stats['profit'], stats['peak'], stats['max_drawdown']) == \
+        (5, 4, 10.0, 10.0, 20.0)
@@ -0,0 +1,76 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import bet_extraction
+from bet_extraction import BET_SCHEMA, cached_bet_info, extraction_key, generate_bet_info
+from metrics import Metrics
+from shared_cache import MemoryCache
+
+SLIP = {'sport': 'Calcio', 'match': 'Inter vs Milan', 'bet_type': '1', 'player': None,
+        'quota': 1.85, 'importo': 10, 'vincita_potenziale': 18.5, 'date': '01/03/2026 20:45', 'legs': []}
+
+
+class FakeModel:
+    def __init__(self, text, error=None):
+        self.text = text
+        self.error = error
+        self.calls = []
+
+    def generate_content(self, parts, generation_config=None):
+        self.calls.append((parts, generation_config))
+        if self.error:
+            raise self.error
+        usage = SimpleNamespace(prompt_token_count=1200, candidates_token_count=80)
+        return SimpleNamespace(text=self.text, usage_metadata=usage)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = Metrics()
+    monkeypatch.setattr(bet_extraction, 'metrics', registry)
+    monkeypatch.setattr(bet_extraction, 'cache', MemoryCache())
+    return registry
+
+
+def test_schema_and_usage_metrics(registry):
+    model = FakeModel(json.dumps(SLIP))
+    bet_info = generate_bet_info(model, ['prompt', b'img'], 'image', payload_bytes=200 * 1024)
+    assert (bet_info['match'], bet_info['quota'], bet_info['importo']) == ('Inter vs Milan', 1.85, 10.0)
+
+    config = model.calls[0][1]
+    assert config['response_schema'] is BET_SCHEMA
+    assert config['response_mime_type'] == 'application/json'
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters'] == {'gemini.image.calls': 1}
+    series = snapshot['series']
+    assert series['gemini.image.input_tokens']['total'] == 1200
+    assert series['gemini.image.output_tokens']['total'] == 80
+    assert series['gemini.image.image_kb']['total'] == 200
+    assert series['gemini.image.latency_s']['count'] == 1
+
+
+@pytest.mark.parametrize('text', ['non è json', json.dumps({'sport': 'Calcio'}), 'null'])
+def test_invalid_response_counted(registry, text):
+    assert generate_bet_info(FakeModel(text), ['prompt'], 'text') is None
+    assert registry.snapshot()['counters'] == {'gemini.text.calls': 1, 'gemini.text.invalid': 1}
+
+
+def test_api_error_counted(registry):
+    assert generate_bet_info(FakeModel('', error=RuntimeError('quota')), ['prompt'], 'text') is None
+    assert registry.snapshot()['counters'] == {'gemini.text.errors': 1}
+
+
+def test_result_cached_under_key(registry):
+    key = extraction_key('image', b'img')
+    assert cached_bet_info(key, 'image') is None
+    bet_info = generate_bet_info(FakeModel(json.dumps(SLIP)), ['prompt', b'img'], 'image', cache_key=key)
+    assert cached_bet_info(key, 'image') == bet_info
+    assert registry.snapshot()['counters']['gemini.image.cached'] == 1
+
+    # Risposta non valida: niente in cache
+    other = extraction_key('image', b'altra')
+    generate_bet_info(FakeModel('{}'), ['prompt'], 'image', cache_key=other)
+    assert cached_bet_info(other, 'image') is None
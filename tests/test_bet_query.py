@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from bet_query import WON, StatsIndex, market_of, merge_stats, parse_query, record_stats
+from bet_records import BetRecord
+
+NOW = datetime(2026, 3, 15, 12, 0)
+
+
+def record(sport, bet_type, quota, won, day, player=None, importo=10.0):
+    pnl = None if won is None else (importo * (quota - 1) if won else -importo)
+    return BetRecord(sport, 'Casa vs Ospiti', bet_type, player, quota, importo, importo * quota,
+                     f'{day:02d}/03/2026', '', '', won, pnl, f'2026-03-{day:02d}T12:00:00', chat_id=1)
+
+
+@pytest.fixture
+def bets():
+    return [
+        record('NBA', 'Over 25.5 punti', 2.1, True, 2, player='LeBron James'),
+        record('NBA', 'Vincente', 1.5, False, 5),
+        record('Calcio', '1', 2.4, True, 10),
+        record('Calcio', 'Over 2.5', 1.9, None, 14),
+        record('NBA', 'Under 8.5 rimbalzi', 2.5, False, 14, player='Anthony Davis'),
+        record('Tennis', 'Sinner +3.5 games', 1.8, True, 1),
+    ]
+
+
+def test_market_of(bets):
+    assert [market_of(b) for b in bets] == ['giocatore', 'esito', 'esito', 'overunder', 'giocatore', 'handicap']
+
+
+def test_parse_query():
+    query = parse_query(['sport:nba', 'mercato:giocatore', 'quota>2', 'mese', 'esito:vinte'], now=NOW)
+    assert (query.sport, query.market, query.min_odds, query.outcome) == ('nba', 'giocatore', 2.0, WON)
+    assert query.since == datetime(2026, 3, 1).timestamp()
+    query = parse_query(['quota:1.5-2,5', 'dal:01/03/2026', 'al:10/03/2026'], now=NOW)
+    assert (query.min_odds, query.max_odds) == (1.5, 2.5)
+    assert query.until == datetime(2026, 3, 11).timestamp()
+    for bad in (['sport'], ['mercato:boh'], ['esito:forse'], ['dal:ieri'], ['colore:rosso']):
+        with pytest.raises(ValueError):
+            parse_query(bad, now=NOW)
+
+
+def test_select(bets):
+    index = StatsIndex.from_bets(bets)
+    select = lambda *args: index.select(parse_query(list(args), now=NOW)).tolist()
+    assert select('sport:nba', 'mercato:giocatore', 'quota>2') == [0, 4]
+    assert select('giocatore:lebron') == [0]
+    assert select('esito:in_corso') == [3]
+    assert select('dal:05/03/2026', 'al:14/03/2026', 'sport:calcio') == [2, 3]
+    assert select('sport:golf') == []
+    assert select() == list(range(len(bets)))
+
+
+def test_odds_bounds_strict_and_inclusive():
+    bets = [record('NBA', 'Vincente', odds, True, 1) for odds in (1.5, 2.0, 2.5)]
+    index = StatsIndex.from_bets(bets)
+    select = lambda *args: index.select(parse_query(list(args), now=NOW)).tolist()
+    assert select('quota>2') == [2]
+    assert select('quota>=2') == [1, 2]
+    assert select('quota<2') == [0]
+    assert select('quota<=2') == [0, 1]
+    assert select('quota:1.5-2') == [0, 1]
+    assert select('quota:2') == [1]
+
+
+def test_replace_moves_between_indexes(bets):
+    index = StatsIndex.from_bets(bets)
+    settled = record('Calcio', 'Over 2.5', 1.9, True, 14)
+    index.replace(3, bets[3], settled)
+    assert index.select(parse_query(['esito:in_corso'], now=NOW)).tolist() == []
+    assert index.select(parse_query(['esito:vinte', 'sport:calcio'], now=NOW)).tolist() == [2, 3]
+
+    # Da mercato over/under a giocatore: la chiave vuota sparisce dall'indice
+    prop = record('NBA', 'Over 20.5 punti', 1.9, None, 14, player='Jayson Tatum')
+    index.replace(3, settled, prop)
+    assert 'overunder' not in index.by_market
+    assert index.select(parse_query(['giocatore:tatum'], now=NOW)).tolist() == [3]
+
+
+def test_single_aggregation_path(bets):
+    # Riepilogo incrementale (merge dei contributi) == aggregato della query senza filtri
+    incremental = {}
+    for bet in bets:
+        merge_stats(incremental, record_stats(bet))
+    index = StatsIndex.from_bets(bets)
+    aggregated = index.aggregate(np.arange(index.count))
+    assert aggregated.keys() == incremental.keys()
+    for sport, stats in aggregated.items():
+        assert stats == pytest.approx(incremental[sport])
+
+    nba = incremental['NBA']
+    assert (nba['total_bets'], nba['won'], nba['lost'], nba['pending']) == (3, 1, 2, 0)
+    assert nba['total_profit_loss'] == pytest.approx(11.0 - 10.0 - 10.0)
+    assert incremental['Calcio']['pending'] == 1
+
+
+def test_merge_stats_removes_contribution(bets):
+    stats = {}
+    for bet in bets:
+        merge_stats(stats, record_stats(bet))
+    merge_stats(stats, record_stats(bets[3]), -1)
+    merge_stats(stats, record_stats(record('Calcio', 'Over 2.5', 1.9, False, 14)))
+    assert (stats['Calcio']['pending'], stats['Calcio']['lost']) == (0, 1)
+    assert stats['Calcio']['total_profit_loss'] == pytest.approx(14.0 - 10.0)
@@ -0,0 +1,55 @@
+import pytest
+
+from bet_records import bet_info_fingerprint, normalize_bet_info, parse_amount
+
+
+@pytest.mark.parametrize('value, expected', [
+    ("1.250,00", 1250.0),
+    ("1,250.00", 1250.0),
+    ("10,5", 10.5),
+    ("10.5", 10.5),
+    ("1,75", 1.75),
+    ("250.00 €", 250.0),
+    ("€ 1.250,50", 1250.5),
+    ("1.250.000", 1250000.0),
+    ("1,250,000.75", 1250000.75),
+    ("-3,5", -3.5),
+    (1.75, 1.75),
+    (10, 10.0),
+])
+def test_parse_amount(value, expected):
+    assert parse_amount(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value, money, expected', [
+    ("1.250", True, 1250.0),
+    ("1.000 €", True, 1000.0),
+    ("-2.500", True, -2500.0),
+    ("1.250", False, 1.25),     # quota a tre decimali
+    ("12.50", True, 12.5),
+    ("1,250", True, 1.25),      # la virgola resta decimale
+])
+def test_parse_amount_money_thousands(value, money, expected):
+    assert parse_amount(value, money=money) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('value', [None, True, "", "n/d", "€"])
+def test_parse_amount_invalid(value):
+    assert parse_amount(value) is None
+
+
+def test_fingerprint_tolerates_ocr_noise():
+    first = {'match': 'Lakers vs Celtics', 'bet_type': 'Vincente', 'player': None,
+             'quota': 1.8, 'importo': 10.0, 'date': '01/03/2026'}
+    second = {**first, 'match': ' lakers  VS celtics ', 'quota': 1.80001}
+    assert bet_info_fingerprint(1, first) == bet_info_fingerprint(1, second)
+    assert bet_info_fingerprint(1, first) != bet_info_fingerprint(2, first)
+    assert bet_info_fingerprint(1, first) != bet_info_fingerprint(1, {**first, 'importo': 20.0})
+
+
+def test_normalize_bet_info_amounts():
+    info = normalize_bet_info({'sport': 'NBA', 'match': 'A vs B', 'bet_type': 'Vincente',
+                               'quota': '1,85', 'importo': '1.250,00', 'vincita_potenziale': '2,312.50'})
+    assert (info['quota'], info['importo'], info['vincita_potenziale']) == (1.85, 1250.0, 2312.5)
+    info = normalize_bet_info({**info, 'quota': '1.850', 'importo': '1.000', 'vincita_potenziale': None})
+    assert (info['quota'], info['importo'], info['vincita_potenziale']) == (1.85, 1000.0, 1850.0)
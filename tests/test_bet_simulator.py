@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import bet_simulator
+from bet_analytics import BetColumns
+from bet_records import BetRecord
+
+
+def record(quota, won, day):
+    pnl = None if won is None else (10 * (quota - 1) if won else -10.0)
+    return BetRecord('NBA', 'Lakers vs Celtics', 'Vincente', None, quota, 10.0, 10 * quota,
+                     f'{day:02d}/03/2026', '', '', won, pnl, f'2026-03-{day:02d}T12:00:00')
+
+
+@pytest.fixture
+def columns():
+    bets = [record(1.8 + 0.1 * (i % 5), i % 3 != 0, 1 + i % 28) for i in range(60)]
+    bets.append(record(2.0, None, 28))
+    return BetColumns.from_bets(bets)
+
+
+def test_chunk_paths_within_budget():
+    budget = 1024 * 1024
+    for n_bets in (1, 50, 1000, 100000):
+        chunk = bet_simulator.chunk_paths(n_bets, budget)
+        assert chunk >= 1
+        assert chunk == 1 or chunk * n_bets * bet_simulator.BYTES_PER_CELL <= budget
+    # Storico enorme: un percorso alla volta, mai zero
+    assert bet_simulator.chunk_paths(10 ** 9, budget) == 1
+    assert bet_simulator.chunk_paths(0, budget) >= 1
+
+
+@pytest.mark.parametrize('strategy, fraction', [('flat', 0.02), ('percent', 0.02), ('kelly', 0.5)])
+def test_simulate_deterministic_with_seed(columns, strategy, fraction):
+    first = bet_simulator.simulate(columns, strategy, fraction, paths=300, workers=1, seed=7)
+    second = bet_simulator.simulate(columns, strategy, fraction, paths=300, workers=1, seed=7)
+    assert first == second
+    assert first['bets'] == 60  # la scommessa in corso è esclusa
+    assert len(first['checkpoints']) == len(first['curve'][50])
+    assert 0 <= first['risk_of_ruin'] <= 100
+
+
+def test_simulate_chunked_covers_all_paths(columns, monkeypatch):
+    # Blocchi da 7 percorsi: 50 percorsi -> 8 blocchi, l'ultimo da 1
+    sizes = []
+    simulate_chunk = bet_simulator._simulate_chunk
+
+    def spy(job):
+        sizes.append(job[3])
+        return simulate_chunk(job)
+
+    monkeypatch.setattr(bet_simulator, 'chunk_paths', lambda n_bets: 7)
+    monkeypatch.setattr(bet_simulator, '_simulate_chunk', spy)
+    result = bet_simulator.simulate(columns, 'percent', 0.02, paths=50, workers=1, seed=1)
+    assert sizes == [7] * 7 + [1]
+    assert result['paths'] == 50
+    assert np.isfinite(result['final'][50])
+
+
+def test_simulate_without_settled_bets():
+    columns = BetColumns.from_bets([record(2.0, None, 1)])
+    assert bet_simulator.simulate(columns, 'flat', 0.02, paths=10, workers=1) is None
+
+
+def test_simulate_unknown_strategy(columns):
+    with pytest.raises(ValueError):
+        bet_simulator.simulate(columns, 'martingala', 0.02, paths=10, workers=1)
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+import bet_store
+from bet_records import BetRecord
+from bet_store import BetStore
+from history_archive import HistoryArchive
+
+
+def record(n, won=None, month='2026-03'):
+    return BetRecord('NBA', f'Partita {n}', 'Vincente', None, 2.0, 10.0, 20.0, '01/03/2026',
+                     '', '', won, None, f'{month}-01T12:00:{n % 60:02d}', chat_id=1)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BetStore(str(tmp_path / 'bets.jsonl'))
+    store.extend(record(n) for n in range(10))
+    return store
+
+
+def test_replace_appends_without_rewriting(store):
+    with open(store.path, 'rb') as f:
+        before = f.read()
+    store.replace(3, record(3, won=True))
+
+    with open(store.path, 'rb') as f:
+        after = f.read()
+    assert after.startswith(before)
+    assert after[len(before):].count(b'\n') == 1
+    assert store[3].won is True
+    assert [r.match for r in store] == [f'Partita {n}' for n in range(10)]
+    assert [r.won for r in store.iter_from(2, 5)] == [None, True, None]
+
+
+def test_replace_survives_reopen_and_rebuild(store):
+    store.replace(9, record(9, won=False))
+    store.replace(0, record(0, won=True))
+    store.append(record(10))
+
+    reopened = BetStore(store.path)
+    assert len(reopened) == 11
+    assert (reopened[0].won, reopened[9].won, reopened[10].match) == (True, False, 'Partita 10')
+
+    reopened.rebuild_index()
+    assert [r.won for r in reopened] == [True] + [None] * 8 + [False, None]
+
+
+def test_interrupted_replace_is_recovered(store):
+    # Riga di sostituzione scritta, indice non aggiornato (crash tra le due scritture)
+    with open(store.path, 'ab') as f:
+        f.write(bet_store.encode_line(record(4, won=True), replaces=4))
+
+    reopened = BetStore(store.path)
+    assert len(reopened) == 10
+    assert reopened[4].won is True
+
+
+def test_compaction_drops_superseded_lines(store, monkeypatch):
+    monkeypatch.setattr(bet_store, 'COMPACT_MIN_GARBAGE', 5)
+    for n in range(9):
+        store.replace(n % 3, record(n % 3, won=n % 2 == 0))
+    # Compattato a 10 sostituzioni (tante quanti i record): qui ne restano 9 in coda
+    with open(store.path, 'rb') as f:
+        assert f.read().count(b'\n') == 19
+    store.replace(5, record(5, won=True))
+    with open(store.path, 'rb') as f:
+        assert f.read().count(b'\n') == 10
+    assert [r.won for r in store][:6] == [True, False, True, None, None, True]
+
+
+def test_archive_rotation_writes_only_live_records(tmp_path, monkeypatch):
+    monkeypatch.setattr('history_archive.current_month', lambda: '2026-03')
+    archive = HistoryArchive(str(tmp_path / 'history'))
+    for n in range(3):
+        archive.append(record(n))
+    archive.replace(1, record(1, won=True))
+    archive.rotate()
+    assert archive.manifest["segments"][0]["count"] == 3
+    assert [r.won for r in archive] == [None, True, None]
+
+
+def test_archive_replace_discards_unpinned_revisions(tmp_path):
+    archive = HistoryArchive(str(tmp_path / 'history'))
+    archive.extend([record(0, month='2026-01'), record(1, month='2026-01'), record(2, month='2026-02')])
+    archive.rotate()
+    first = archive.manifest["segments"][0]["file"]
+
+    archive.replace(0, record(0, won=True))
+    second = archive.manifest["segments"][0]["file"]
+    assert not os.path.exists(os.path.join(archive.directory, first))
+
+    # Un backup referenzia la revisione corrente: la riscrittura successiva la conserva
+    archive.snapshot({})
+    archive.replace(1, record(1, won=False))
+    assert os.path.exists(os.path.join(archive.directory, second))
+    assert [r.won for r in HistoryArchive(archive.directory)] == [True, False, None]
+
+    archive.clear()
+    assert os.path.exists(os.path.join(archive.directory, second))
+    remaining = [name for name in os.listdir(archive.directory) if name.endswith('.gz')]
+    assert sorted(remaining) == sorted(archive.manifest["pinned"])
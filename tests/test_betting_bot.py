@@ -0,0 +1,186 @@
+import asyncio
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import betting_bot_complete as bot
+from bet_records import BetRecord, normalize_bet_info
+
+PENDING = {'result': '⏳ In corso', 'bet_won': None}
+WON = {'result': 'Inter 2-0 Milan', 'bet_won': True}
+
+
+def slip(**overrides):
+    raw = {'sport': 'Calcio', 'match': 'Inter vs Milan', 'bet_type': '1', 'player': None,
+           'quota': '2,00', 'importo': '10', 'vincita_potenziale': '20', 'date': '01/03/2026 20:45'}
+    return normalize_bet_info({**raw, **overrides})
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return bot.BettingAnalyzer()
+
+
+def test_import_has_no_side_effects(tmp_path):
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, '-c', 'import betting_bot_complete as b; assert b.analyzer is None'],
+                   cwd=tmp_path, env={**os.environ, 'PYTHONPATH': repo, 'CACHE_URL': 'sqlite:///cache.db'},
+                   check=True)
+    assert os.listdir(tmp_path) == []
+
+
+def test_resent_slip_updates_instead_of_counting_twice(analyzer):
+    record, duplicate = analyzer.add_bet(slip(), PENDING, chat_id=7)
+    assert not duplicate
+    record, duplicate = analyzer.add_bet(slip(quota='2.00'), WON, chat_id=7)
+    assert duplicate and record.won is True
+    assert len(analyzer.history["bets"]) == 1
+    stats = analyzer.history["stats_by_sport"]["Calcio"]
+    assert (stats["total_bets"], stats["won"], stats["pending"], stats["total_profit_loss"]) == (1, 1, 0, 10.0)
+
+    # Altra chat, stessa schedina: è una scommessa diversa
+    _, duplicate = analyzer.add_bet(slip(), PENDING, chat_id=8)
+    assert not duplicate
+
+
+def test_legacy_record_without_chat_is_a_duplicate(analyzer):
+    info = slip()
+    legacy = BetRecord.from_result(info, PENDING, None, '2026-03-01T21:00:00')
+    analyzer.history["bets"].append(legacy)
+    analyzer.dedup.add(legacy.fingerprint(), 0)
+    analyzer.update_sport_stats(legacy, +1)
+
+    record, duplicate = analyzer.add_bet(slip(), WON, chat_id=7)
+    assert duplicate and record.won is True and record.chat_id == 7
+    assert len(analyzer.history["bets"]) == 1
+    # Il reinvio successivo si trova con l'impronta della chat
+    _, duplicate = analyzer.add_bet(slip(), WON, chat_id=7)
+    assert duplicate and len(analyzer.history["bets"]) == 1
+
+
+def test_pending_football_follows_add_bet(analyzer):
+    analyzer.add_bet(slip(), PENDING, chat_id=7)
+    analyzer.add_bet(slip(match='Roma vs Lazio'), PENDING)  # nessuna chat da avvisare
+    analyzer.add_bet(slip(sport='NBA', match='Lakers vs Celtics'), PENDING, chat_id=7)
+    assert [position for position, _ in analyzer.pending_football_bets()] == [0]
+
+    analyzer.add_bet(slip(match='Juventus vs Napoli'), PENDING, chat_id=7)
+    assert [position for position, _ in analyzer.pending_football_bets()] == [0, 3]
+
+    settled = analyzer.settle_bet(analyzer.history["bets"][0], WON)
+    assert settled.won is True
+    assert [position for position, _ in analyzer.pending_football_bets()] == [3]
+
+
+def test_filtered_stats_match_summary(analyzer):
+    analyzer.add_bet(slip(), WON, chat_id=7)
+    analyzer.add_bet(slip(match='Roma vs Lazio', quota='3,00', vincita_potenziale='30'), PENDING, chat_id=7)
+    count, text = analyzer.query_stats([])
+    assert count == 2
+    assert text == analyzer.render_stats_summary()
+    count, _ = analyzer.query_stats(['quota>2.5'])
+    assert count == 1
+
+
+def test_non_slip_text_hint_only_in_private(monkeypatch):
+    replies = []
+
+    async def reply(message, text, **kwargs):
+        replies.append((message.chat.type, text))
+
+    monkeypatch.setattr(bot.outbox, 'reply', reply)
+    for chat_type in ('group', 'supergroup', 'private'):
+        chat = SimpleNamespace(id=1, type=chat_type)
+        update = SimpleNamespace(message=SimpleNamespace(text='Ciao a tutti!', chat=chat), effective_chat=chat)
+        asyncio.run(bot.handle_text(update, None))
+    assert [chat_type for chat_type, _ in replies] == ['private']
+
+
+def test_pending_football_seeded_from_hot_segment(analyzer):
+    old = BetRecord.from_result(slip(match='Roma vs Lazio'), PENDING, None, '2026-01-10T21:00:00', 7)
+    analyzer.history["bets"].extend([old])
+    analyzer.add_bet(slip(), PENDING, chat_id=7)  # mese corrente: il gennaio va nei segmenti freddi
+    bets = analyzer.history["bets"]
+    assert bets.hot_start == 1
+    bets._cold_cache = (None, [])
+
+    assert [position for position, _ in analyzer.pending_football_bets()] == [1]
+    assert bets._cold_cache == (None, [])  # nessun segmento freddo decompresso
+
+
+class FakeOutbox:
+    def __init__(self, failures=0):
+        self.sent = []
+        self.failures = failures
+
+    async def send(self, bot_, chat_id, text, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('rete non disponibile')
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def summaries(analyzer, monkeypatch):
+    monkeypatch.setattr(bot, 'analyzer', analyzer)
+    monkeypatch.setattr(bot, 'SUMMARY_DEBOUNCE', 0.02)
+    monkeypatch.setattr(bot, '_summary_tasks', {})
+    return SimpleNamespace(bot=None)
+
+
+def test_summary_debounced_per_burst(summaries, monkeypatch):
+    box = FakeOutbox()
+    monkeypatch.setattr(bot, 'outbox', box)
+
+    async def scenario():
+        for _ in range(5):  # raffica di schedine nella stessa chat
+            bot.schedule_summary(summaries, 1)
+            await asyncio.sleep(0.005)
+        bot.schedule_summary(summaries, 2)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert sorted(chat for chat, _ in box.sent) == [1, 2]
+    assert box.sent[0][1].startswith('📊 *RIEPILOGO AGGIORNATO*')
+    assert bot._summary_tasks == {}
+
+
+def test_summary_rescheduled_after_failed_send(summaries, monkeypatch):
+    box = FakeOutbox(failures=1)
+    monkeypatch.setattr(bot, 'outbox', box)
+
+    async def scenario():
+        bot.schedule_summary(summaries, 1)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert [chat for chat, _ in box.sent] == [1]
+
+    # Invio sempre in errore: al massimo SUMMARY_RETRIES nuovi tentativi
+    box = FakeOutbox(failures=10)
+    monkeypatch.setattr(bot, 'outbox', box)
+    asyncio.run(scenario())
+    assert box.sent == [] and box.failures == 10 - (bot.SUMMARY_RETRIES + 1)
+
+
+def test_profile_window_task_owned_by_application(monkeypatch):
+    box = FakeOutbox()
+    monkeypatch.setattr(bot, 'outbox', box)
+    box.reply = lambda message, text, **kwargs: box.send(None, message.chat_id, text)
+    monkeypatch.setattr(bot, 'ADMIN_CHAT_IDS', {1})
+    created = []
+    application = SimpleNamespace(create_task=lambda coroutine: created.append(coroutine))
+    context = SimpleNamespace(args=['5s'], application=application)
+    update = SimpleNamespace(effective_chat=SimpleNamespace(id=1), message=SimpleNamespace(chat_id=1))
+
+    asyncio.run(bot.profile_command(update, context))
+    try:
+        assert len(created) == 1
+    finally:
+        for coroutine in created:
+            coroutine.close()
+        bot.profiler.end(bot.profiler.stop())
@@ -0,0 +1,91 @@
+import json
+import threading
+from datetime import datetime, timedelta
+
+import football_results
+from football_results import FootballResultsWarehouse
+
+
+class FakeRouter:
+    def __init__(self, matches):
+        self.matches = matches
+        self.calls = 0
+
+    def run(self, capability, call):
+        return call(self)
+
+    def football_matches(self, date, deadline=None):
+        self.calls += 1
+        return [dict(m, date=date) for m in self.matches]
+
+
+def make_match(home, away, score=(1, 0)):
+    return {'provider': 'fake', 'id': f'{home}-{away}', 'home': home, 'away': away,
+            'home_score': score[0], 'away_score': score[1], 'finished': True, 'status': 'FINISHED'}
+
+
+def test_is_final_uses_fetch_time_only():
+    day_end = datetime(2026, 3, 2)
+    assert not FootballResultsWarehouse.is_final('2026-03-01', (day_end + timedelta(minutes=5)).timestamp())
+    assert not FootballResultsWarehouse.is_final('2026-03-01', (day_end + timedelta(hours=11)).timestamp())
+    assert FootballResultsWarehouse.is_final('2026-03-01', (day_end + timedelta(hours=12)).timestamp())
+
+
+def test_day_fetched_after_midnight_is_refreshed(tmp_path, monkeypatch):
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    router = FakeRouter([make_match('Inter', 'Milan')])
+    warehouse = FootballResultsWarehouse(router, str(tmp_path))
+    assert warehouse.find('Roma', 'Lazio', yesterday) is None
+
+    # La partita serale arriva nello storico dopo il primo download
+    router.matches.append(make_match('Roma', 'Lazio', (2, 2)))
+    monkeypatch.setattr(football_results, 'REFRESH_SECONDS', 0)
+    assert warehouse.find('Roma', 'Lazio', yesterday)['home_score'] == 2
+    assert router.calls == 2
+
+
+def test_final_day_read_from_disk(tmp_path):
+    day = {'date': '2020-01-01', 'fetched_at': datetime(2020, 1, 3).timestamp(), 'final': True,
+           'matches': [make_match('Inter', 'Milan')]}
+    (tmp_path / '2020-01-01.json').write_text(json.dumps(day))
+    router = FakeRouter([])
+    warehouse = FootballResultsWarehouse(router, str(tmp_path))
+    assert warehouse.find('Inter', 'Milan', '2020-01-01')['home'] == 'Inter'
+    assert router.calls == 0
+
+
+def test_memory_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(football_results, 'MAX_DAYS', 2)
+    warehouse = FootballResultsWarehouse(FakeRouter([]), str(tmp_path))
+    for day in ('2020-01-01', '2020-01-02', '2020-01-03'):
+        warehouse.load_day(day)
+    assert list(warehouse._days) == ['2020-01-02', '2020-01-03']
+
+
+def test_download_does_not_block_other_days(tmp_path):
+    release = threading.Event()
+
+    class SlowRouter(FakeRouter):
+        def football_matches(self, date, deadline=None):
+            if date == '2020-01-01':
+                assert release.wait(5)
+            return super().football_matches(date, deadline)
+
+    router = SlowRouter([make_match('Inter', 'Milan')])
+    warehouse = FootballResultsWarehouse(router, str(tmp_path))
+    slow = [threading.Thread(target=warehouse.load_day, args=('2020-01-01',)) for _ in range(2)]
+    for thread in slow:
+        thread.start()
+
+    # Mentre il primo giorno scarica, un altro giorno si carica subito
+    other = threading.Thread(target=warehouse.load_day, args=('2020-01-02',))
+    other.start()
+    other.join(1)
+    loaded = not other.is_alive()
+    release.set()
+    other.join(5)
+    assert loaded
+    for thread in slow:
+        thread.join(5)
+    # Stesso giorno: un solo download per le due richieste
+    assert router.calls == 2
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from bet_records import BetRecord
+from football_watcher import FootballWatcher
+
+TODAY = datetime.now().strftime('%d/%m/%Y')
+
+
+def record(match, bet_type='1', chat_id=10):
+    return BetRecord('Calcio', match, bet_type, None, 2.0, 10.0, 20.0, TODAY,
+                     '', '', None, None, datetime.now().isoformat(), chat_id=chat_id)
+
+
+class FakeApi:
+    def __init__(self):
+        self.feed = []
+        self.feed_reads = 0
+        self.evaluated = []
+
+    def parse_date(self, date_string):
+        return datetime.strptime(date_string.split()[0], '%d/%m/%Y').strftime('%Y-%m-%d')
+
+    def extract_teams(self, match):
+        home, _, away = match.lower().partition(' vs ')
+        return home.strip(), away.strip()
+
+    def football_live_matches(self, date):
+        self.feed_reads += 1
+        return [dict(m) for m in self.feed]
+
+    def football_result(self, match, bet_type):
+        self.evaluated.append((match['home'], bet_type))
+        if not match['finished']:
+            return {'bet_won': None}
+        return {'bet_won': match['home_score'] > match['away_score'], 'result': 'ok'}
+
+
+def game(home, away, score=(0, 0), finished=False, id=None):
+    return {'provider': 'fake', 'id': id, 'home': home, 'away': away, 'home_score': score[0],
+            'away_score': score[1], 'status': 'FT' if finished else 'LIVE', 'finished': finished}
+
+
+def test_only_changed_matches_are_reevaluated():
+    api = FakeApi()
+    api.feed = [game('Inter', 'Milan', id=1), game('Roma', 'Lazio', id=2)]
+    watcher = FootballWatcher(api)
+    inter, roma = record('Inter vs Milan'), record('Roma vs Lazio')
+
+    assert watcher.poll([(0, inter), (1, roma)]) == []
+    assert len(api.evaluated) == 2
+
+    api.feed[0] = game('Inter', 'Milan', (1, 0), id=1)
+    watcher.poll([(0, inter), (1, roma)])
+    assert api.evaluated[2:] == [('Inter', '1')]
+
+    api.feed[0] = game('Inter', 'Milan', (2, 0), finished=True, id=1)
+    settled = watcher.poll([(0, inter), (1, roma)])
+    assert [(position, r.match, result['bet_won']) for position, r, result in settled] == [(0, 'Inter vs Milan', True)]
+    assert api.feed_reads == 3
+
+
+def test_state_follows_fingerprint_not_position():
+    api = FakeApi()
+    api.feed = [game('Inter', 'Milan', id=1), game('Roma', 'Lazio', id=2)]
+    watcher = FootballWatcher(api)
+    inter, roma = record('Inter vs Milan'), record('Roma vs Lazio')
+    watcher.poll([(0, inter), (1, roma)])
+
+    # Inter conclusa altrove: Roma ora arriva in un'altra posizione, la partita abbinata resta la sua
+    api.feed[1] = game('Roma', 'Lazio', (0, 1), finished=True, id=2)
+    settled = watcher.poll([(5, roma)])
+    assert [(position, r.match, result['bet_won']) for position, r, result in settled] == [(5, 'Roma vs Lazio', False)]
+    assert set(watcher._matched) == {roma.fingerprint()}
+
+
+def test_bets_of_other_days_skip_the_feed():
+    api = FakeApi()
+    old = record('Inter vs Milan')
+    old.date = '01/01/2020'
+    assert FootballWatcher(api).poll([(0, old)]) == []
+    assert api.feed_reads == 0
@@ -0,0 +1,61 @@
+import threading
+import time
+
+from multi_leg import combined_odds, evaluate_legs, summarize_legs
+
+WON = {'result': '2-0', 'bet_won': True}
+LOST = {'result': '0-1', 'bet_won': False}
+
+
+def leg(match, quota=2.0):
+    return {'match': match, 'bet_type': '1', 'player': None, 'quota': quota}
+
+
+def test_combined_odds():
+    assert combined_odds([leg('A', 1.5), leg('B', 2.1)]) == 3.15
+    assert combined_odds([leg('A', 1.5), leg('B', None)]) is None
+
+
+def test_all_legs_won():
+    result = evaluate_legs([leg('A'), leg('B'), leg('C')], lambda _: WON)
+    assert result['bet_won'] is True
+    assert result['result'] == 'Multipla vinta: 3/3 selezioni'
+    assert result['details'].count('✅') == 3
+
+
+def test_lost_leg_stops_remaining_checks():
+    legs = [leg(f'M{i}') for i in range(20)]
+    checked = []
+    lock = threading.Lock()
+
+    def check(selection):
+        with lock:
+            checked.append(selection['match'])
+        if selection['match'] == 'M1':
+            return LOST
+        time.sleep(0.02)  # richiesta API
+        return WON
+
+    result = evaluate_legs(legs, check, max_workers=1)
+    assert result['bet_won'] is False
+    assert result['result'] == 'Multipla persa: M1 (1)'
+    # Al massimo una verifica già partita dopo la selezione persa
+    assert len(checked) <= 3
+
+
+def test_failed_check_leaves_leg_pending():
+    def check(selection):
+        if selection['match'] == 'B':
+            raise RuntimeError('timeout')
+        return WON
+
+    result = evaluate_legs([leg('A'), leg('B')], check)
+    assert result['bet_won'] is None
+    assert [selection['won'] for selection in result['legs']] == [True, None]
+    assert result['found']
+
+
+def test_summarize_pending():
+    result = summarize_legs([leg('A'), leg('B')], [None, None])
+    assert result['bet_won'] is None and not result['found']
+    assert result['result'] == '⏳ Multipla in corso: 0/2 vinte, 2 da giocare'
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import outbox as outbox_module
+from outbox import Outbox
+
+
+class RetryAfter(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"Flood control exceeded. Retry in {seconds} seconds")
+        self.retry_after = seconds
+
+
+class FakeBot:
+    def __init__(self, flood=None):
+        self.sent = []  # (istante, chat, testo)
+        self.flood = dict(flood or {})  # chat -> secondi del primo RetryAfter
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id in self.flood:
+            raise RetryAfter(self.flood.pop(chat_id))
+        self.sent.append((time.monotonic(), chat_id, text))
+
+
+class FakeMessage:
+    def __init__(self, chat_id=1, message_id=1):
+        self.chat_id, self.message_id = chat_id, message_id
+        self.texts = []
+
+    async def edit_text(self, text, **kwargs):
+        self.texts.append(text)
+
+
+def test_retry_after_pauses_every_chat(monkeypatch):
+    # Nessun nuovo tentativo: la chat 1 rinuncia, ma il flood wait vale anche per la chat 2
+    monkeypatch.setattr(outbox_module, 'MAX_RETRIES', 0)
+
+    async def scenario():
+        box = Outbox(chat_interval=0.0, global_interval=0.0)
+        bot = FakeBot(flood={1: 0.2})
+        start = time.monotonic()
+        results = await asyncio.gather(box.send(bot, 1, 'a'), box.send(bot, 2, 'b'), return_exceptions=True)
+        return start, bot.sent, results
+
+    start, sent, results = asyncio.run(scenario())
+    assert isinstance(results[0], RetryAfter)
+    assert [chat for _, chat, _ in sent] == [2]
+    assert sent[0][0] - start >= 0.2
+
+
+def test_retry_after_resends():
+    async def scenario():
+        box = Outbox(chat_interval=0.0, global_interval=0.0)
+        bot = FakeBot(flood={1: 0.1})
+        start = time.monotonic()
+        await box.send(bot, 1, 'a')
+        return start, bot.sent
+
+    start, sent = asyncio.run(scenario())
+    assert [chat for _, chat, _ in sent] == [1]
+    assert sent[0][0] - start >= 0.1
+
+
+def test_chat_locks_released_after_delivery():
+    async def scenario():
+        box = Outbox(chat_interval=0.01, global_interval=0.0)
+        bot = FakeBot()
+        await asyncio.gather(*(box.send(bot, chat, 'x') for chat in (1, 1, 2, 3)))
+        return box, bot
+
+    box, bot = asyncio.run(scenario())
+    assert len(bot.sent) == 4
+    assert box._chat_locks == {} and box._chat_users == {}
+
+
+def test_chat_slots_pruned(monkeypatch):
+    monkeypatch.setattr(outbox_module, 'CHAT_STATE_MAX', 8)
+
+    async def scenario():
+        box = Outbox(chat_interval=0.001, global_interval=0.0)
+        bot = FakeBot()
+        for chat in range(50):
+            await box.send(bot, chat, 'x')
+            await asyncio.sleep(0.002)
+        return box
+
+    box = asyncio.run(scenario())
+    assert len(box._chat_next) <= 8
+
+
+def test_status_edits_coalesce():
+    async def scenario():
+        box = Outbox(chat_interval=0.05, global_interval=0.0)
+        message = FakeMessage()
+        for step in range(5):
+            task = box.edit(message, f"passo {step}", status=True)
+        await task
+        return message
+
+    message = asyncio.run(scenario())
+    assert message.texts[-1] == 'passo 4'
+    assert len(message.texts) <= 2
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+import profiler as profiler_module
+from profiler import MAX_PROFILE_REQUESTS, MAX_WINDOW_SECONDS, Profiler
+
+
+def busy_profiled(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def busy_other(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_request_session_samples_only_its_request():
+    profiler = Profiler()
+    profiler.arm(1)
+
+    async def request():
+        session = profiler.begin('request')
+        await profiler.to_thread(busy_profiled, 0.3)
+        await asyncio.sleep(0.2)  # intanto il loop esegue l'altro task
+        return profiler.end(session)
+
+    async def other():
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(busy_other, 0.3)
+        await asyncio.sleep(0.3)
+        busy_other(0.15)  # sul thread del loop, mentre la richiesta attende
+
+    async def scenario():
+        report, _ = await asyncio.gather(request(), other())
+        return report
+
+    report = asyncio.run(scenario())
+    assert report['samples'] > 0
+    assert 'busy_profiled' in report['collapsed']
+    assert 'busy_other' not in report['collapsed']
+
+
+def test_window_samples_every_thread():
+    profiler = Profiler()
+    session = profiler.start_window(1)
+
+    async def scenario():
+        await asyncio.to_thread(busy_other, 0.2)
+
+    asyncio.run(scenario())
+    assert 'busy_other' in profiler.end(session)['collapsed']
+
+
+def test_limits():
+    profiler = Profiler()
+    profiler.arm(1000)
+    assert profiler.remaining == MAX_PROFILE_REQUESTS
+    profiler.arm(-3)
+    assert profiler.remaining == 0 and not profiler.enabled
+    for seconds in (0, MAX_WINDOW_SECONDS + 1):
+        with pytest.raises(ValueError):
+            profiler.start_window(seconds)
+
+
+def test_stop_ends_active_window():
+    profiler = Profiler()
+    profiler.arm(3)
+    session = profiler.start_window(60)
+    assert profiler.stop() is session
+    assert profiler.remaining == 0
+    assert profiler.end(session) is not None
+    assert not profiler.enabled
+    # La chiusura programmata della finestra arriva dopo: niente secondo report
+    assert profiler.end(session) is None
+
+
+def test_detach_releases_session_for_later_requests():
+    profiler = Profiler()
+    profiler.arm(1)
+
+    async def updates():
+        # Come PTB in sequenza: più update nello stesso task
+        session = profiler.begin('request')
+        await profiler.to_thread(busy_profiled, 0.01)
+        profiler.detach(session)
+        profiler.end(session)
+        assert profiler_module._current_session.get() is None
+        assert profiler.begin('request') is None  # profiler non più armato
+
+    asyncio.run(updates())
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import recheck_cache
+from recheck_cache import RecheckCache, expected_end, parse_kickoff
+
+
+def utc(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_parse_kickoff_uses_slip_timezone():
+    # Inverno: Roma = UTC+1; estate: UTC+2 (indipendente dal fuso del server)
+    assert parse_kickoff("05/02/2026 20:45") == utc(2026, 2, 5, 19, 45)
+    assert parse_kickoff("05/07/2026 20:45") == utc(2026, 7, 5, 18, 45)
+    assert parse_kickoff("05/02/2026") == utc(2026, 2, 4, 23, 0)
+
+
+def test_parse_kickoff_configurable_timezone(monkeypatch):
+    assert parse_kickoff("05/02/2026 20:45", ZoneInfo("Europe/London")) == utc(2026, 2, 5, 20, 45)
+    monkeypatch.setattr(recheck_cache, 'SLIP_TIMEZONE', ZoneInfo("America/New_York"))
+    assert parse_kickoff("05/02/2026 20:45") == utc(2026, 2, 6, 1, 45)
+
+
+@pytest.mark.parametrize('value', ["", None, "domani sera", "32/01/2026 20:00"])
+def test_parse_kickoff_invalid(value):
+    assert parse_kickoff(value) is None
+
+
+def test_no_recheck_before_expected_end():
+    kickoff = parse_kickoff("05/02/2026 20:45")
+    end = expected_end('calcio', "05/02/2026 20:45")
+    assert end == kickoff + 115 * 60
+
+    cache = RecheckCache()
+    result = cache.store(('k',), {'details': 'Partita non trovata'}, 'calcio', "05/02/2026 20:45", now=kickoff)
+    assert result['next_check'] == end
+    assert cache.get(('k',), now=end - 1) is not None
+    assert cache.get(('k',), now=end) is None
+
+
+def test_backoff_after_expected_end():
+    cache = RecheckCache()
+    now = utc(2026, 3, 1, 12, 0)
+    delays = [cache.store(('k',), {}, 'nba', "01/02/2026 20:00", now=now)['next_check'] - now for _ in range(4)]
+    assert delays == [300, 600, 1200, 2400]
+
+
+def test_entries_bounded_lru(monkeypatch):
+    monkeypatch.setattr(recheck_cache, 'MAX_ENTRIES', 3)
+    cache = RecheckCache()
+    now = utc(2026, 3, 1, 12, 0)
+    for key in ('a', 'b', 'c'):
+        cache.store((key,), {}, 'nba', "01/02/2026 20:00", now=now)
+    assert cache.get(('a',), now=now) is not None  # 'a' usata di recente: resta
+    cache.store(('d',), {}, 'nba', "01/02/2026 20:00", now=now)
+    assert cache.get(('b',), now=now) is None
+    assert [cache.get((key,), now=now) is not None for key in ('a', 'c', 'd')] == [True, True, True]
+    assert len(cache._entries) == 3
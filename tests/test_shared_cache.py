@@ -0,0 +1,151 @@
+import io
+import os
+import socket
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+import pytest
+
+import sports_providers
+from shared_cache import CacheError, LazyCache, MemoryCache, RedisCache, SQLiteCache, open_cache
+
+REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+def redis_available() -> bool:
+    parsed = urlparse(REDIS_URL)
+    try:
+        socket.create_connection((parsed.hostname or 'localhost', parsed.port or 6379), timeout=0.5).close()
+    except OSError:
+        return False
+    return True
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request, tmp_path):
+    prefix = f"test:{uuid.uuid4().hex}:"
+    if request.param == 'memory':
+        yield MemoryCache(prefix=prefix)
+    elif request.param == 'sqlite':
+        yield SQLiteCache(str(tmp_path / 'cache.db'), prefix=prefix)
+    else:
+        if not redis_available():
+            pytest.skip(f"Redis non raggiungibile su {REDIS_URL}")
+        parsed = urlparse(REDIS_URL)
+        redis = RedisCache(parsed.hostname or 'localhost', parsed.port or 6379,
+                           int(parsed.path.lstrip('/') or 0), parsed.password, prefix=prefix)
+        yield redis
+        keys = redis.command('KEYS', prefix + '*') or []
+        if keys:
+            redis.command('DEL', *keys)
+
+
+def test_roundtrip_json_types(backend):
+    backend.set('match', {'home': 'Inter', 'score': (2, 1), 1: None})
+    assert backend.get('match') == {'home': 'Inter', 'score': [2, 1], '1': None}
+    backend.delete('match')
+    assert backend.get('match') is None
+
+
+def test_ttl_expires(backend):
+    backend.set('short', 'x', ttl=0.05)
+    backend.set('long', 'y', ttl=60)
+    time.sleep(0.15)
+    assert backend.get('short') is None
+    assert backend.get('long') == 'y'
+
+
+def test_incr_counts_and_keeps_first_ttl(backend):
+    assert backend.incr('calls', ttl=60) == 1
+    assert backend.incr('calls', 2, ttl=60) == 3
+    assert backend.get('calls') == 3
+
+
+def test_incr_concurrent(backend):
+    threads = [threading.Thread(target=lambda: [backend.incr('n') for _ in range(50)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert backend.get('n') == 200
+
+
+def test_memory_cache_is_lru():
+    memory = MemoryCache(max_entries=2, prefix='')
+    memory.set('a', 1)
+    memory.set('b', 2)
+    memory.get('a')
+    memory.set('c', 3)
+    assert memory.get('b') is None
+    assert memory.get('a') == 1 and memory.get('c') == 3
+
+
+def test_open_cache_schemes(tmp_path):
+    assert isinstance(open_cache(''), MemoryCache)
+    assert isinstance(open_cache(f"sqlite:///{tmp_path}/c.db"), SQLiteCache)
+    redis = open_cache('redis://:secret@cache.local:6380/2')
+    assert (redis.host, redis.port, redis.db, redis.password) == ('cache.local', 6380, 2, 'secret')
+    with pytest.raises(ValueError):
+        open_cache('memcached://localhost')
+
+
+def test_resp_encoding_and_replies():
+    assert RedisCache.encode(['SET', 'k', 'è']) == b"*3\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\xc3\xa8\r\n"
+    redis = RedisCache(prefix='')
+    redis._reader = io.BytesIO(b"+OK\r\n:42\r\n$5\r\nhello\r\n$-1\r\n*2\r\n$1\r\na\r\n:1\r\n-ERR wrong\r\n")
+    assert redis._read_reply() == 'OK'
+    assert redis._read_reply() == 42
+    assert redis._read_reply() == 'hello'
+    assert redis._read_reply() is None
+    assert redis._read_reply() == ['a', 1]
+    with pytest.raises(CacheError):
+        redis._read_reply()
+
+
+def test_unreachable_redis_is_empty_cache():
+    redis = RedisCache('127.0.0.1', 1, timeout=0.2, prefix='')
+    assert redis.get('x') is None
+    assert redis.incr('x') is None
+
+
+class SlowSession:
+    """Prima risposta più lenta di HEDGE_DELAY: parte la richiesta di riserva"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        time.sleep(0.3 if first else 0.01)
+        response = sports_providers.requests.Response()
+        response.status_code = 200
+        response._content = b'{"data": []}'
+        return response
+
+
+def test_calls_counted_per_request_sent(monkeypatch):
+    memory = MemoryCache(prefix='')
+    monkeypatch.setattr(sports_providers, 'cache', memory)
+    monkeypatch.setattr(sports_providers, 'HEDGE_DELAY', 0.05)
+    http = sports_providers.HttpClient(max_workers=2)
+    http.session = SlowSession()
+    provider = sports_providers.SportsProvider(http)
+    provider.name = 'test'
+
+    provider.request('http://example.invalid/games')
+    assert http.session.calls == 2
+    assert memory.get(provider.calls_key()) == 2
+
+
+def test_lazy_cache_opens_on_first_use(tmp_path):
+    path = tmp_path / 'cache.db'
+    lazy = LazyCache(f"sqlite:///{path}")
+    assert not path.exists()
+    lazy.set('k', [1, 2])
+    assert path.exists() and isinstance(lazy.backend, SQLiteCache)
+    assert lazy.get('k') == [1, 2]
@@ -0,0 +1,70 @@
+import pytest
+
+from slip_parser import detect_sport, looks_like_slip, parse_date, parse_slip_text
+
+SINGLE = """Serie A
+Inter vs Milan 01/03/2026 20:45
+Esito: 1 @ 1,85
+Importo: 10,00 €
+Vincita potenziale: 18,50 €"""
+
+MULTIPLE = """NBA
+Lakers - Celtics
+LeBron James Over 25.5 punti @ 1.90
+Warriors - Suns
+Stephen Curry Over 4.5 tiri da 3 @ 2.10
+Quota totale: 3,99
+Puntata 5,00 €
+Vincita: 19,95"""
+
+
+def test_single_slip():
+    info = parse_slip_text(SINGLE)
+    assert (info['sport'], info['match'], info['bet_type']) == ('Calcio', 'Inter vs Milan', '1')
+    assert (info['quota'], info['importo'], info['vincita_potenziale']) == (1.85, 10.0, 18.5)
+    assert info['date'] == '01/03/2026 20:45'
+    assert info['legs'] is None
+
+
+def test_multiple_slip():
+    info = parse_slip_text(MULTIPLE)
+    assert [leg['match'] for leg in info['legs']] == ['Lakers vs Celtics', 'Warriors vs Suns']
+    assert [leg['quota'] for leg in info['legs']] == [1.9, 2.1]
+    assert (info['quota'], info['importo'], info['vincita_potenziale']) == (3.99, 5.0, 19.95)
+
+
+def test_labelled_slip_with_thousands():
+    info = parse_slip_text("Evento: Sinner vs Alcaraz\nEsito: Sinner @ 2,10\nPuntata: 1.250,00\nATP Finals")
+    assert (info['sport'], info['bet_type'], info['importo']) == ('Tennis', 'Sinner', 1250.0)
+
+
+@pytest.mark.parametrize('amount, payout, expected', [
+    ("1.000 €", "1.850,00 €", 1000.0),
+    ("2.500€", "4.625€", 2500.0),
+    ("12,50 €", "23,13", 12.5),
+])
+def test_thousands_amounts(amount, payout, expected):
+    info = parse_slip_text(f"Serie A\nInter vs Milan\nEsito: 1 @ 1,85\nImporto: {amount}\nVincita: {payout}")
+    assert info['importo'] == expected
+    assert info['vincita_potenziale'] == pytest.approx(expected * 1.85, abs=0.01)
+
+
+def test_inconsistent_payout_falls_back():
+    assert parse_slip_text("Serie A\nInter vs Milan\nEsito: 1 @ 1,85\nImporto: 10\nVincita: 1.850") is None
+
+
+@pytest.mark.parametrize('text', [
+    "Inter vs Milan\nImporto: 10",          # manca l'esito
+    "Inter vs Milan\nEsito: 1 @ 1,85",      # sport non riconoscibile, niente importo
+    "Ciao, come va? 1.5",
+])
+def test_incomplete_slip_falls_back(text):
+    assert parse_slip_text(text) is None
+
+
+def test_helpers():
+    assert looks_like_slip(SINGLE) and not looks_like_slip("Ciao, come va?")
+    assert parse_date("giocata il 1/3/2026 alle 20.45") == "01/03/2026 20:45"
+    assert parse_date("nessuna data") is None
+    assert detect_sport("Champions League, Over 2.5 gol") == 'Calcio'
+    assert detect_sport("NBA oppure ATP?") is None
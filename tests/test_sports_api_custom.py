@@ -0,0 +1,82 @@
+import pytest
+
+from sports_api_custom import SportsAPIManager
+
+GAME = {'home': 'Los Angeles Lakers', 'away': 'Boston Celtics', 'home_score': 110, 'away_score': 104}
+# Quarti: 1° tempo 55-50, 2° tempo 55-54
+PERIODS = [(30, 20), (25, 30), (28, 24), (27, 30)]
+
+
+@pytest.fixture(scope='module')
+def api():
+    return SportsAPIManager()
+
+
+@pytest.mark.parametrize('bet_type, side', [
+    ('Lakers', 'home'),
+    ('Boston Celtics', 'away'),
+    ('Vincente 1', 'home'),
+    ('2', 'away'),
+    ('Over 213.5', None),
+])
+def test_nba_bet_team(api, bet_type, side):
+    assert api.nba_bet_team(bet_type, GAME) == side
+
+
+@pytest.mark.parametrize('bet_type, period', [
+    ('1° tempo Lakers', [0, 1]),
+    ('Secondo tempo Over 100.5', [2, 3]),
+    ('2T Celtics', [2, 3]),
+    ('Q3 Lakers', [2]),
+    ('3° quarto Over 50.5', [2]),
+    ('Lakers -5.5', None),
+])
+def test_parse_nba_period(api, bet_type, period):
+    assert api.parse_nba_period(bet_type) == period
+
+
+@pytest.mark.parametrize('bet_type, won', [
+    # Testa a testa
+    ('Lakers', True),
+    ('Celtics', False),
+    ('1', True),
+    ('2', False),
+    # Handicap con segno
+    ('Lakers -5.5', True),
+    ('Lakers -6.5', False),
+    ('Celtics +6.5', True),
+    ('Handicap Lakers +3.5', True),
+    ('Handicap Lakers', None),  # linea mancante
+    # Push sulla linea
+    ('Lakers -6', None),
+    ('Celtics +6', None),
+    ('Under 214', None),
+    # Totale partita e totale squadra
+    ('Over 213.5', True),
+    ('Under 213.5', False),
+    ('Lakers Over 109.5', True),
+    ('Celtics Over 104.5', False),
+    ('Celtics Under 104.5', True),
+    # Quarti e tempi
+    ('1° tempo Lakers', True),
+    ('1° tempo Over 105.5', False),
+    ('1° tempo Lakers -5', None),
+    ('2T Celtics', False),
+    ('Q3 Lakers', True),
+    ('Q4 Celtics -2.5', True),
+])
+def test_evaluate_nba_game_bet(api, bet_type, won):
+    assert api.evaluate_nba_game_bet(bet_type, GAME, PERIODS)[0] is won
+
+
+def test_period_scores_in_details(api):
+    _, details = api.evaluate_nba_game_bet('Q3 Lakers', GAME, PERIODS)
+    assert details == 'Parziale: 28-24 (totale 52)'
+    _, details = api.evaluate_nba_game_bet('Lakers -6', GAME, PERIODS)
+    assert details.endswith('| Push')
+
+
+def test_missing_period_scores(api):
+    assert api.evaluate_nba_game_bet('1° tempo Lakers', GAME, []) == (None, 'Punteggi per quarto non disponibili')
+    # Senza quarto/tempo i parziali non servono
+    assert api.evaluate_nba_game_bet('Lakers', GAME, [])[0] is True
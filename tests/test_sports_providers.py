@@ -0,0 +1,119 @@
+import time
+
+import pytest
+import requests
+
+import sports_providers
+from sports_providers import HttpClient, ProviderError, ProviderRouter, SportsProvider
+
+
+class FakeProvider(SportsProvider):
+    capabilities = ('football_matches',)
+
+    def __init__(self, name, fail=False):
+        super().__init__(HttpClient(max_workers=1))
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def football_matches(self, date, deadline=None):
+        self.calls += 1
+        if self.fail:
+            self.health.record(0.1, False)
+            raise ProviderError(f"{self.name}: giù")
+        self.health.record(0.1, True)
+        return [{'provider': self.name}]
+
+
+def test_base_provider_defaults_are_empty():
+    provider = SportsProvider(HttpClient(max_workers=1))
+    assert provider.nba_games('2026-03-01') == []
+    assert provider.nba_player_ref('LeBron James') is None
+    assert provider.nba_player_stats(1, 2) is None
+    assert provider.nba_period_scores('2026-03-01') == {}
+    assert provider.football_matches('2026-03-01') == []
+    assert provider.tennis_matches('2026-03-01') == []
+
+
+def test_router_fails_over_to_healthiest():
+    down, backup = FakeProvider('down', fail=True), FakeProvider('backup')
+    router = ProviderRouter([down, backup])
+
+    for _ in range(3):
+        assert router.run('football_matches', lambda p: p.football_matches('2026-03-01')) == [{'provider': 'backup'}]
+    # Dopo il primo errore il provider giù scende in classifica e non viene più chiamato
+    assert down.calls == 1
+    assert router.ranked('football_matches')[0] is backup
+
+
+def test_breaker_opens_after_consecutive_errors():
+    provider = FakeProvider('down', fail=True)
+    for _ in range(sports_providers.BREAKER_THRESHOLD - 1):
+        provider.health.record(0.1, False)
+    assert not provider.health.is_open
+    provider.health.record(0.1, False)
+    assert provider.health.is_open
+    provider.health.record(0.1, True)
+    assert not provider.health.is_open
+
+
+def test_router_without_capability():
+    router = ProviderRouter([FakeProvider('calcio')])
+    with pytest.raises(ProviderError):
+        router.run('tennis_matches', lambda p: p.tennis_matches('2026-03-01'))
+
+
+def test_router_raises_last_error_when_all_fail():
+    router = ProviderRouter([FakeProvider('a', fail=True), FakeProvider('b', fail=True)])
+    with pytest.raises(ProviderError, match='b: giù'):
+        router.run('football_matches', lambda p: p.football_matches('2026-03-01'))
+
+
+class CountingSession:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.sent.append(timeout)
+        time.sleep(self.delay)
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+def test_expired_deadline_sends_nothing():
+    http = HttpClient(max_workers=1)
+    http.session = CountingSession()
+    with pytest.raises(requests.Timeout):
+        http.get('http://example.invalid', deadline=time.monotonic() - 1)
+    assert http.session.sent == []
+
+
+def test_hedge_not_sent_after_deadline(monkeypatch):
+    monkeypatch.setattr(sports_providers, 'HEDGE_DELAY', 0.05)
+    http = HttpClient(max_workers=1)
+    http.session = CountingSession(delay=0.3)
+    # Con un solo worker la richiesta di riserva resta in coda oltre la deadline
+    with pytest.raises(requests.Timeout):
+        http.get('http://example.invalid', deadline=time.monotonic() + 0.15)
+    time.sleep(0.3)
+    assert len(http.session.sent) == 1
+    assert http.session.sent[0] <= 0.15
+
+
+def test_hedged_request_wins(monkeypatch):
+    monkeypatch.setattr(sports_providers, 'HEDGE_DELAY', 0.05)
+    http = HttpClient(max_workers=2)
+    http.session = CountingSession()
+    send = http.session.get
+    calls = iter([0.5, 0.0])  # prima richiesta lenta, riserva immediata
+
+    def slow_then_fast(url, **kwargs):
+        time.sleep(next(calls))
+        return send(url, **kwargs)
+
+    http.session.get = slow_then_fast
+    start = time.monotonic()
+    assert http.get('http://example.invalid', deadline=start + 2).status_code == 200
+    assert time.monotonic() - start < 0.4
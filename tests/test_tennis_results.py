@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pytest
+
+from tennis_results import evaluate_tennis_bet
+
+PLAYERS = ("Jannik Sinner", "Carlos Alcaraz")
+# Sinner vince 2-1, game 16-16
+MATCH = {
+    'home': 'J. Sinner', 'away': 'C. Alcaraz',
+    'sets': [(6, 4), (3, 6), (7, 6)],
+    'winner': 'home', 'finished': True,
+}
+
+
+@pytest.mark.parametrize("bet_type, expected", [
+    ("Sinner", True),
+    ("Sinner vincente", True),
+    ("Vincente: Alcaraz", False),
+    ("T/T 2", False),
+    ("J. Sinner to win", True),
+    ("Sinner 2-1", True),
+    ("Alcaraz 2-1", False),
+    ("Sinner 2 - 0", False),
+    ("Over 30.5", True),
+    ("Under 2.5 set", False),
+])
+def test_settled_markets(bet_type, expected):
+    assert evaluate_tennis_bet(bet_type, MATCH, PLAYERS) is expected
+
+
+@pytest.mark.parametrize("bet_type", [
+    "Alcaraz +3.5 games",
+    "Handicap set Alcaraz +1.5",
+    "Alcaraz vince almeno un set",
+    "Sinner vince il primo set",
+    "Vincente",
+    "2-1",
+])
+def test_unrecognised_markets_stay_open(bet_type):
+    assert evaluate_tennis_bet(bet_type, MATCH, PLAYERS) is None
+
+
+class FakeRouter:
+    """Router con un solo provider che restituisce le partite di `days`"""
+
+    def __init__(self, days):
+        self.days = days
+        self.calls = []
+
+    def run(self, capability, call):
+        return call(self)
+
+    def tennis_matches(self, date, tournament=None):
+        self.calls.append((date, tournament))
+        return [dict(m) for m in self.days.get(date, []) if tournament in (None, m['tournament'])]
+
+
+def make_match(home, away, finished=True):
+    return {'home': home, 'away': away, 'tournament': 'ATP Roma', 'sets': [(6, 4), (6, 4)],
+            'winner': 'home', 'finished': finished}
+
+
+def test_day_refetched_until_final(monkeypatch):
+    import tennis_results
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    router = FakeRouter({today: [make_match('Sinner', 'Alcaraz')]})
+    index = tennis_results.TennisResultsIndex(router)
+    assert index.find('Musetti', 'Ruud', today) is None
+
+    # La partita finisce dopo il primo download: il giorno non è definitivo e va riscaricato
+    router.days[today].append(make_match('Musetti', 'Ruud'))
+    assert index.find('Musetti', 'Ruud', today) is None  # ancora entro DAY_REFRESH_SECONDS
+    monkeypatch.setattr(tennis_results, 'DAY_REFRESH_SECONDS', 0)
+    assert index.find('Musetti', 'Ruud', today)['home'] == 'Musetti'
+    assert len(router.calls) == 2
+
+
+def test_final_day_not_refetched(monkeypatch):
+    import tennis_results
+
+    monkeypatch.setattr(tennis_results, 'DAY_REFRESH_SECONDS', 0)
+    router = FakeRouter({'2020-01-01': [make_match('Sinner', 'Alcaraz')]})
+    index = tennis_results.TennisResultsIndex(router)
+    index.find('Sinner', 'Alcaraz', '2020-01-01')
+    index.find('Sinner', 'Alcaraz', '2020-01-01')
+    assert router.calls == [('2020-01-01', None)]
+
+
+def test_old_days_evicted(monkeypatch):
+    import tennis_results
+
+    monkeypatch.setattr(tennis_results, 'MAX_DAYS', 3)
+    index = tennis_results.TennisResultsIndex(FakeRouter({}))
+    for day in range(1, 6):
+        index.load_day(f'2020-01-0{day}')
+    assert sorted(index._days) == ['2020-01-03', '2020-01-04', '2020-01-05']